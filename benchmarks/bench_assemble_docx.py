@@ -0,0 +1,84 @@
+"""
+Benchmark: streaming assembly of many pages into one DOCX.
+
+Builds a synthetic output folder of N pages by cycling the sample pages in output/ (483, 620, 673),
+with an image block on every 10th page (the same image, so it must be stored once),
+then assembles them with docx_assembler.assemble_docx and reports pages/s, peak RSS and file size.
+
+Usage (from the repository root):
+    python benchmarks/bench_assemble_docx.py
+    python benchmarks/bench_assemble_docx.py --pages 200
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from docx_assembler import assemble_docx
+
+SAMPLE_PAGES = ('483', '620', '673')
+
+
+def make_pages(base_dir: str, num_pages: int):
+    from PIL import Image
+
+    samples = []
+    for page in SAMPLE_PAGES:
+        with open(os.path.join(ROOT, 'output', page, f'{page}_res.json'), 'r', encoding='utf-8') as f:
+            samples.append(json.load(f))
+
+    image = Image.new('RGB', (320, 200), (200, 220, 240))
+    page_dirs = []
+    for i in range(num_pages):
+        page_number = str(i + 1)
+        page_dir = os.path.join(base_dir, page_number)
+        os.makedirs(os.path.join(page_dir, 'imgs'), exist_ok=True)
+
+        data = dict(samples[i % len(samples)])
+        blocks = list(data['parsing_res_list'])
+        if i % 10 == 0:
+            bbox = [10, 10, 330, 210]
+            blocks.insert(0, {'block_label': 'image', 'block_content': '', 'block_bbox': bbox})
+            image.save(os.path.join(page_dir, 'imgs', f"img_in_image_box_{'_'.join(map(str, bbox))}.png"))
+        data['parsing_res_list'] = blocks
+
+        with open(os.path.join(page_dir, f'{page_number}_res.json'), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        page_dirs.append(page_dir)
+    return page_dirs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming DOCX assembly benchmark")
+    parser.add_argument('--pages', type=int, default=1000)
+    args = parser.parse_args()
+
+    base_dir = tempfile.mkdtemp(prefix='bench_assemble_')
+    try:
+        page_dirs = make_pages(base_dir, args.pages)
+        save_path = os.path.join(base_dir, 'book.docx')
+
+        start = time.perf_counter()
+        pages = assemble_docx(page_dirs, save_path)
+        elapsed = time.perf_counter() - start
+
+        # ru_maxrss is in KiB on Linux, bytes on macOS
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == 'darwin' else peak_rss / 1024
+
+        print(f"Assembled {pages} pages in {elapsed:.2f}s ({pages / elapsed:.1f} pages/s)")
+        print(f"Peak RSS: {peak_rss_mb:.1f} MB, DOCX size: {os.path.getsize(save_path) / 1024 / 1024:.1f} MB")
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: DOCX table build time, fast XML path vs. cell-by-cell python-docx path.
+
+Synthetic tables of 10 to 2,000 rows (5 columns, a colspan header row, a rowspan first column
+every 10 rows) are added to a fresh DOCXBuilder with each path.
+A near-constant time-per-row column means near-linear build time.
+
+Usage (from the repository root):
+    python benchmarks/bench_docx_tables.py
+    python benchmarks/bench_docx_tables.py --rows 10 100 500 --skip_slow 1000
+The cell-by-cell path is skipped above 500 rows by default (it takes minutes there).
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx_builder import DOCXBuilder
+from table_model import TableModel, TableCell
+
+
+def synthetic_table(num_rows: int, num_cols: int = 5) -> TableModel:
+    rows = [[TableCell("Xét nghiệm", rowspan=2),
+             TableCell("Tính theo gam", colspan=2),
+             TableCell("Tính theo mol", colspan=num_cols - 3)]]
+    rows.append([TableCell(f"Đơn vị {c}") for c in range(num_cols - 1)])
+    r = 2
+    while r < num_rows:
+        span = min(10, num_rows - r)
+        rows.append([TableCell(f"Hormon {r}", rowspan=span)] +
+                    [TableCell(f"{r * c},5-38,8 pmol") for c in range(1, num_cols)])
+        for k in range(1, span):
+            rows.append([TableCell(f"{(r + k) * c} ng") for c in range(1, num_cols)])
+        r += span
+    return TableModel(rows)
+
+
+def time_build(table: TableModel, fast: bool) -> float:
+    builder = DOCXBuilder()
+    start = time.perf_counter()
+    builder.add_table(table, fast=fast)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DOCX table build benchmark")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10, 50, 100, 250, 500, 1000, 2000])
+    parser.add_argument('--skip_slow', type=int, default=500,
+                        help='Skip the cell-by-cell path above this many rows.')
+    args = parser.parse_args()
+
+    print(f"{'rows':>6} {'fast (s)':>10} {'fast us/row':>12} {'cellwise (s)':>13} {'cellwise us/row':>16} {'speedup':>8}")
+    for num_rows in args.rows:
+        table = synthetic_table(num_rows)
+        fast = time_build(table, fast=True)
+        if args.skip_slow is not None and num_rows > args.skip_slow:
+            print(f"{num_rows:>6} {fast:>10.4f} {fast / num_rows * 1e6:>12.1f} {'-':>13} {'-':>16} {'-':>8}")
+            continue
+        slow = time_build(table, fast=False)
+        print(f"{num_rows:>6} {fast:>10.4f} {fast / num_rows * 1e6:>12.1f} {slow:>13.4f} "
+              f"{slow / num_rows * 1e6:>16.1f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
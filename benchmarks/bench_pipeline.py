@@ -0,0 +1,241 @@
+"""
+Benchmark suite: end-to-end throughput of the mass conversion stages, with regression baselines.
+
+Generates synthetic Vietnamese text and table pages (synthetic_pages.py), then runs every page through the
+same stages as main.mass_conversion (ocr_page -> TextCorrector.improve_json -> build_docx_from_ocr_json) and
+records pages/s, p50 / p95 latency per stage and peak RSS.
+
++ --models stub (default): deterministic local stand-ins for PPStructureV3 and the seq2seq corrector
+  (stub_models.py); no network, GPU, Paddle or Torch needed, results are comparable between runs
++ --models real: the real components (models must be downloadable or cached)
+
+Results are written as JSON (--output) and compared against a stored baseline (--baseline); the run exits
+with status 1 when a metric is worse than the baseline by more than --tolerance. Baselines are
+machine-specific: record one per machine / CI runner with --save-baseline.
+
+Usage (from the repository root):
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --pages 24 --save-baseline
+    python benchmarks/bench_pipeline.py --models real --baseline benchmarks/baselines/real.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+STAGES = ('ocr', 'correction', 'docx')
+# metric -> True if higher is better
+HIGHER_IS_BETTER = {'pages_per_sec': True}
+# Absolute changes below these never count as regressions (timer / allocator noise on millisecond stages)
+NOISE_FLOOR = {'p50': 0.005, 'p95': 0.005, 'peak_rss_mb': 8.0}
+
+
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(models: str, num_pages: int, seed: int, work_dir: str) -> dict:
+    from synthetic_pages import make_pages
+
+    if models == 'stub':
+        import stub_models
+        stub_models.install()
+
+    from components import create_component
+    from docx_builder import build_docx_from_ocr_json
+    from main import ocr_page
+    from output_folder import OutputPageFolder
+
+    input_folder = os.path.join(work_dir, 'input')
+    output_base = os.path.join(work_dir, 'output')
+    paths = make_pages(input_folder, num_pages, seed=seed)
+
+    load_start = time.perf_counter()
+    ocr_engine = create_component('ocr_engine')
+    # No correction cache: every run has to do the same model work
+    text_corrector = create_component('text_corrector', use_cache=False)
+    load_seconds = time.perf_counter() - load_start
+
+    def process(input_path, output_folder, latencies=None):
+        timings = {}
+        start = time.perf_counter()
+        page = ocr_page(ocr_engine, input_path, output_folder)
+        timings['ocr'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        text_corrector.improve_json(input_json=output_folder.res_json_path, output_json=output_folder.improved_json_path)
+        timings['correction'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        build_docx_from_ocr_json(res_path=output_folder.page_output_dir, save_path=output_folder.docx_path,
+                                 source_image_path=input_path, source_page=page)
+        timings['docx'] = time.perf_counter() - start
+
+        if latencies is not None:
+            for stage, seconds in timings.items():
+                latencies[stage].append(seconds)
+
+    # Warm-up page (lazy initialization, first-call overheads) is not measured
+    process(paths[0], OutputPageFolder(base_output_dir=os.path.join(work_dir, 'warmup'), page_number='1'))
+
+    latencies = {stage: [] for stage in STAGES}
+    wall_start = time.perf_counter()
+    for path in paths:
+        page_number = os.path.splitext(os.path.basename(path))[0]
+        process(path, OutputPageFolder(base_output_dir=output_base, page_number=page_number), latencies)
+    wall_seconds = time.perf_counter() - wall_start
+
+    return {
+        'meta': {
+            'models': models,
+            'pages': num_pages,
+            'seed': seed,
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'machine': platform.node(),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'commit': git_commit(),
+        },
+        'load_seconds': round(load_seconds, 4),
+        'wall_seconds': round(wall_seconds, 4),
+        'pages_per_sec': round(num_pages / wall_seconds, 4),
+        'stages': {
+            stage: {
+                'p50': round(percentile(values, 0.5), 5),
+                'p95': round(percentile(values, 0.95), 5),
+                'mean': round(sum(values) / len(values), 5),
+            }
+            for stage, values in latencies.items()
+        },
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def flatten(results: dict) -> dict:
+    """Comparable metrics: pages_per_sec, <stage>.p50 / .p95, peak_rss_mb."""
+    metrics = {'pages_per_sec': results['pages_per_sec']}
+    for stage, stats in results['stages'].items():
+        metrics[f"{stage}.p50"] = stats['p50']
+        metrics[f"{stage}.p95"] = stats['p95']
+    if results.get('peak_rss_mb') is not None:
+        metrics['peak_rss_mb'] = results['peak_rss_mb']
+    return metrics
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """
+    :return: List of (metric, baseline, current, relative change, regressed).
+    """
+    rows = []
+    current, reference = flatten(results), flatten(baseline)
+    for metric, value in current.items():
+        if metric not in reference or not reference[metric]:
+            continue
+        change = (value - reference[metric]) / reference[metric]
+        worse = -change if HIGHER_IS_BETTER.get(metric, False) else change
+        noise = NOISE_FLOOR.get(metric.rsplit('.', 1)[-1], 0.0)
+        regressed = worse > tolerance and abs(value - reference[metric]) > noise
+        rows.append((metric, reference[metric], value, change, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mass conversion benchmark suite")
+    parser.add_argument('--models', choices=['stub', 'real'], default='stub',
+                        help='Deterministic stand-ins (default) or the real OCR / correction models.')
+    parser.add_argument('--pages', type=int, default=12, help='Number of synthetic pages (every 3rd has a table).')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic pages.')
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'latest.json'),
+                        help='Where to write the results JSON.')
+    parser.add_argument('--baseline', default=None,
+                        help='Baseline JSON to compare against (default: benchmarks/baselines/<models>.json).')
+    parser.add_argument('--save-baseline', dest='save_baseline', action='store_true',
+                        help='Store this run as the baseline instead of comparing.')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Max relative slowdown / growth of a metric before it counts as a regression.')
+    args = parser.parse_args()
+
+    baseline_path = args.baseline or os.path.join(BENCH_DIR, 'baselines', f'{args.models}.json')
+
+    work_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    try:
+        results = run_suite(args.models, args.pages, args.seed, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=4)
+
+    print(f"\n{results['meta']['pages']} pages ({args.models} models): {results['pages_per_sec']:.2f} pages/s, "
+          f"load {results['load_seconds']:.2f}s, peak RSS {results['peak_rss_mb'] or 0:.1f} MB")
+    for stage, stats in results['stages'].items():
+        print(f"  {stage:<11} p50 {stats['p50'] * 1000:8.1f} ms   p95 {stats['p95'] * 1000:8.1f} ms")
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        shutil.copyfile(args.output, baseline_path)
+        print(f"Baseline saved to {baseline_path}")
+        return
+
+    if not os.path.exists(baseline_path):
+        print(f"No baseline at {baseline_path} (record one with --save-baseline).")
+        return
+
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline['meta'].get('pages') != results['meta']['pages']:
+        print(f"Warning: baseline was recorded with {baseline['meta'].get('pages')} pages.")
+
+    rows = compare(results, baseline, args.tolerance)
+    print(f"\nAgainst baseline {baseline_path} ({baseline['meta'].get('commit')}, tolerance {args.tolerance:.0%}):")
+    for metric, reference, value, change, regressed in rows:
+        print(f"  {metric:<16} {reference:12.4f} -> {value:12.4f}  {change:+7.1%}  {'REGRESSION' if regressed else 'ok'}")
+
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+    print("\nNo regressions.")
+
+
+if __name__ == '__main__':
+    main()
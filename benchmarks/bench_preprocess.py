@@ -0,0 +1,98 @@
+"""
+Benchmark: decode-once preprocessing vs. decoding the full-resolution scan (for OCR, then again for crops).
+
+Writes N synthetic 600-DPI A4 scans (4960 x 7016 JPEG), then for each mode, in a fresh process:
++ full:       decode at full resolution to a BGR array (what the pipeline does with a file path),
+              then decode again to cut 3 crops (the old rebuild path)
++ preprocess: image_preprocess.preprocess_image (Config.PREPROCESS_* settings), crops from the same buffer
+and reports decode time per page and peak RSS.
+
+Usage (from the repository root):
+    python benchmarks/bench_preprocess.py
+    python benchmarks/bench_preprocess.py --pages 5
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+A4_600DPI = (4960, 7016)
+CROPS = ((400, 600, 2400, 1800), (2600, 2000, 4500, 3500), (300, 5000, 4600, 6600))
+
+
+def make_scans(base_dir: str, num_pages: int):
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    width, height = A4_600DPI
+    paths = []
+    for i in range(num_pages):
+        # Off-white page, dark grey border, rows of random "glyphs"
+        page = np.full((height, width, 3), 245, dtype=np.uint8)
+        page[:150], page[-150:], page[:, :150], page[:, -150:] = 40, 40, 40, 40
+        for y in range(400, height - 400, 90):
+            line = rng.random((40, width - 800)) < 0.35
+            page[y:y + 40, 400:width - 400][line] = 20
+        path = os.path.join(base_dir, f"{i + 1}.jpg")
+        Image.fromarray(page).save(path, quality=90, dpi=(600, 600))
+        paths.append(path)
+    return paths
+
+
+def run_mode(mode: str, paths):
+    import numpy as np
+    from PIL import Image
+
+    start = time.perf_counter()
+    for path in paths:
+        if mode == 'full':
+            with Image.open(path) as img:
+                image = np.ascontiguousarray(np.asarray(img.convert('RGB'))[:, :, ::-1])
+            with Image.open(path) as img:
+                img = img.convert('RGB')
+                crops = [img.crop(box) for box in CROPS]
+        else:
+            from image_preprocess import preprocess_image
+            page = preprocess_image(path)
+            image = page.image
+            crops = []
+            for x1, y1, x2, y2 in CROPS:
+                sx, sy = page.scale
+                box = (int(x1 / sx), int(y1 / sy), int(x2 / sx), int(y2 / sy))
+                crops.append(Image.fromarray(np.ascontiguousarray(image[box[1]:box[3], box[0]:box[2], ::-1])))
+        del image, crops
+    seconds = (time.perf_counter() - start) / len(paths)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode} {seconds:.4f} {peak_mb:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode-once preprocessing benchmark")
+    parser.add_argument('--pages', type=int, default=3, help='Number of synthetic 600-DPI scans.')
+    parser.add_argument('--_mode', help=argparse.SUPPRESS)
+    parser.add_argument('--_paths', nargs='*', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._mode:
+        run_mode(args._mode, args._paths)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_scans(tmp, args.pages)
+        print(f"{args.pages} synthetic scans at {A4_600DPI[0]}x{A4_600DPI[1]} (600 DPI A4)")
+        for mode in ('full', 'preprocess'):
+            out = subprocess.run([sys.executable, __file__, '--_mode', mode, '--_paths', *paths],
+                                 capture_output=True, text=True, check=True, cwd=ROOT).stdout.split()
+            print(f"  {mode:<11} decode {float(out[1]) * 1000:7.1f} ms/page   peak RSS {float(out[2]):7.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: remote OCR throughput vs. requests in flight (remote_ocr.RemoteOCRPool against mock_llm_server.py).
+
+OCRs the same synthetic pages through the 'gemini' backend pointed at a local mock server with a fixed answer
+latency, once per in-flight limit. With one request at a time, throughput is 1 / latency whatever the machine;
+with N in flight it should grow about N-fold, until the rate limit (--rpm), the server (--max-concurrent) or the
+local encoding / saving work is the bottleneck.
+
+Usage (from the repository root):
+    python benchmarks/bench_remote_ocr.py
+    python benchmarks/bench_remote_ocr.py --pages 64 --latency 4.0 --in-flight 1 4 16 32
+    python benchmarks/bench_remote_ocr.py --fail-rate 0.1 --batch-size 2
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+
+def run(in_flight: int, pages: list, work_dir: str, endpoint: str, args) -> dict:
+    from remote_ocr import GeminiBackend, RemoteOCRPool
+
+    backend = GeminiBackend(api_key='mock', endpoint=endpoint, max_in_flight=in_flight,
+                            requests_per_minute=args.rpm, burst=in_flight, batch_size=args.batch_size,
+                            retry_backoff=0.2)
+    output_dir = os.path.join(work_dir, f'output_{in_flight}')
+    tasks = [(str(i + 1), path, output_dir, None) for i, path in enumerate(pages)]
+    start = time.perf_counter()
+    with RemoteOCRPool(backend=backend) as pool:
+        failed = sum(1 for _, error, _ in pool.map(tasks) if error is not None)
+    seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'pages_per_sec': len(pages) / seconds, 'failed': failed,
+            'requests': backend.requests, 'retries': backend.retries}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remote OCR concurrency benchmark (local mock server)")
+    parser.add_argument('--pages', type=int, default=32, help='Number of synthetic pages.')
+    parser.add_argument('--in-flight', type=int, nargs='+', default=[1, 2, 4, 8, 16], help='In-flight limits to run.')
+    parser.add_argument('--latency', type=float, default=2.0, help='Answer latency of the mock server (seconds).')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Share of requests the server fails (503 / 429).')
+    parser.add_argument('--batch-size', type=int, default=1, help='Pages per request.')
+    parser.add_argument('--rpm', type=float, default=None, help='Client rate limit in requests per minute (default: none).')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic pages.')
+    args = parser.parse_args()
+
+    from config import Config
+    from mock_llm_server import MockLLMServer
+    from synthetic_pages import make_pages
+
+    # Send the page files as they are: only the network wait is measured
+    Config.USE_PREPROCESSING = False
+
+    work_dir = tempfile.mkdtemp(prefix="bench_remote_ocr_")
+    try:
+        pages = make_pages(os.path.join(work_dir, 'input'), args.pages, seed=args.seed)
+        results = {}
+        with MockLLMServer(latency=args.latency, fail_rate=args.fail_rate) as server:
+            for in_flight in args.in_flight:
+                results[in_flight] = run(in_flight, pages, work_dir, server.endpoint, args)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{args.pages} pages, {args.latency}s latency, batch size {args.batch_size}, "
+          f"fail rate {args.fail_rate}, {os.cpu_count()} cores\n")
+    print(f"{'in flight':<11}{'seconds':>10}{'pages/s':>10}{'vs 1':>8}{'requests':>10}{'retries':>9}{'failed':>8}")
+    base = results[args.in_flight[0]]['pages_per_sec']
+    for in_flight, result in results.items():
+        print(f"{in_flight:<11}{result['seconds']:>10.2f}{result['pages_per_sec']:>10.2f}"
+              f"{result['pages_per_sec'] / base:>7.2f}x{result['requests']:>10}{result['retries']:>9}{result['failed']:>8}")
+
+
+if __name__ == '__main__':
+    main()
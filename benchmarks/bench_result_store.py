@@ -0,0 +1,91 @@
+"""
+Benchmark: pretty-printed _res.json vs. the binary result store (result_store.py).
+
+Copies the sample page results in output/ (or --source) into N page folders, writes each one in both formats,
+then reports, per page and extrapolated to 100k pages:
++ disk footprint
++ load time of the full result (json.load vs. ResultFile.to_dict)
++ load time of what the correction / DOCX steps need from the binary file (parsing_res_list + input_path)
+
+Usage (from the repository root):
+    python benchmarks/bench_result_store.py
+    python benchmarks/bench_result_store.py --pages 5000
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from result_store import read_result, store_path_for, write_result
+
+DOCX_KEYS = ('parsing_res_list', 'input_path', 'preprocess')
+
+
+def timed(fn, paths):
+    start = time.perf_counter()
+    for path in paths:
+        fn(path)
+    return (time.perf_counter() - start) / len(paths)
+
+
+def load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Result store benchmark")
+    parser.add_argument('--source', default=os.path.join(ROOT, 'output'), help='Folder of page folders with _res.json.')
+    parser.add_argument('--pages', type=int, default=1000, help='Number of page copies.')
+    args = parser.parse_args()
+
+    samples = sorted(glob.glob(os.path.join(args.source, '*', '*_res.json')))
+    if not samples:
+        sys.exit(f"No _res.json under {args.source}.")
+
+    work_dir = tempfile.mkdtemp(prefix="bench_result_store_")
+    try:
+        json_paths = []
+        for i in range(args.pages):
+            path = os.path.join(work_dir, f"{i}_res.json")
+            shutil.copyfile(samples[i % len(samples)], path)
+            write_result(store_path_for(path), load_json(path))
+            json_paths.append(path)
+        store_paths = [store_path_for(path) for path in json_paths]
+
+        json_bytes = sum(os.path.getsize(path) for path in json_paths) / len(json_paths)
+        store_bytes = sum(os.path.getsize(path) for path in store_paths) / len(store_paths)
+
+        # Warm the page cache for both formats, so only parsing is measured
+        for path in json_paths + store_paths:
+            with open(path, 'rb') as f:
+                f.read()
+        json_full = timed(load_json, json_paths)
+        store_full = timed(read_result, store_paths)
+        store_docx = timed(lambda path: read_result(path, DOCX_KEYS), store_paths)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    scale = 100_000
+    print(f"{args.pages} pages from {len(samples)} samples (extrapolated to {scale // 1000}k pages)\n")
+    print(f"{'':<28}{'per page':>12}{'100k pages':>14}{'vs JSON':>10}")
+    print(f"{'disk, _res.json':<28}{json_bytes / 1024:>9.1f} KB{json_bytes * scale / 1024**3:>11.2f} GB")
+    print(f"{'disk, _res.ocrb':<28}{store_bytes / 1024:>9.1f} KB{store_bytes * scale / 1024**3:>11.2f} GB"
+          f"{json_bytes / store_bytes:>9.1f}x")
+    print(f"{'load, json.load':<28}{json_full * 1000:>9.3f} ms{json_full * scale:>12.1f} s")
+    print(f"{'load, binary (full)':<28}{store_full * 1000:>9.3f} ms{store_full * scale:>12.1f} s"
+          f"{json_full / store_full:>9.1f}x")
+    print(f"{'load, binary (blocks only)':<28}{store_docx * 1000:>9.3f} ms{store_docx * scale:>12.1f} s"
+          f"{json_full / store_docx:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Startup-time check for the non-OCR CLI commands.
+
+Imports `main` plus everything `--build_docx` needs in a fresh interpreter and fails if
++ the import overhead exceeds the budget (default 1 second), or
++ any heavy OCR / correction stack (Paddle, Torch, Transformers) got imported on the way.
+
+Usage (from the repository root):
+    python benchmarks/check_startup.py
+    python benchmarks/check_startup.py --budget 0.5 --runs 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('paddle', 'paddleocr', 'paddlex', 'torch', 'transformers', 'onnxruntime')
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+import docx_builder, image_materializer, table_model
+elapsed = time.perf_counter() - start
+heavy = sorted(m for m in sys.modules if m.split('.')[0] in %r)
+print(json.dumps({'elapsed': elapsed, 'heavy': heavy}))
+""" % (HEAVY_MODULES,)
+
+
+def measure() -> dict:
+    result = subprocess.run([sys.executable, '-c', _PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup-time check for --build_docx")
+    parser.add_argument('--budget', type=float, default=1.0, help='Max import overhead in seconds.')
+    parser.add_argument('--runs', type=int, default=3, help='Number of fresh interpreters; the best run counts.')
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    best = min(run['elapsed'] for run in runs)
+    heavy = sorted({m for run in runs for m in run['heavy']})
+
+    print(f"Import overhead for --build_docx: best {best:.3f}s over {args.runs} runs (budget {args.budget:.3f}s)")
+    ok = True
+    if heavy:
+        print(f"FAIL: heavy modules imported: {', '.join(heavy[:10])}{' ...' if len(heavy) > 10 else ''}")
+        ok = False
+    if best > args.budget:
+        print("FAIL: import overhead over budget")
+        ok = False
+    if ok:
+        print("OK")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
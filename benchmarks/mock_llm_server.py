@@ -0,0 +1,188 @@
+"""
+Local stand-in for the Gemini generateContent endpoint, so the remote OCR backend (remote_ocr.py) can be tested and
+benchmarked without network or API key:
++ answers POST /v1beta/models/<model>:generateContent with, for each inline image of the request, the blocks
+  stub_models.StubPPStructureV3 finds on it (bbox normalized to 0-1000), in the response shape of the real API
++ --latency: seconds added to every answer (a remote model's response time). Requests are served concurrently
+  (ThreadingHTTPServer), so throughput grows with the client's requests in flight as it does against the service
++ --fail-rate: share of requests answered with 503 or 429 + Retry-After, to exercise the retries
++ --max-concurrent: requests over this many at a time get 429 (server-side rate limit)
++ `scripted` (in-process only): answers for the next requests, in order, for tests: an HTTP status to fail with,
+  or the text the model answers instead of the pages (a malformed answer, a wrong page count)
+
+Usage (from the repository root):
+    python benchmarks/mock_llm_server.py --port 8766 --latency 1.0
+    # then set Config.REMOTE_OCR_ENDPOINT to the printed endpoint, GEMINI_API_KEY to any value, and run
+    python main.py --ocr_backend gemini --mass_convert input 1 100
+In-process (bench_remote_ocr.py):
+    with MockLLMServer(latency=1.0) as server:
+        backend = GeminiBackend(api_key='mock', endpoint=server.endpoint)
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from PIL import Image
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from stub_models import StubPPStructureV3
+
+
+class _LayoutOnly(StubPPStructureV3):
+    # The latency stands in for the model; the server itself should cost little CPU
+    def _simulate_inference(self, gray):
+        return gray
+
+
+class MockLLMServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 1.0, fail_rate: float = 0.0,
+                 max_concurrent: int = None, seed: int = 0):
+        """
+        :param port: Port to listen on (0: any free port).
+        :param latency: Seconds added to every answer.
+        :param fail_rate: Share of requests answered with 503 / 429.
+        :param max_concurrent: Requests served at a time before answering 429 (None: no limit).
+        """
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.max_concurrent = max_concurrent
+        self.rng = random.Random(seed)
+        self.ocr = _LayoutOnly()
+        self.requests = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # Next answers, in order: int -> fail with this HTTP status, str -> the model's answer text
+        self.scripted = []
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                server.handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1beta/models/{{model}}:generateContent"
+
+    def _page(self, part: dict) -> dict:
+        data = base64.b64decode(part['inline_data']['data'])
+        with Image.open(io.BytesIO(data)) as img:
+            image = np.asarray(img.convert('RGB'))
+        height, width = image.shape[:2]
+        result = self.ocr.predict(image)[0]
+        blocks = []
+        for block in result['parsing_res_list']:
+            x1, y1, x2, y2 = block['block_bbox']
+            blocks.append({
+                'label': block['block_label'],
+                'bbox': [round(x1 * 1000 / width), round(y1 * 1000 / height),
+                         round(x2 * 1000 / width), round(y2 * 1000 / height)],
+                'content': block['block_content'],
+            })
+        return {'blocks': blocks}
+
+    def _reply(self, handler, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def handle(self, handler):
+        request = json.loads(handler.rfile.read(int(handler.headers.get('Content-Length', 0))))
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            over_limit = self.max_concurrent is not None and self.in_flight > self.max_concurrent
+            scripted = self.scripted.pop(0) if self.scripted else None
+            if scripted is not None:
+                fail, status = isinstance(scripted, int), scripted
+            else:
+                fail = over_limit or self.rng.random() < self.fail_rate
+                if fail:
+                    status = 429 if over_limit or self.rng.random() < 0.5 else 503
+            if fail:
+                self.failures += 1
+        try:
+            start = time.perf_counter()
+            if fail:
+                time.sleep(self.latency / 10)
+                self._reply(handler, status, {'error': {'code': status, 'message': 'mock failure'}},
+                            {'Retry-After': '0.2'} if status == 429 else None)
+                return
+            if isinstance(scripted, str):
+                text = scripted
+            else:
+                parts = request['contents'][0]['parts']
+                pages = [self._page(part) for part in parts if 'inline_data' in part]
+                text = json.dumps({'pages': pages}, ensure_ascii=False)
+            time.sleep(max(0.0, self.latency - (time.perf_counter() - start)))
+            self._reply(handler, 200, {
+                'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}, 'finishReason': 'STOP'}],
+            })
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def start(self) -> 'MockLLMServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="mock-llm", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Gemini generateContent server")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--latency', type=float, default=1.0, help='Seconds added to every answer.')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Share of requests answered with 503 / 429.')
+    parser.add_argument('--max-concurrent', type=int, default=None, help='Requests at a time before answering 429.')
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, args.latency, args.fail_rate, args.max_concurrent)
+    print(f"Mock LLM server on {server.endpoint}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+"""
+Deterministic local stand-ins for the models, so the benchmark suite runs without network, GPU,
+Paddle or Torch:
++ StubPPStructureV3: finds text lines and ruled tables on the page with NumPy projection profiles and returns
+  PPStructureV3-shaped results (parsing_res_list, overall_ocr_res); the text is drawn from the synthetic corpus
+  with a seed derived from the layout, so the same page always gives the same result. A fixed amount of
+  per-pixel work stands in for inference cost.
++ stand-in `torch` / `transformers` modules: a regex tokenizer and a seq2seq "model" that undoes the corpus'
+  OCR confusions; generate() does matrix work proportional to padded tokens x beams, so micro-batching,
+  chunking and caching show up in the timings the same way they do with the real model.
+
+`install()` registers the stand-ins in sys.modules; call it before anything imports ocr_engine or text_correction.
+"""
+
+import contextlib
+import json
+import os
+import random
+import re
+import sys
+import types
+import zlib
+
+import numpy as np
+from PIL import Image
+
+from synthetic_pages import OCR_CONFUSIONS, SENTENCES, TABLE_CELLS
+
+# Per-pixel passes standing in for detection / recognition cost
+INFERENCE_PASSES = 6
+HIDDEN_SIZE = 192
+
+
+# ---------------------------------------------------------------------------
+# PPStructureV3 stand-in
+# ---------------------------------------------------------------------------
+
+def _runs(mask: np.ndarray):
+    """(start, end) of consecutive True runs in a 1-D mask."""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(edges[::2], edges[1::2]))
+
+
+def _rng_for(*values) -> random.Random:
+    return random.Random(zlib.crc32(json.dumps([int(v) for v in values]).encode()))
+
+
+def _line_text(rng: random.Random) -> str:
+    # Same kind of OCR confusions as the rendered pages, so the corrector has work to do
+    words = rng.choice(SENTENCES).split(" ")
+    return " ".join(OCR_CONFUSIONS.get(word, word) if rng.random() < 0.3 else word for word in words)
+
+
+class StubResult(dict):
+    def _path(self, save_path: str, suffix: str) -> str:
+        if save_path.endswith(suffix):
+            return save_path
+        stem = os.path.splitext(os.path.basename(self.get('input_path') or 'page'))[0]
+        return os.path.join(save_path, f"{stem}{'_res' if suffix == '.json' else ''}{suffix}")
+
+    def save_to_json(self, save_path: str):
+        path = self._path(save_path, '.json')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self, f, ensure_ascii=False, indent=4)
+
+    def save_to_markdown(self, save_path: str):
+        path = self._path(save_path, '.md')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n\n".join(block['block_content'] for block in self['parsing_res_list']))
+
+
+class StubPPStructureV3:
+    def __init__(self, **pipeline_config):
+        self.pipeline_config = pipeline_config
+
+    @staticmethod
+    def _simulate_inference(gray: np.ndarray):
+        work = gray.astype(np.float32)
+        for _ in range(INFERENCE_PASSES):
+            work[1:-1] = (work[:-2] + work[1:-1] + work[2:]) / 3
+            work[:, 1:-1] = (work[:, :-2] + work[:, 1:-1] + work[:, 2:]) / 3
+        return work
+
+    def predict(self, input):
+        input_path = None
+        if isinstance(input, str):
+            input_path = input
+            with Image.open(input) as img:
+                image = np.asarray(img.convert('RGB'))
+        else:
+            image = input
+        gray = image.min(axis=2) if image.ndim == 3 else image
+        self._simulate_inference(gray)
+
+        dark = gray < 128
+        height, width = dark.shape
+        blocks, rec_texts, rec_scores, rec_boxes = [], [], [], []
+
+        # Ruled tables: rows that are mostly ink are horizontal rules
+        rule_rows = [(s + e) // 2 for s, e in _runs(dark.mean(axis=1) > 0.5)]
+        table_boxes = []
+        if len(rule_rows) >= 2:
+            group = [rule_rows[0]]
+            for row in rule_rows[1:] + [None]:
+                if row is not None and row - group[-1] < height // 10:
+                    group.append(row)
+                    continue
+                if len(group) >= 2:
+                    y1, y2 = group[0], group[-1]
+                    col_fill = dark[y1:y2 + 1].mean(axis=0)
+                    rule_cols = [(s + e) // 2 for s, e in _runs(col_fill > 0.8)]
+                    if len(rule_cols) >= 2:
+                        table_boxes.append((rule_cols[0], y1, rule_cols[-1], y2, group, rule_cols))
+                if row is not None:
+                    group = [row]
+
+        # Text lines outside the tables
+        ink_rows = dark.any(axis=1)
+        for x1, y1, x2, y2, _, _ in table_boxes:
+            ink_rows[max(0, y1 - 4):y2 + 5] = False
+        lines = []
+        for s, e in _runs(ink_rows):
+            cols = np.flatnonzero(dark[s:e].any(axis=0))
+            lines.append([int(cols[0]), int(s), int(cols[-1]) + 1, int(e)])
+
+        # Group lines into blocks (gap below one line height)
+        line_height = int(np.median([y2 - y1 for _, y1, _, y2 in lines])) if lines else 0
+        groups = []
+        for box in lines:
+            if groups and box[1] - groups[-1][-1][3] < line_height:
+                groups[-1].append(box)
+            else:
+                groups.append([box])
+
+        items = [('text', group[0][1], group) for group in groups]
+        items += [('table', box[1], box) for box in table_boxes]
+        for kind, _, item in sorted(items, key=lambda entry: entry[1]):
+            if kind == 'text':
+                texts = []
+                for box in item:
+                    rng = _rng_for(*box)
+                    text = _line_text(rng)
+                    texts.append(text)
+                    rec_texts.append(text)
+                    rec_scores.append(round(0.8 + 0.2 * rng.random(), 4))
+                    rec_boxes.append(box)
+                bbox = [min(b[0] for b in item), item[0][1], max(b[2] for b in item), item[-1][3]]
+                label = 'doc_title' if not blocks else 'text'
+                blocks.append({'block_label': label, 'block_content': " ".join(texts), 'block_bbox': bbox})
+            else:
+                x1, y1, x2, y2, rows, cols = item
+                html_rows = []
+                for r in range(len(rows) - 1):
+                    cells = []
+                    for c in range(len(cols) - 1):
+                        box = [cols[c], rows[r], cols[c + 1], rows[r + 1]]
+                        rng = _rng_for(*box)
+                        text = rng.choice(TABLE_CELLS) if c == 1 else str(r) if c == 0 else f"{rng.randint(1, 50)}.000.000 đồng"
+                        cells.append(f"<td>{text}</td>")
+                        rec_texts.append(text)
+                        rec_scores.append(round(0.8 + 0.2 * rng.random(), 4))
+                        rec_boxes.append([int(v) for v in box])
+                    html_rows.append(f"<tr>{''.join(cells)}</tr>")
+                html = f"<html><body><table>{''.join(html_rows)}</table></body></html>"
+                blocks.append({'block_label': 'table', 'block_content': html,
+                               'block_bbox': [int(x1), int(y1), int(x2), int(y2)]})
+
+        return [StubResult(
+            input_path=input_path,
+            page_index=None,
+            width=int(width),
+            height=int(height),
+            parsing_res_list=blocks,
+            overall_ocr_res={'rec_texts': rec_texts, 'rec_scores': rec_scores, 'rec_boxes': rec_boxes},
+        )]
+
+
+# ---------------------------------------------------------------------------
+# Seq2seq corrector stand-in (torch / transformers)
+# ---------------------------------------------------------------------------
+
+_TOKEN_RE = re.compile(r"\s+|\w+|[^\w\s]")
+EOS_ID = 1
+PAD_ID = 0
+
+
+class _Vocab:
+    def __init__(self):
+        self.ids = {}
+        self.tokens = ['<pad>', '</s>']
+
+    def id(self, token: str) -> int:
+        if token not in self.ids:
+            self.ids[token] = len(self.tokens)
+            self.tokens.append(token)
+        return self.ids[token]
+
+
+_VOCAB = _Vocab()
+_FIXES = {wrong: right for right, wrong in OCR_CONFUSIONS.items()}
+
+
+class _Batch(dict):
+    def to(self, device):
+        return self
+
+
+class StubDevice:
+    def __init__(self, type: str = 'cpu'):
+        self.type = str(type)
+
+    def __repr__(self):
+        return f"device(type='{self.type}')"
+
+
+class StubTokenizer:
+    def num_special_tokens_to_add(self) -> int:
+        return 1
+
+    def _encode(self, text: str, truncation: bool, max_length, add_special_tokens: bool):
+        ids = [_VOCAB.id(token) for token in _TOKEN_RE.findall(text)]
+        if truncation and max_length:
+            ids = ids[:max_length - (1 if add_special_tokens else 0)]
+        return ids + [EOS_ID] if add_special_tokens else ids
+
+    def __call__(self, texts, return_tensors=None, truncation=False, max_length=None, add_special_tokens=True):
+        single = isinstance(texts, str)
+        encoded = [self._encode(text, truncation, max_length, add_special_tokens) for text in ([texts] if single else texts)]
+        if return_tensors is not None:
+            return self.pad([{'input_ids': ids} for ids in encoded], return_tensors=return_tensors)
+        return _Batch(input_ids=encoded[0] if single else encoded)
+
+    def pad(self, features, return_tensors=None):
+        longest = max(len(feature['input_ids']) for feature in features)
+        input_ids = np.full((len(features), longest), PAD_ID, dtype=np.int64)
+        attention_mask = np.zeros((len(features), longest), dtype=np.int64)
+        for i, feature in enumerate(features):
+            ids = feature['input_ids']
+            input_ids[i, :len(ids)] = ids
+            attention_mask[i, :len(ids)] = 1
+        return _Batch(input_ids=input_ids, attention_mask=attention_mask)
+
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(_VOCAB.tokens[i] for i in ids if not (skip_special_tokens and i in (PAD_ID, EOS_ID)))
+
+    def batch_decode(self, sequences, skip_special_tokens=True):
+        return [self.decode(ids, skip_special_tokens=skip_special_tokens) for ids in sequences]
+
+    @classmethod
+    def from_pretrained(cls, *args, **kwargs):
+        return cls()
+
+
+class StubSeq2SeqModel:
+    def __init__(self):
+        rng = np.random.default_rng(0)
+        self.weight = (rng.standard_normal((HIDDEN_SIZE, HIDDEN_SIZE)) / np.sqrt(HIDDEN_SIZE)).astype(np.float32)
+
+    def to(self, device):
+        return self
+
+    def eval(self):
+        return self
+
+    def generate(self, input_ids=None, attention_mask=None, num_beams=1, max_new_tokens=None,
+                 return_dict_in_generate=False, output_scores=False, **kwargs):
+        input_ids = np.asarray(input_ids)
+        batch, length = input_ids.shape
+        # Decoder stand-in: one hidden-state update per output position for every beam
+        hidden = np.ones((batch * max(1, num_beams), HIDDEN_SIZE), dtype=np.float32)
+        for _ in range(min(length, max_new_tokens or length)):
+            hidden = np.tanh(hidden @ self.weight)
+
+        sequences = []
+        mask = np.asarray(attention_mask) if attention_mask is not None else input_ids != PAD_ID
+        for row, row_mask in zip(input_ids, mask):
+            ids = [int(i) for i, keep in zip(row, row_mask) if keep]
+            sequences.append([_VOCAB.id(_FIXES.get(_VOCAB.tokens[i], _VOCAB.tokens[i])) if i > EOS_ID else i for i in ids])
+
+        if return_dict_in_generate:
+            return types.SimpleNamespace(sequences=sequences, sequences_scores=[0.0] * len(sequences))
+        return sequences
+
+    @classmethod
+    def from_pretrained(cls, *args, **kwargs):
+        return cls()
+
+
+def install():
+    """
+    Register stand-in `paddleocr`, `torch` and `transformers` modules (replacing the real ones, if installed,
+    so stub results are the same on every machine).
+    """
+    paddleocr = types.ModuleType('paddleocr')
+    paddleocr.PPStructureV3 = StubPPStructureV3
+
+    torch = types.ModuleType('torch')
+    torch.device = StubDevice
+    torch.cuda = types.SimpleNamespace(is_available=lambda: False)
+    torch.no_grad = contextlib.nullcontext
+
+    transformers = types.ModuleType('transformers')
+    transformers.AutoTokenizer = StubTokenizer
+    transformers.AutoModelForSeq2SeqLM = StubSeq2SeqModel
+
+    for name, module in (('paddleocr', paddleocr), ('torch', torch), ('transformers', transformers)):
+        sys.modules[name] = module
+    # Paddle itself is only probed for GPU detection; the stand-ins always run on CPU
+    sys.modules['paddle'] = None
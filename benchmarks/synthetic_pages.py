@@ -0,0 +1,141 @@
+"""
+Synthetic Vietnamese pages for the benchmark suite.
+
+Every page is generated from a fixed seed, so two runs benchmark exactly the same input:
++ text pages:  a title and paragraphs of legal-style Vietnamese sentences
++ table pages: a title, a paragraph and a ruled table (every `table_every`-th page)
+A share of the words carries typical OCR confusions (dropped / wrong diacritics),
+which the stand-in corrector (stub_models) fixes back.
+"""
+
+import os
+import random
+from typing import List
+
+from PIL import Image, ImageDraw, ImageFont
+
+SENTENCES = [
+    "Điều 1. Phạm vi điều chỉnh và đối tượng áp dụng của Nghị định này.",
+    "Cơ quan nhà nước có thẩm quyền có trách nhiệm hướng dẫn thi hành.",
+    "Người lao động được hưởng đầy đủ các chế độ theo quy định của pháp luật.",
+    "Hợp đồng phải được lập thành văn bản và có chữ ký của các bên.",
+    "Ủy ban nhân dân cấp tỉnh tổ chức kiểm tra việc thực hiện quy định này.",
+    "Thời hạn giải quyết hồ sơ không quá mười lăm ngày làm việc.",
+    "Tổ chức, cá nhân vi phạm thì tùy theo tính chất, mức độ sẽ bị xử lý.",
+    "Quyết định này có hiệu lực kể từ ngày ký ban hành.",
+    "Bộ trưởng, Thủ trưởng cơ quan ngang bộ chịu trách nhiệm thi hành.",
+    "Doanh nghiệp có nghĩa vụ công khai thông tin theo quy định hiện hành.",
+    "Mức phạt tiền đối với hành vi vi phạm được quy định tại Điều 5.",
+    "Văn bản đề nghị phải nêu rõ lý do và căn cứ pháp lý.",
+    "Hồ sơ gồm đơn đề nghị, bản sao giấy tờ tùy thân và các tài liệu liên quan.",
+    "Kinh phí thực hiện được bố trí từ ngân sách nhà nước.",
+    "Các quy định trước đây trái với Nghị định này đều bị bãi bỏ.",
+    "Trong quá trình thực hiện, nếu có vướng mắc, đề nghị phản ánh kịp thời.",
+]
+TITLES = [
+    "NGHỊ ĐỊNH QUY ĐỊNH CHI TIẾT THI HÀNH LUẬT",
+    "THÔNG TƯ HƯỚNG DẪN THỰC HIỆN",
+    "QUYẾT ĐỊNH VỀ VIỆC BAN HÀNH QUY CHẾ",
+]
+TABLE_HEADER = ["STT", "Nội dung", "Mức phạt", "Ghi chú"]
+TABLE_CELLS = ["Vi phạm quy định về hợp đồng", "Không công khai thông tin", "Chậm nộp hồ sơ",
+               "Sử dụng lao động không đúng", "Không báo cáo định kỳ", "Cản trở kiểm tra"]
+# Typical OCR confusions: correct -> as read by OCR
+OCR_CONFUSIONS = {
+    "của": "cua", "được": "đuợc", "Việt": "Vlệt", "quy": "qui", "định": "đinh",
+    "người": "nguời", "pháp": "phap", "hành": "hanh", "trách": "trach", "nhiệm": "nhiêm",
+}
+
+FONT_CANDIDATES = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    "C:\\Windows\\Fonts\\arial.ttf",
+)
+
+
+def _font(size: int):
+    for path in FONT_CANDIDATES:
+        if os.path.exists(path):
+            return ImageFont.truetype(path, size)
+    return ImageFont.load_default(size=size)
+
+
+def _with_typos(sentence: str, rng: random.Random, rate: float) -> str:
+    return " ".join(OCR_CONFUSIONS[word] if word in OCR_CONFUSIONS and rng.random() < rate else word
+                    for word in sentence.split(" "))
+
+
+def _draw_paragraph(draw, rng, x, y, width, font, line_height, num_lines, typo_rate):
+    for _ in range(num_lines):
+        text = _with_typos(rng.choice(SENTENCES), rng, typo_rate)
+        while draw.textlength(text, font=font) > width:
+            text = text[:-2]
+        draw.text((x, y), text, fill=0, font=font)
+        y += line_height
+    return y
+
+
+def _draw_table(draw, rng, x, y, width, font, line_height, num_rows, typo_rate):
+    col_widths = [0.08, 0.52, 0.2, 0.2]
+    xs = [x]
+    for share in col_widths:
+        xs.append(xs[-1] + int(width * share))
+    row_height = int(line_height * 1.6)
+    rows = [TABLE_HEADER] + [[str(r + 1), _with_typos(rng.choice(TABLE_CELLS), rng, typo_rate),
+                              f"{rng.randint(1, 50)}.000.000 đồng", rng.choice(["", "Tái phạm", "Lần đầu"])]
+                             for r in range(num_rows)]
+    for r, row in enumerate(rows):
+        top = y + r * row_height
+        for c, text in enumerate(row):
+            draw.text((xs[c] + 10, top + (row_height - line_height) // 2 + 4), text, fill=0, font=font)
+    bottom = y + len(rows) * row_height
+    for r in range(len(rows) + 1):
+        draw.line([(xs[0], y + r * row_height), (xs[-1], y + r * row_height)], fill=0, width=3)
+    for cx in xs:
+        draw.line([(cx, y), (cx, bottom)], fill=0, width=3)
+    return bottom
+
+
+def make_page(path: str, page_index: int, seed: int = 0, size=(1654, 2339), table: bool = False,
+              typo_rate: float = 0.3):
+    """
+    Render one synthetic page (A4 at 200 DPI by default) to `path`.
+    """
+    rng = random.Random(seed * 100003 + page_index)
+    width, height = size
+    image = Image.new('L', size, 255)
+    draw = ImageDraw.Draw(image)
+
+    margin = width // 12
+    body_font = _font(max(12, height // 80))
+    line_height = int(body_font.size * 1.5)
+    text_width = width - 2 * margin
+
+    y = margin
+    draw.text((margin, y), rng.choice(TITLES), fill=0, font=_font(int(body_font.size * 1.4)))
+    y += line_height * 3
+
+    if table:
+        y = _draw_paragraph(draw, rng, margin, y, text_width, body_font, line_height, 4, typo_rate)
+        y += line_height * 2
+        y = _draw_table(draw, rng, margin, y, text_width, body_font, line_height, 10, typo_rate)
+        y += line_height * 2
+
+    while y < height - margin - line_height * 6:
+        y = _draw_paragraph(draw, rng, margin, y, text_width, body_font, line_height, rng.randint(3, 6), typo_rate)
+        y += line_height * 2
+
+    image.convert('RGB').save(path, quality=90)
+
+
+def make_pages(folder: str, num_pages: int, seed: int = 0, table_every: int = 3, **kwargs) -> List[str]:
+    """
+    Write num_pages synthetic pages as <folder>/<n>.jpg (n = 1..num_pages).
+    """
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(num_pages):
+        path = os.path.join(folder, f"{i + 1}.jpg")
+        make_page(path, i, seed=seed, table=(i % table_every == table_every - 1), **kwargs)
+        paths.append(path)
+    return paths
@@ -0,0 +1,300 @@
+"""
+Build Manifest Module
+
+Make-style incremental builds for mass conversion: every page folder has a manifest (<page>_build.json)
+recording, for each stage, the content hashes of its inputs, the version of the stage, and the hash of its output:
+
++ ocr:        input image (or PDF + page index), OCR version   -> _res
++ correction: _res, correction version                         -> _improved
++ docx:       _improved (else _res), input image, DOCX version -> _result.docx
+
+A stage runs again only when one of its inputs or its version changed, or its output was deleted / edited.
+Stages are checked right before they would run, so when a re-run stage produces the same output,
+the stages after it stay up to date (e.g. re-OCR with the same result does not re-run correction).
+
+Stage versions (stage_versions()):
++ ocr:        OCR backend (and remote model), pipeline config of the profile, preprocessing settings,
+              paddleocr version, source of the OCR modules (and of the remote backend when it is used)
++ correction: model, backend, max tokens, beam settings of the profile, confidence gating,
+              transformers version, source of the correction modules
++ docx:       DOCX settings, python-docx version, source of the DOCX modules
+so a new corrector model re-runs correction and DOCX but not OCR, and a docx_builder change re-runs DOCX only.
+
+File hashes are cached in the manifest by (size, mtime), so checking an up-to-date page only costs a few stat calls
+and an interrupted run resumes in seconds. Results are hashed by content (result_store), not by file bytes,
+so converting them between JSON and binary does not count as a change.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from importlib import metadata
+from typing import Dict, Optional
+
+from config import Config
+from output_folder import OutputPageFolder
+from result_store import load_page_result, page_result_path
+
+STAGES = ('ocr', 'correction', 'docx')
+MANIFEST_VERSION = 1
+
+# Modules whose code shapes a stage's output (a change re-runs the stage)
+STAGE_SOURCES = {
+    'ocr': ('ocr_engine.py', 'ocr_backends.py', 'image_preprocess.py', 'pdf_ingest.py', 'profiles.py'),
+    'correction': ('text_correction.py', 'text_chunker.py', 'confidence_gating.py', 'table_model.py'),
+    'docx': ('docx_builder.py', 'docx_table_writer.py', 'table_model.py', 'image_materializer.py'),
+}
+# Extra OCR sources of a backend (Config.OCR_BACKEND)
+OCR_BACKEND_SOURCES = {
+    'gemini': ('remote_ocr.py',),
+}
+STAGE_PACKAGES = {
+    'ocr': ('paddleocr',),
+    'correction': ('transformers',),
+    'docx': ('python-docx',),
+}
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _digest(payload) -> str:
+    return _sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8'))[:16]
+
+
+def _package_version(name: str) -> Optional[str]:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def _sources_hash(filenames) -> str:
+    root = os.path.dirname(os.path.abspath(__file__))
+    h = hashlib.sha256()
+    for filename in filenames:
+        with open(os.path.join(root, filename), 'rb') as f:
+            h.update(filename.encode('utf-8'))
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def stage_versions(profile: Optional[str] = None) -> Dict[str, str]:
+    """
+    Version id of each stage for the current Config / profile (no model is loaded).
+    """
+    from image_preprocess import preprocess_settings
+    from profiles import correction_settings, get_profile
+
+    settings = {
+        'ocr': {
+            'pipeline': dict(Config.PIPELINE_DEFAULT_CONFIG, profile=get_profile(profile).get('pipeline'),
+                             use_doc_orientation_classify=Config.USE_DOC_ORIENTATION_CLASSIFY,
+                             use_doc_unwarping=Config.USE_DOC_UNWARPING,
+                             use_textline_orientation=Config.USE_TEXTLINE_ORIENTATION),
+            'preprocess': preprocess_settings(),
+            'pdf_dpi': Config.PDF_RENDER_DPI,
+            'backend': [Config.OCR_BACKEND, Config.GEMINI_MODEL if Config.OCR_BACKEND == 'gemini' else None],
+        },
+        'correction': {
+            'model': Config.PROTONX_CORRECTION_MODEL,
+            'backend': Config.PROTONX_CORRECTION_BACKEND,
+            'max_tokens': Config.PROTONX_CORRECTION_MAX_TOKENS,
+            'generation': correction_settings(profile),
+            'gating': [Config.CORRECTION_CONFIDENCE_GATING, Config.CORRECTION_CONFIDENCE_THRESHOLD],
+        },
+        'docx': {
+            'fast_tables': Config.DOCX_FAST_TABLES,
+        },
+    }
+    sources = dict(STAGE_SOURCES, ocr=STAGE_SOURCES['ocr'] + OCR_BACKEND_SOURCES.get(Config.OCR_BACKEND, ()))
+    versions = {}
+    for stage in STAGES:
+        versions[stage] = _digest({
+            'settings': settings[stage],
+            'packages': {name: _package_version(name) for name in STAGE_PACKAGES[stage]},
+            'sources': _sources_hash(sources[stage]),
+        })
+    return versions
+
+
+class BuildManifest:
+    def __init__(self, output_folder: OutputPageFolder, input_path: str, pdf_page_index: Optional[int] = None):
+        """
+        :param output_folder: Page folder; the manifest is <page_folder>/<page>_build.json.
+        :param input_path: Source image or PDF of the page.
+        :param pdf_page_index: Page of the PDF (None for images).
+        """
+        self.output_folder = output_folder
+        self.input_path = input_path
+        self.pdf_page_index = pdf_page_index
+        self.path = os.path.join(output_folder.page_output_dir, f"{output_folder.page_number}_build.json")
+
+        self.data = {'version': MANIFEST_VERSION, 'files': {}, 'stages': {}}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == MANIFEST_VERSION:
+                    self.data = data
+            except (OSError, ValueError):
+                pass  # unreadable (e.g. cut off by a crash): everything is rebuilt
+
+    # Hashes
+
+    def _cached_hash(self, path: Optional[str], compute) -> Optional[str]:
+        """Hash of a file, reused from the manifest while its size and mtime are unchanged."""
+        if path is None or not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        key = os.path.basename(path)
+        cached = self.data['files'].get(key)
+        if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        value = compute(path)
+        self.data['files'][key] = [stat.st_size, stat.st_mtime_ns, value]
+        return value
+
+    @staticmethod
+    def _file_hash(path: str) -> str:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    @staticmethod
+    def _result_hash(path: str) -> str:
+        return _digest(load_page_result(path))
+
+    def input_hash(self) -> Optional[str]:
+        value = self._cached_hash(self.input_path, self._file_hash)
+        if value is not None and self.pdf_page_index is not None:
+            value = f"{value}#{self.pdf_page_index}"
+        return value
+
+    def res_hash(self) -> Optional[str]:
+        return self._cached_hash(page_result_path(self.output_folder.res_json_path), self._result_hash)
+
+    def improved_hash(self) -> Optional[str]:
+        return self._cached_hash(page_result_path(self.output_folder.improved_json_path), self._result_hash)
+
+    def docx_hash(self) -> Optional[str]:
+        return self._cached_hash(self.output_folder.docx_path, self._file_hash)
+
+    # Stages
+
+    def _inputs(self, stage: str, version: str) -> Optional[dict]:
+        """Current inputs of a stage (None if one is missing)."""
+        if stage == 'ocr':
+            inputs = {'input': self.input_hash()}
+        elif stage == 'correction':
+            inputs = {'res': self.res_hash()}
+        else:
+            inputs = {'result': self.improved_hash() or self.res_hash(), 'input': self.input_hash()}
+        if any(value is None for value in inputs.values()):
+            return None
+        inputs['version'] = version
+        return inputs
+
+    def _output(self, stage: str) -> Optional[str]:
+        if stage == 'ocr':
+            return self.res_hash()
+        if stage == 'correction':
+            return self.improved_hash()
+        return self.docx_hash()
+
+    def is_fresh(self, stage: str, version: str) -> bool:
+        """
+        True if the stage's recorded inputs and version match the current ones and its output exists, unchanged.
+        """
+        record = self.data['stages'].get(stage)
+        if record is None or record['output'] is None:
+            return False
+        inputs = self._inputs(stage, version)
+        return inputs is not None and record['inputs'] == inputs and record['output'] == self._output(stage)
+
+    def record(self, stage: str, version: str, seconds: Optional[float] = None):
+        """
+        Record a finished stage (its output is hashed now) and save the manifest.
+        A stage that left no output (e.g. it failed without raising) is not recorded, so it runs again next time.
+        """
+        output = self._output(stage)
+        if output is None:
+            if self.data['stages'].pop(stage, None) is not None:
+                self.save()
+            return
+        self.data['stages'][stage] = {
+            'inputs': self._inputs(stage, version),
+            'output': output,
+            'seconds': round(seconds, 3) if seconds is not None else None,
+            'finished': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        self.save()
+
+    def invalidate(self):
+        self.data['stages'] = {}
+
+    def save(self):
+        # Atomic: a crash mid-write must not leave a manifest that claims unfinished work
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=4)
+        os.replace(tmp_path, self.path)
+
+
+class BuildPlanner:
+    """
+    Per-run helper: stage versions computed once, manifests per page, and counts of run / skipped stages.
+    """
+    def __init__(self, enabled: bool = Config.USE_BUILD_MANIFEST, force: bool = False, profile: Optional[str] = None):
+        """
+        :param enabled: Track builds (with False every stage always runs and nothing is recorded).
+        :param force: Run every stage, but still record the manifests.
+        """
+        self.enabled = enabled
+        self.force = force
+        self.versions = stage_versions(profile) if enabled else {}
+        self.ran = {stage: 0 for stage in STAGES}
+        self.skipped = {stage: 0 for stage in STAGES}
+        self._lock = threading.Lock()  # pipelined stages count from their own threads
+
+    def manifest(self, output_folder: OutputPageFolder, input_path: str,
+                 pdf_page_index: Optional[int] = None) -> Optional[BuildManifest]:
+        if not self.enabled:
+            return None
+        return BuildManifest(output_folder, input_path, pdf_page_index)
+
+    def needs(self, manifest: Optional[BuildManifest], stage: str) -> bool:
+        """True if the stage must run for the page (counts skipped stages)."""
+        if manifest is None or self.force or not manifest.is_fresh(stage, self.versions[stage]):
+            return True
+        with self._lock:
+            self.skipped[stage] += 1
+        return False
+
+    def is_complete(self, manifest: Optional[BuildManifest]) -> bool:
+        """True if every stage of the page is up to date (nothing to load or decode for it)."""
+        if manifest is None or self.force:
+            return False
+        if all(manifest.is_fresh(stage, self.versions[stage]) for stage in STAGES):
+            with self._lock:
+                for stage in STAGES:
+                    self.skipped[stage] += 1
+            return True
+        return False
+
+    def done(self, manifest: Optional[BuildManifest], stage: str, seconds: Optional[float] = None):
+        with self._lock:
+            self.ran[stage] += 1
+        if manifest is not None:
+            manifest.record(stage, self.versions[stage], seconds)
+
+    def summary(self) -> str:
+        if not self.enabled:
+            return "Build manifest: off"
+        return "Build manifest: " + ", ".join(f"{stage} ran {self.ran[stage]} / up to date {self.skipped[stage]}"
+                                              for stage in STAGES)
@@ -0,0 +1,219 @@
+"""
+Calibration Module
+
+`python main.py --calibrate <sample_folder>`: time the OCR pipeline modules and the correction beam settings
+on a few sample pages on this machine, and write a recommended profile to Config.CALIBRATED_PROFILE_PATH
+(use it with Config.PROFILE = "calibrated" or --profile calibrated).
+
+How the recommendation is made:
++ reference: the 'accurate' profile; its text is the accuracy baseline
++ base profile: the fastest of fast / balanced / accurate whose text stays within
+  Config.CALIBRATION_MIN_SIMILARITY of the reference
++ modules: each optional module (table, formula, seal, chart, region) is flipped on the reference config and timed;
+  a module is kept only if the samples contain its blocks (region detection: only if it costs little)
++ correction: the smallest num_beams whose corrections stay within Config.CALIBRATION_MIN_SIMILARITY
+  of the widest beam setting
+"""
+
+import datetime
+import difflib
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from config import Config
+from image_preprocess import is_image
+from output_folder import OutputPageFolder
+from profiles import PROFILES, build_pipeline_config, detect_device
+from result_store import load_page_result
+
+# PPStructureV3 toggle -> block labels the module handles
+MODULES = {
+    'use_table_recognition': ('table',),
+    'use_formula_recognition': ('formula',),
+    'use_seal_recognition': ('seal',),
+    'use_chart_recognition': ('chart',),
+    'use_region_detection': (),
+}
+# A module with no block labels of its own is kept when it costs at most this share of the page time
+MODULE_COST_TOLERANCE = 0.05
+BEAM_CANDIDATES = (1, 2, 3, 4)
+# Segments used to time the correction model
+MAX_CORRECTION_SEGMENTS = 64
+
+
+def _similarity(a: str, b: str) -> float:
+    if not a and not b:
+        return 1.0
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def _page_text(data: dict) -> str:
+    return "\n".join(block.get('block_content', '') for block in data.get('parsing_res_list', []))
+
+
+class PipelineRun:
+    def __init__(self, name: str, pipeline_config: dict):
+        self.name = name
+        self.pipeline_config = pipeline_config
+        self.load_seconds = 0.0
+        self.seconds_per_page = 0.0
+        self.pages: List[dict] = []  # loaded _res.json per sample page
+
+    def text(self) -> str:
+        return "\n\n".join(_page_text(data) for data in self.pages)
+
+    def labels(self) -> set:
+        return {block.get('block_label') for data in self.pages for block in data.get('parsing_res_list', [])}
+
+
+def time_pipeline(name: str, pipeline_config: dict, sample_paths: List[str], work_dir: str) -> PipelineRun:
+    """
+    Build an OCR engine with the config and time it on the sample pages (the first page is run once to warm up).
+    """
+    from components import component_class
+
+    run = PipelineRun(name, pipeline_config)
+    start = time.perf_counter()
+    ocr_engine = component_class('ocr_engine')(pipeline_config=pipeline_config)
+    run.load_seconds = time.perf_counter() - start
+
+    output_base = os.path.join(work_dir, name)
+    ocr_engine.predict_page(sample_paths[0], OutputPageFolder(base_output_dir=os.path.join(output_base, 'warmup'),
+                                                              page_number='warmup'))
+
+    folders = []
+    start = time.perf_counter()
+    for path in sample_paths:
+        output_folder = OutputPageFolder(base_output_dir=output_base, page_number=os.path.splitext(os.path.basename(path))[0])
+        ocr_engine.predict_page(path, output_folder)
+        folders.append(output_folder)
+    run.seconds_per_page = (time.perf_counter() - start) / len(sample_paths)
+
+    for output_folder in folders:
+        run.pages.append(load_page_result(output_folder.res_json_path))
+    del ocr_engine
+    print(f"  {name:<32} load {run.load_seconds:6.1f}s   {run.seconds_per_page:6.2f}s/page")
+    return run
+
+
+def calibrate_correction(segments: List[str], min_similarity: float) -> Optional[dict]:
+    """
+    Time correct_texts_batch for each beam setting on the sample segments.
+
+    :return: {'num_beams': recommended, 'seconds': {beams: s}, 'similarity': {beams: ratio}}, or None if the
+             correction model can't be loaded.
+    """
+    from components import create_component
+
+    text_corrector = create_component('text_corrector', use_cache=False)
+    if text_corrector.model is None:
+        return None
+
+    outputs, seconds = {}, {}
+    for beams in BEAM_CANDIDATES:
+        text_corrector.generation_settings['num_beams'] = beams
+        start = time.perf_counter()
+        outputs[beams] = text_corrector.correct_texts_batch(segments)
+        seconds[beams] = time.perf_counter() - start
+        print(f"  {'correction num_beams=' + str(beams):<32} {seconds[beams]:6.2f}s for {len(segments)} segments")
+
+    reference = outputs[max(BEAM_CANDIDATES)]
+    similarity = {beams: _similarity("\n".join(outputs[beams]), "\n".join(reference)) for beams in BEAM_CANDIDATES}
+    recommended = min(beams for beams in BEAM_CANDIDATES if similarity[beams] >= min_similarity)
+    return {'num_beams': recommended, 'seconds': seconds, 'similarity': similarity}
+
+
+def calibrate(sample_folder: str, max_pages: int = Config.CALIBRATION_MAX_PAGES,
+              save_path: str = Config.CALIBRATED_PROFILE_PATH,
+              min_similarity: float = Config.CALIBRATION_MIN_SIMILARITY) -> dict:
+    """
+    Measure the profiles and modules on sample pages and write the recommended profile.
+
+    :param sample_folder: Folder of representative page images.
+    :param max_pages: Number of sample pages to time.
+    :param save_path: Where to write the calibrated profile (JSON).
+    :param min_similarity: Min text similarity to the reference for a faster setting to be chosen.
+    :return: The calibrated profile.
+    """
+    sample_paths = sorted(os.path.join(sample_folder, f) for f in os.listdir(sample_folder) if is_image(f))[:max_pages]
+    if not sample_paths:
+        raise ValueError(f"No sample images in {sample_folder}.")
+
+    device = detect_device()
+    print(f"Calibrating on {len(sample_paths)} sample pages, device: {device}, cpu_threads: {Config.CPU_THREADS}\n")
+
+    work_dir = tempfile.mkdtemp(prefix="calibration_")
+    try:
+        # Profiles
+        runs: Dict[str, PipelineRun] = {}
+        for name in ('accurate', 'balanced', 'fast'):
+            runs[name] = time_pipeline(f"profile {name}", build_pipeline_config(name, device=device), sample_paths, work_dir)
+        reference = runs['accurate']
+        reference_text = reference.text()
+        similarity = {name: _similarity(run.text(), reference_text) for name, run in runs.items()}
+
+        # Modules, flipped one at a time on the reference config
+        module_cost = {}
+        for toggle in MODULES:
+            config = dict(reference.pipeline_config)
+            config[toggle] = not config.get(toggle, False)
+            flipped = time_pipeline(f"{toggle}={config[toggle]}", config, sample_paths, work_dir)
+            module_cost[toggle] = abs(reference.seconds_per_page - flipped.seconds_per_page)
+
+        labels_found = reference.labels()
+        modules = {}
+        for toggle, labels in MODULES.items():
+            if labels:
+                modules[toggle] = bool(labels_found.intersection(labels))
+            else:
+                modules[toggle] = module_cost[toggle] <= MODULE_COST_TOLERANCE * reference.seconds_per_page
+
+        # Fastest profile that stays close enough to the reference
+        candidates = [name for name in runs if similarity[name] >= min_similarity]
+        base = min(candidates, key=lambda name: runs[name].seconds_per_page)
+
+        # Correction beams on the reference text
+        segments = [block.get('block_content', '') for data in reference.pages
+                    for block in data.get('parsing_res_list', [])
+                    if block.get('block_label') == 'text' and block.get('block_content', '').strip()]
+        correction = calibrate_correction(segments[:MAX_CORRECTION_SEGMENTS], min_similarity) if segments else None
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    profile = {
+        'based_on': base,
+        'pipeline': dict(PROFILES[base]['pipeline'], **modules),
+        'cpu': dict(PROFILES[base]['cpu']),
+        'correction': dict(PROFILES[base]['correction']),
+        'calibration': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'machine': platform.node(),
+            'device': device,
+            'cpu_threads': Config.CPU_THREADS,
+            'samples': [os.path.basename(path) for path in sample_paths],
+            'seconds_per_page': {name: run.seconds_per_page for name, run in runs.items()},
+            'similarity_to_accurate': similarity,
+            'module_cost_seconds_per_page': module_cost,
+            'labels_found': sorted(label for label in labels_found if label),
+        },
+    }
+    if correction is not None:
+        profile['correction']['num_beams'] = correction['num_beams']
+        profile['calibration']['correction_seconds'] = correction['seconds']
+        profile['calibration']['correction_similarity'] = correction['similarity']
+
+    os.makedirs(os.path.dirname(save_path) or '.', exist_ok=True)
+    with open(save_path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, ensure_ascii=False, indent=4)
+
+    print(f"\nRecommended profile: based on '{base}'")
+    for toggle, enabled in modules.items():
+        print(f"  {toggle:<28} {'on' if enabled else 'off'} (cost {module_cost[toggle]:.2f}s/page)")
+    print(f"  correction num_beams       {profile['correction']['num_beams']}")
+    print(f"Saved to {save_path} (use it with --profile calibrated or Config.PROFILE = 'calibrated')")
+    return profile
@@ -0,0 +1,78 @@
+"""
+Component Registry Module
+
+Lazy registry of the heavy pipeline components.
+Importing `ocr_engine` pulls in Paddle, `text_correction` pulls in Torch and Transformers, so the CLI
+must not import them at module level: each command asks the registry for the components it uses,
+and only then is the backing module imported and the component built.
+
+Usage:
+    ocr_engine = create_component('ocr_engine')
+    text_corrector = create_component('text_corrector', use_cache=False)
+    ocr_engine = LazyComponent('ocr_engine')  # built when first used
+"""
+
+import importlib
+
+# name -> (module, class)
+_COMPONENTS = {
+    'ocr_engine': ('ocr_engine', 'OCREngine'),
+    'text_corrector': ('text_correction', 'TextCorrector'),
+    'page_index': ('page_index', 'PageIndex'),
+}
+
+
+def register_component(name: str, module: str, attribute: str):
+    """
+    Register (or replace) a component, e.g. a different OCR backend.
+
+    :param name: Component name used by create_component.
+    :param module: Module to import when the component is first needed.
+    :param attribute: Class (or factory function) in that module.
+    """
+    _COMPONENTS[name] = (module, attribute)
+
+
+def component_class(name: str):
+    """
+    Import and return the class of a component.
+    """
+    if name not in _COMPONENTS:
+        raise KeyError(f"Unknown component '{name}' (registered: {', '.join(sorted(_COMPONENTS))}).")
+    module, attribute = _COMPONENTS[name]
+    return getattr(importlib.import_module(module), attribute)
+
+
+def create_component(name: str, *args, **kwargs):
+    """
+    Import the backing module of a component and build a new instance.
+    """
+    return component_class(name)(*args, **kwargs)
+
+
+class LazyComponent:
+    """
+    Component built on first use (first attribute access), e.g. so a resumed mass conversion
+    that finds every page up to date never loads the models.
+    """
+    def __init__(self, name: str, *args, **kwargs):
+        self._name = name
+        self._args = args
+        self._kwargs = kwargs
+        self._instance = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def get(self):
+        if self._instance is None:
+            self._instance = create_component(self._name, *self._args, **self._kwargs)
+        return self._instance
+
+    def reset(self):
+        """Drop the instance (e.g. to reload a model whose memory keeps growing); the next use builds a new one."""
+        self._instance = None
+
+    def __getattr__(self, attribute):
+        return getattr(self.get(), attribute)
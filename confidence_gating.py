@@ -0,0 +1,114 @@
+"""
+Confidence Gating Module
+
+Decide which parts of a page go to the correction model, based on the OCR line confidences
+already stored in `_res.json` under `overall_ocr_res` (rec_texts, rec_scores, rec_boxes).
+
+Each OCR line is assigned to the `parsing_res_list` block whose block_bbox contains the line's center.
+Then, per block:
++ 'skipped': every line is above the threshold -> block is kept as is
++ 'block':   every line is below the threshold, or lines can't be located in the content -> whole block is corrected
++ 'spans':   mixed -> only the low-confidence lines (located in block_content) are corrected
+Table cells are gated by their text: a cell whose text is a high-confidence line of the table is skipped.
+"""
+
+from typing import Dict, List, Optional
+
+
+def _line_center(box):
+    return (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+
+
+def _contains(bbox, point):
+    x, y = point
+    return bbox[0] <= x <= bbox[2] and bbox[1] <= y <= bbox[3]
+
+
+def _area(bbox):
+    return max(0, bbox[2] - bbox[0]) * max(0, bbox[3] - bbox[1])
+
+
+def assign_lines_to_blocks(data: dict) -> Dict[int, List[dict]]:
+    """
+    Map OCR lines onto parsing_res_list blocks by bbox.
+
+    :param data: Loaded `_res.json`.
+    :return: Dict block index -> list of {'text', 'score', 'box'} in OCR order.
+    """
+    ocr_res = data.get('overall_ocr_res', {})
+    texts = ocr_res.get('rec_texts', [])
+    scores = ocr_res.get('rec_scores', [])
+    boxes = ocr_res.get('rec_boxes', [])
+    blocks = data.get('parsing_res_list', [])
+
+    lines_by_block = {idx: [] for idx in range(len(blocks))}
+    for text, score, box in zip(texts, scores, boxes):
+        center = _line_center(box)
+        # Nested blocks (e.g. text inside a table region): pick the smallest containing one
+        best_idx, best_area = None, None
+        for idx, block in enumerate(blocks):
+            bbox = block.get('block_bbox')
+            if bbox and _contains(bbox, center):
+                area = _area(bbox)
+                if best_area is None or area < best_area:
+                    best_idx, best_area = idx, area
+        if best_idx is not None:
+            lines_by_block[best_idx].append({'text': text, 'score': float(score), 'box': box})
+    return lines_by_block
+
+
+def _locate_lines(content: str, lines: List[dict]) -> Optional[List[tuple]]:
+    """
+    Find each line's text in the block content, in order.
+
+    :return: List of (start, end, line) or None if a line can't be located.
+    """
+    located = []
+    cursor = 0
+    for line in lines:
+        text = line['text']
+        if not text.strip():
+            continue
+        pos = content.find(text, cursor)
+        if pos < 0:
+            return None
+        located.append((pos, pos + len(text), line))
+        cursor = pos + len(text)
+    return located
+
+
+def plan_block(content: str, lines: List[dict], threshold: float) -> dict:
+    """
+    Decide how a text block is corrected.
+
+    :param content: block_content of the block.
+    :param lines: OCR lines assigned to the block.
+    :param threshold: Lines with score >= threshold skip the model.
+    :return: {'mode': 'skipped' | 'block' | 'spans', 'min_score': float or None,
+              'spans': [(start, end, score), ...] (low-confidence spans, only for 'spans')}
+    """
+    if not lines:
+        # No confidence information: correct, as without gating
+        return {'mode': 'block', 'min_score': None, 'spans': []}
+
+    min_score = min(line['score'] for line in lines)
+    low = [line for line in lines if line['score'] < threshold]
+
+    if not low:
+        return {'mode': 'skipped', 'min_score': min_score, 'spans': []}
+    if len(low) == len(lines):
+        return {'mode': 'block', 'min_score': min_score, 'spans': []}
+
+    located = _locate_lines(content, lines)
+    if located is None:
+        return {'mode': 'block', 'min_score': min_score, 'spans': []}
+
+    spans = [(start, end, line['score']) for start, end, line in located if line['score'] < threshold]
+    return {'mode': 'spans', 'min_score': min_score, 'spans': spans}
+
+
+def high_confidence_texts(lines: List[dict], threshold: float) -> set:
+    """
+    Texts of the high-confidence lines of a block (used to gate table cells).
+    """
+    return {line['text'].strip() for line in lines if line['score'] >= threshold}
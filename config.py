@@ -14,10 +14,36 @@ class Config:
     # Textline orientation classification model
     USE_TEXTLINE_ORIENTATION = False
 
-    # Device for model inference: "cpu" or "gpu"
-    DEVICE = "gpu"
+    # Device for model inference: "auto" (GPU if Paddle sees a CUDA device, else CPU), "cpu" or "gpu"
+    DEVICE = "auto"
 
-    # Pipeline config default dict
+    # Speed / accuracy profile (profiles.py): "fast", "balanced", "accurate",
+    # or "calibrated" for the profile written by --calibrate
+    PROFILE = "balanced"
+    CALIBRATED_PROFILE_PATH = os.path.join("output", ".calibrated_profile.json")
+    ## Sample pages timed per configuration by --calibrate
+    CALIBRATION_MAX_PAGES = 3
+    ## Min text similarity to the most accurate setting for a faster one to be recommended
+    CALIBRATION_MIN_SIMILARITY = 0.98
+
+    # CPU threads budget for OCR inference on CPU (split between workers with --workers N)
+    CPU_THREADS = os.cpu_count() or 1
+
+    # PDF rasterization resolution (PDFs are OCR'd one page at a time)
+    PDF_RENDER_DPI = 200
+
+    # Image preprocessing (each page is decoded once and the array is fed to OCR and the crop step)
+    USE_PREPROCESSING = True
+    ## Longest side of the array fed to OCR (about 300 DPI for A4); None keeps the source resolution
+    PREPROCESS_MAX_SIDE = 3500
+    PREPROCESS_GRAYSCALE = False
+    ## Cut the uniform scanner border (pixels within the tolerance of the border color)
+    PREPROCESS_TRIM_BORDER = False
+    PREPROCESS_TRIM_TOLERANCE = 24
+    ## Read image files through a memory map
+    PREPROCESS_USE_MMAP = True
+
+    # Pipeline config default dict (the selected profile is applied on top, see profiles.build_pipeline_config)
     PIPELINE_DEFAULT_CONFIG = {
         'lang': LANGUAGE,
         'device': DEVICE
@@ -30,7 +56,113 @@ class Config:
     PROTONX_CORRECTION_MODEL = "protonx-models/protonx-legal-tc"
     ## Max tokens for correction model
     PROTONX_CORRECTION_MAX_TOKENS = 160
+    ## Inference backend: "torch" (fp32), "torch_int8" (dynamic int8 quantization, CPU) or "onnx" (ONNX Runtime, CPU)
+    PROTONX_CORRECTION_BACKEND = "torch"
+    ## Local cache for the exported / quantized correction model artifacts
+    CORRECTION_ARTIFACTS_DIR = os.path.join("models", "correction")
+    ## Micro-batching: max padded input tokens and max segments per generate() call
+    PROTONX_CORRECTION_TOKEN_BUDGET = 2048
+    PROTONX_CORRECTION_MAX_BATCH_SIZE = 32
+    ## Confidence gating: blocks / lines with OCR score >= threshold skip the correction model
+    CORRECTION_CONFIDENCE_GATING = False
+    CORRECTION_CONFIDENCE_THRESHOLD = 0.95
+    ## Persistent segment-level correction cache
+    USE_CORRECTION_CACHE = True
+    CORRECTION_CACHE_PATH = os.path.join("output", ".correction_cache.sqlite3")
+    CORRECTION_CACHE_MAX_BYTES = 256 * 1024 * 1024  # LRU eviction above this size
     
+    # Result files section
+    ## Format of the per-page OCR results: "json" (<page>_res.json, as written by PPStructureV3)
+    ## or "binary" (<page>_res.ocrb, typed arrays + lazy access, see result_store.py); readers accept both
+    RESULT_FORMAT = "json"
+
+    # Mass conversion section
+    ## Max pages waiting between two stages in pipelined mode (--mass_convert ... --pipeline)
+    PIPELINE_QUEUE_SIZE = 2
+
+    # Build manifest section (--force)
+    ## Record per-page stage inputs / outputs (<page>_build.json) and skip the stages that are up to date
+    USE_BUILD_MANIFEST = True
+
+    # Supervision section (mass conversion, see supervisor.py)
+    ## Seconds per page attempt (None: no limit). With --workers a page over the limit gets its worker killed;
+    ## in sequential mode a timer interrupts it; pipelined stages run in threads and are not interrupted
+    PAGE_TIMEOUT_SECONDS = 600
+    ## Retries of a failed page before it goes to the dead-letter list, and the pause before the first retry (doubled each time)
+    PAGE_MAX_RETRIES = 2
+    PAGE_RETRY_BACKOFF_SECONDS = 1.0
+    ## Pages that failed after all retries, with the error details
+    DEAD_LETTER_PATH = os.path.join("output", ".dead_letter.json")
+    ## Recycle a worker (restart the OCR process with --workers, else reload the models) after this many pages
+    ## or once its RSS passes this many MB (None: never), so week-long runs don't slow down as memory grows
+    WORKER_MAX_PAGES = 500
+    WORKER_MAX_RSS_MB = 6144
+    ## In-process reloads only: the RSS must also have grown by this many MB since the models were loaded
+    ## (a reload does not always give memory back, and the models alone may be over WORKER_MAX_RSS_MB)
+    WORKER_RSS_GROWTH_MB = 1024
+
+    # Page dedup section (--dedup)
+    ## Persistent content index of already-OCR'd pages
+    PAGE_INDEX_PATH = os.path.join("output", ".page_index.json")
+    ## Reuse near-duplicates (re-scans, re-encodes) too; off: only byte-identical files are reused
+    PAGE_INDEX_NEAR_DUPLICATES = False
+    ## Max Hamming distance (out of 64 bits) between perceptual hashes for a page to be a near-duplicate candidate
+    PAGE_INDEX_MAX_HAMMING_DISTANCE = 4
+    ## Max share of the 1024-bit verification hash a candidate may differ in before it is cloned
+    ## (re-scans of one page differ in < 7% of the bits, distinct text pages with the same layout in > 16%)
+    PAGE_INDEX_VERIFY_MAX_DISTANCE = 0.1
+
+    # DOCX section
+    ## Build tables as one XML element in a single pass instead of cell by cell
+    DOCX_FAST_TABLES = True
+
+    # Watch-folder section (--watch)
+    ## Seconds between two scans of the input folder
+    WATCH_POLL_INTERVAL = 1.0
+    ## Seconds a file's size / mtime must stay unchanged before it is picked up (partial writes)
+    WATCH_DEBOUNCE_SECONDS = 2.0
+    ## Last pages the end-to-end latency percentiles are computed over
+    WATCH_LATENCY_WINDOW = 10000
+
+    # Daemon section (--serve / --via-daemon)
+    DAEMON_HOST = "127.0.0.1"
+    DAEMON_PORT = 8765
+    ## Max jobs running at the same time (each engine still runs one job at a time)
+    DAEMON_MAX_CONCURRENCY = 2
+    ## Finished jobs kept for GET /jobs/<job_id>: at most this many, for at most this many seconds
+    DAEMON_MAX_FINISHED_JOBS = 1000
+    DAEMON_FINISHED_JOB_TTL_SECONDS = 3600
+
+    # Tracing section (--trace)
+    ## Record nested timing spans (page -> stage -> step); off costs almost nothing
+    TRACE_ENABLED = False
+    ## Where --trace writes trace.json (Chrome trace) and metrics.prom (Prometheus textfile)
+    TRACE_DIR = os.path.join("output", ".trace")
+    TRACE_METRIC_PREFIX = "ocr_docx"
+    ## Max spans kept for the Chrome trace (aggregates in metrics.prom keep counting)
+    TRACE_MAX_SPANS = 1_000_000
+
+    # OCR backend section (--ocr_backend, see ocr_backends.py)
+    ## "paddle" (PPStructureV3, local) or "gemini" (multimodal LLM over HTTP, see remote_ocr.py)
+    OCR_BACKEND = "paddle"
+
     # Gemini API section
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")  # Set via environment variable
     GEMINI_MODEL = "gemini-2.0-flash"  # Default model for OCR
+
+    # Remote OCR section (remote backends, see remote_ocr.py)
+    ## generateContent URL ({model}: GEMINI_MODEL); point it at benchmarks/mock_llm_server.py to test offline
+    REMOTE_OCR_ENDPOINT = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+    ## Requests waiting for an answer at a time (mass conversion uses this instead of --workers)
+    REMOTE_OCR_MAX_IN_FLIGHT = 8
+    ## Token bucket: requests per minute (None: unlimited) and how many may go out at once after a pause
+    REMOTE_OCR_REQUESTS_PER_MINUTE = 60
+    REMOTE_OCR_BURST = 8
+    ## Pages (images) per request
+    REMOTE_OCR_BATCH_SIZE = 1
+    ## Retries of a request (429, 5xx, timeouts, unreadable answers), and the pause before the first one (doubled each time)
+    REMOTE_OCR_MAX_RETRIES = 4
+    REMOTE_OCR_RETRY_BACKOFF_SECONDS = 1.0
+    REMOTE_OCR_TIMEOUT_SECONDS = 120
+    ## Quality of the JPEG sent for in-memory pages (preprocessed images, PDF pages)
+    REMOTE_OCR_JPEG_QUALITY = 95
@@ -0,0 +1,151 @@
+"""
+Correction Backends Module
+
+Selectable inference backends for the ProtonX correction model (Config.PROTONX_CORRECTION_BACKEND):
++ 'torch':      full-precision PyTorch AutoModelForSeq2SeqLM (default)
++ 'torch_int8': PyTorch model with dynamic int8 quantization of the Linear layers (CPU)
++ 'onnx':       ONNX Runtime encoder-decoder exported with optimum (CPU)
+
+Every backend returns a model with the usual `generate()` API, so TextCorrector.correct_text
+and correct_texts_batch work unchanged.
+
+The int8 and ONNX artifacts are built once (`python main.py --export_correction_model <backend>`)
+and cached under Config.CORRECTION_ARTIFACTS_DIR; loading a backend whose artifacts are missing builds them.
+"""
+
+import os
+import time
+from typing import List
+
+import torch
+from transformers import AutoModelForSeq2SeqLM
+
+from config import Config
+
+BACKENDS = ('torch', 'torch_int8', 'onnx')
+
+
+def artifact_dir(model_path: str, backend: str) -> str:
+    """
+    Local folder holding the artifacts of a backend for a model.
+    """
+    safe_name = model_path.replace('/', '__').replace('\\', '__')
+    return os.path.join(Config.CORRECTION_ARTIFACTS_DIR, safe_name, backend)
+
+
+def _int8_path(model_path: str) -> str:
+    return os.path.join(artifact_dir(model_path, 'torch_int8'), 'model_int8.pt')
+
+
+def export_correction_model(model_path: str, backend: str, force: bool = False) -> str:
+    """
+    Build and cache the artifacts of a backend.
+
+    :param model_path: HF model id or local path of the fp32 model.
+    :param backend: 'torch_int8' or 'onnx'.
+    :param force: Rebuild even if the artifacts already exist.
+    :return: Path of the artifacts.
+    """
+    if backend == 'torch_int8':
+        path = _int8_path(model_path)
+        if os.path.exists(path) and not force:
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_path)
+        model.eval()
+        quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        torch.save(quantized, path)
+        return path
+
+    if backend == 'onnx':
+        path = artifact_dir(model_path, 'onnx')
+        if os.path.exists(os.path.join(path, 'config.json')) and not force:
+            return path
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError as e:
+            raise ImportError("The 'onnx' correction backend needs optimum[onnxruntime]: pip install optimum[onnxruntime]") from e
+
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_path, export=True)
+        model.save_pretrained(path)
+        return path
+
+    raise ValueError(f"Backend '{backend}' has no artifacts to export (choose from 'torch_int8', 'onnx').")
+
+
+def load_correction_model(model_path: str, backend: str, device: torch.device):
+    """
+    Load the correction model for a backend.
+
+    :param model_path: HF model id or local path of the fp32 model.
+    :param backend: One of BACKENDS.
+    :param device: Torch device (only used by the 'torch' backend; the others run on CPU).
+    :return: (model, device the inputs should be moved to)
+    """
+    if backend == 'torch':
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_path)
+        model.to(device)
+        model.eval()
+        return model, device
+
+    cpu = torch.device('cpu')
+
+    if backend == 'torch_int8':
+        path = export_correction_model(model_path, 'torch_int8')
+        model = torch.load(path, weights_only=False)
+        model.eval()
+        return model, cpu
+
+    if backend == 'onnx':
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        path = export_correction_model(model_path, 'onnx')
+        return ORTModelForSeq2SeqLM.from_pretrained(path), cpu
+
+    raise ValueError(f"Unknown correction backend '{backend}' (choose from {', '.join(BACKENDS)}).")
+
+
+def compare_backends(texts: List[str], backends=BACKENDS, reference: str = 'torch'):
+    """
+    Run the same segments through each backend and compare with the reference (fp32) outputs.
+    The correction cache is disabled so every backend really runs the model.
+
+    :param texts: Segments to correct.
+    :param backends: Backends to compare.
+    :param reference: Backend the others are compared against.
+    :return: List of dicts: backend, load_s, latency_s, segments_per_s, agreement.
+    """
+    from text_correction import TextCorrector
+
+    outputs = {}
+    report = []
+    for backend in [reference] + [b for b in backends if b != reference]:
+        load_start = time.perf_counter()
+        corrector = TextCorrector(backend=backend, use_cache=False)
+        load_time = time.perf_counter() - load_start
+
+        # Warm-up on a few segments so one-off initialization doesn't count as latency
+        corrector.correct_texts_batch(texts[:2])
+
+        start = time.perf_counter()
+        outputs[backend] = corrector.correct_texts_batch(texts)
+        latency = time.perf_counter() - start
+
+        agreement = sum(a == b for a, b in zip(outputs[backend], outputs[reference])) / len(texts) if texts else 1.0
+        report.append({
+            'backend': backend,
+            'load_s': load_time,
+            'latency_s': latency,
+            'segments_per_s': len(texts) / latency if latency > 0 else 0.0,
+            'agreement': agreement,
+        })
+    return report
+
+
+def print_comparison(report):
+    print(f"\n{'-'*100}")
+    print(f"{'backend':<12} {'load (s)':>10} {'latency (s)':>12} {'segments/s':>12} {'agreement':>10}")
+    for row in report:
+        print(f"{row['backend']:<12} {row['load_s']:>10.2f} {row['latency_s']:>12.2f} "
+              f"{row['segments_per_s']:>12.2f} {row['agreement'] * 100:>9.1f}%")
+    print(f"{'-'*100}")
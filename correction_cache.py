@@ -0,0 +1,176 @@
+"""
+Correction Cache Module
+
+Persistent segment-level memoization for TextCorrector.
+Legal documents repeat a lot of text (boilerplate clauses, unit strings like "48g" in table cells,
+headers on every page), so each distinct segment should cost one model call per job, not one per occurrence.
+
++ key: sha256 of normalized segment text + model id + generation settings
++ store: SQLite file, shared across runs and processes
++ eviction: size-bounded LRU (least recently used entries are dropped once the store exceeds max_bytes);
+  the total size is kept in a meta row by triggers, so a write does not scan the table
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, Iterable
+
+from config import Config
+
+_WHITESPACE_RE = re.compile(r'[ \t\r\f\v]+')
+
+
+def normalize_segment(text: str) -> str:
+    """
+    Normalize a segment before keying / correcting it:
+    NFC unicode form (OCR output mixes composed and decomposed Vietnamese diacritics),
+    runs of spaces collapsed, surrounding whitespace stripped. Newlines are kept.
+    """
+    text = unicodedata.normalize('NFC', text)
+    text = _WHITESPACE_RE.sub(' ', text)
+    return text.strip()
+
+
+class CorrectionCache:
+    def __init__(self, cache_path: str = Config.CORRECTION_CACHE_PATH,
+                 max_bytes: int = Config.CORRECTION_CACHE_MAX_BYTES,
+                 namespace: str = ""):
+        """
+        :param cache_path: SQLite file holding the entries.
+        :param max_bytes: Max total size of cached texts before LRU eviction.
+        :param namespace: Model id + generation settings; part of every key.
+        """
+        self.cache_path = cache_path
+        self.max_bytes = max_bytes
+        self.namespace = namespace
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        # Correction may run in a pipeline thread, not the one that created the cache
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # INSERT OR REPLACE must fire the delete trigger for the row it replaces
+        self._conn.execute("PRAGMA recursive_triggers=ON")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS corrections ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON corrections(last_access)")
+        # Running total of the entry sizes (caches written before it existed are summed once here)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.execute(
+            "INSERT OR IGNORE INTO meta (name, value)"
+            " SELECT 'total_size', COALESCE(SUM(size), 0) FROM corrections"
+        )
+        self._conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS corrections_size_insert AFTER INSERT ON corrections BEGIN"
+            " UPDATE meta SET value = value + NEW.size WHERE name = 'total_size'; END"
+        )
+        self._conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS corrections_size_delete AFTER DELETE ON corrections BEGIN"
+            " UPDATE meta SET value = value - OLD.size WHERE name = 'total_size'; END"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_namespace(model_id: str, generation_settings: dict) -> str:
+        return f"{model_id}|{json.dumps(generation_settings, sort_keys=True)}"
+
+    def key(self, normalized_text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\x00{normalized_text}".encode('utf-8')).hexdigest()
+
+    def get_many(self, normalized_texts: Iterable[str]) -> Dict[str, str]:
+        """
+        Look up several normalized segments at once.
+
+        :return: Dict normalized text -> cached correction, for the hits only.
+        """
+        keys = {self.key(text): text for text in normalized_texts}
+        found = {}
+        if not keys:
+            return found
+
+        with self._lock:
+            key_list = list(keys)
+            # Stay under SQLite's bound-variable limit
+            for i in range(0, len(key_list), 500):
+                chunk = key_list[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM corrections WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for k, value in rows:
+                    found[keys[k]] = value
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE corrections SET last_access = ? WHERE key = ?",
+                    [(now, self.key(text)) for text in found]
+                )
+                self._conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, corrections: Dict[str, str]):
+        """
+        Store corrections (normalized text -> corrected text) and evict LRU entries if over budget.
+        """
+        if not corrections:
+            return
+
+        now = time.time()
+        rows = [(self.key(text), value, len(text.encode('utf-8')) + len(value.encode('utf-8')), now)
+                for text, value in corrections.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO corrections (key, value, size, last_access) VALUES (?, ?, ?, ?)", rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _total_size(self) -> int:
+        return self._conn.execute("SELECT value FROM meta WHERE name = 'total_size'").fetchone()[0]
+
+    def _evict(self):
+        total = self._total_size()
+        if total <= self.max_bytes:
+            return
+
+        # Drop oldest entries until we are back to 90% of the budget (avoids evicting on every insert)
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        to_delete = []
+        for key, size in self._conn.execute("SELECT key, size FROM corrections ORDER BY last_access ASC"):
+            if total - freed <= target:
+                break
+            to_delete.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM corrections WHERE key = ?", to_delete)
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._total_size()
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"Correction cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate)"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,329 @@
+"""
+Daemon Module
+
+Long-running local service that keeps OCREngine and TextCorrector loaded, so per-page latency is
+inference only (no PPStructureV3 rebuild / ProtonX reload per call).
+
++ localhost HTTP (Config.DAEMON_HOST:Config.DAEMON_PORT), JSON in / JSON out
++ engines are built on first use and kept warm; each engine runs one job at a time
++ jobs run on a bounded worker pool (Config.DAEMON_MAX_CONCURRENCY)
++ finished jobs are kept for Config.DAEMON_FINISHED_JOB_TTL_SECONDS, and at most Config.DAEMON_MAX_FINISHED_JOBS
+  of them (oldest dropped first), so a long-running daemon's memory stays bounded; /health reads running counters
+
+API:
+    GET  /health                  -> {"status": "ok", "loaded": [...], "queued": n, "running": n}
+    POST /jobs                    -> {"job_id": ...}
+         body: {"stage": "ocr" | "correct" | "docx" | "convert",
+                "input": <image path for ocr/convert, page folder for correct/docx>,
+                "output_base": <output folder, default "output">}
+         add "?wait=1" to block until the job is done and get the job record back
+    GET  /jobs/<job_id>           -> job record: status (queued | running | done | failed), result, error, timings
+                                     (an ocr / convert job on a PDF OCRs each page into its own <stem>_pNNN folder;
+                                      its result lists them under "pages")
+                                     (404 once a finished job has been dropped)
+
+Start:  python main.py --serve
+Client: python main.py --ocr_image input/483.jpg --via-daemon
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from config import Config
+from components import create_component
+from output_folder import OutputPageFolder
+
+STAGES = ('ocr', 'correct', 'docx', 'convert')
+
+
+class WarmEngines:
+    """
+    Engines built once on first use and kept loaded; each guarded by its own lock
+    (an OCR job and a correction job can run at the same time, two OCR jobs can't).
+    """
+    def __init__(self):
+        self._engines = {}
+        self._locks = {'ocr_engine': threading.Lock(), 'text_corrector': threading.Lock()}
+        self._build_lock = threading.Lock()
+
+    def get(self, name: str):
+        with self._build_lock:
+            if name not in self._engines:
+                self._engines[name] = create_component(name)
+            return self._engines[name]
+
+    def lock(self, name: str) -> threading.Lock:
+        return self._locks[name]
+
+    def loaded(self):
+        return sorted(self._engines)
+
+
+class JobManager:
+    def __init__(self, max_concurrency: int = Config.DAEMON_MAX_CONCURRENCY,
+                 max_finished: int = Config.DAEMON_MAX_FINISHED_JOBS,
+                 finished_ttl: float = Config.DAEMON_FINISHED_JOB_TTL_SECONDS):
+        """
+        :param max_concurrency: Jobs running at the same time.
+        :param max_finished: Finished jobs kept for GET /jobs/<job_id>.
+        :param finished_ttl: Seconds a finished job is kept.
+        """
+        self.engines = WarmEngines()
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="daemon-job")
+        self.max_finished = max_finished
+        self.finished_ttl = finished_ttl
+        self.jobs = {}
+        self._finished = OrderedDict()  # job_id -> finish time, oldest first
+        self._counts = {status: 0 for status in ('queued', 'running', 'done', 'failed')}
+        self._lock = threading.Lock()
+
+    def submit(self, stage: str, input_path: str, output_base: str = "output") -> dict:
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage '{stage}' (choose from {', '.join(STAGES)}).")
+        if not input_path:
+            raise ValueError("Missing 'input'.")
+
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'stage': stage,
+            'input': input_path,
+            'output_base': output_base,
+            'status': 'queued',
+            'result': None,
+            'error': None,
+            'timings': {},
+            'submitted_at': time.time(),
+            'done_event': threading.Event(),
+        }
+        with self._lock:
+            self.jobs[job['job_id']] = job
+            self._counts['queued'] += 1
+            self._evict()
+        self.executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            self._evict()
+            return self.jobs.get(job_id)
+
+    def counts(self):
+        """Jobs per status: queued / running now, done / failed since the daemon started."""
+        with self._lock:
+            return dict(self._counts)
+
+    def _set_status(self, job: dict, status: str):
+        with self._lock:
+            self._counts[job['status']] -= 1
+            self._counts[status] += 1
+            job['status'] = status
+            if status in ('done', 'failed'):
+                self._finished[job['job_id']] = time.time()
+                self._evict()
+
+    def _evict(self):
+        # Called with the lock held
+        expire_before = time.time() - self.finished_ttl
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_finished and finished_at >= expire_before:
+                break
+            del self._finished[job_id]
+            self.jobs.pop(job_id, None)
+
+    def public(self, job: dict) -> dict:
+        """Snapshot of a job record for the API (the job thread may be updating it)."""
+        with self._lock:
+            record = {k: v for k, v in job.items() if k != 'done_event'}
+            record['timings'] = dict(job['timings'])
+        return record
+
+    def _timed(self, job: dict, name: str, fn):
+        start = time.perf_counter()
+        result = fn()
+        with self._lock:
+            # Summed over the pages of a PDF
+            job['timings'][name] = job['timings'].get(name, 0.0) + time.perf_counter() - start
+        return result
+
+    def _run(self, job: dict):
+        self._set_status(job, 'running')
+        status, result, error = 'failed', None, None
+        try:
+            result = self._run_stage(job)
+            status = 'done'
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            with self._lock:
+                job['result'], job['error'] = result, error
+                job['timings']['total'] = time.time() - job['submitted_at']
+            self._set_status(job, status)
+            job['done_event'].set()
+
+    def _run_stage(self, job: dict) -> dict:
+        stage, input_path, output_base = job['stage'], job['input'], job['output_base']
+
+        if stage in ('ocr', 'convert') and input_path.lower().endswith('.pdf'):
+            # One page folder per PDF page (<stem>_pNNN), as with --ocr_image <pdf> and --mass_convert
+            ocr_engine = self.engines.get('ocr_engine')
+            with self.engines.lock('ocr_engine'):
+                output_folders = self._timed(job, 'ocr', lambda: list(ocr_engine.predict_pdf(input_path, output_base)))
+            pages = []
+            for output_folder in output_folders:
+                result = {'page_number': output_folder.page_number, 'page_output_dir': output_folder.page_output_dir,
+                          'res_json_path': output_folder.res_json_path}
+                if stage == 'convert':
+                    self._correct_and_build(job, stage, output_folder, result)
+                pages.append(result)
+            return {'pages': pages}
+
+        if stage in ('ocr', 'convert'):
+            page_number = os.path.splitext(os.path.basename(input_path))[0]
+        else:
+            page_number = os.path.basename(input_path.rstrip(os.sep))
+        output_folder = OutputPageFolder(base_output_dir=output_base, page_number=page_number)
+        result = {'page_number': page_number, 'page_output_dir': output_folder.page_output_dir}
+        decoded_page = None
+
+        if stage in ('ocr', 'convert'):
+            ocr_engine = self.engines.get('ocr_engine')
+            with self.engines.lock('ocr_engine'):
+                decoded_page = self._timed(job, 'ocr', lambda: ocr_engine.predict_page(input_path, output_folder))
+            result['res_json_path'] = output_folder.res_json_path
+
+        source_image_path = input_path if stage == 'convert' else None
+        self._correct_and_build(job, stage, output_folder, result, source_image_path, decoded_page)
+        return result
+
+    def _correct_and_build(self, job: dict, stage: str, output_folder: OutputPageFolder, result: dict,
+                           source_image_path: str = None, decoded_page=None):
+        if stage in ('correct', 'convert'):
+            text_corrector = self.engines.get('text_corrector')
+            with self.engines.lock('text_corrector'):
+                self._timed(job, 'correct', lambda: text_corrector.improve_json(
+                    input_json=output_folder.res_json_path, output_json=output_folder.improved_json_path))
+            result['improved_json_path'] = output_folder.improved_json_path
+
+        if stage in ('docx', 'convert'):
+            from docx_builder import build_docx_from_ocr_json
+            self._timed(job, 'docx', lambda: build_docx_from_ocr_json(
+                res_path=output_folder.page_output_dir, save_path=output_folder.docx_path,
+                source_image_path=source_image_path, source_page=decoded_page))
+            result['docx_path'] = output_folder.docx_path
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+def _make_handler(manager: JobManager):
+    class DaemonHandler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: dict):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # keep the daemon console quiet; job records carry the details
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == '/health':
+                counts = manager.counts()
+                self._send(200, {'status': 'ok', 'loaded': manager.engines.loaded(),
+                                 'queued': counts['queued'], 'running': counts['running']})
+            elif path.startswith('/jobs/'):
+                job = manager.get(path[len('/jobs/'):])
+                if job is None:
+                    self._send(404, {'error': 'Unknown job id.'})
+                else:
+                    self._send(200, manager.public(job))
+            else:
+                self._send(404, {'error': 'Not found.'})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != '/jobs':
+                self._send(404, {'error': 'Not found.'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                job = manager.submit(request.get('stage'), request.get('input'), request.get('output_base', 'output'))
+            except (ValueError, json.JSONDecodeError) as e:
+                self._send(400, {'error': str(e)})
+                return
+
+            if parse_qs(url.query).get('wait', ['0'])[0] in ('1', 'true'):
+                job['done_event'].wait()
+                self._send(200, manager.public(job))
+            else:
+                self._send(202, {'job_id': job['job_id']})
+
+    return DaemonHandler
+
+
+def serve(host: str = Config.DAEMON_HOST, port: int = Config.DAEMON_PORT,
+          max_concurrency: int = Config.DAEMON_MAX_CONCURRENCY, preload=('ocr_engine', 'text_corrector')):
+    """
+    Run the daemon until interrupted.
+
+    :param preload: Engines to load before accepting jobs (others are loaded on first use).
+    """
+    manager = JobManager(max_concurrency=max_concurrency)
+    for name in preload:
+        print(f"Loading {name}...")
+        manager.engines.get(name)
+
+    server = ThreadingHTTPServer((host, port), _make_handler(manager))
+    print(f"Daemon listening on http://{host}:{port} (max {max_concurrency} concurrent jobs)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        manager.shutdown()
+
+
+class DaemonClient:
+    def __init__(self, host: str = Config.DAEMON_HOST, port: int = Config.DAEMON_PORT, timeout: float = None):
+        self.base_url = f"http://{host}:{port}"
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, payload: dict = None) -> dict:
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"Daemon error {e.code}: {e.read().decode('utf-8', 'replace')}") from e
+        except urllib.error.URLError as e:
+            raise ConnectionError(f"Daemon not reachable at {self.base_url} (start it with: python main.py --serve)") from e
+
+    def health(self) -> dict:
+        return self._request('GET', '/health')
+
+    def submit(self, stage: str, input_path: str, output_base: str = "output", wait: bool = True) -> dict:
+        """
+        Submit a page job. Paths are sent absolute, so the daemon can run from another working directory.
+        """
+        payload = {'stage': stage, 'input': os.path.abspath(input_path), 'output_base': os.path.abspath(output_base)}
+        return self._request('POST', '/jobs?wait=1' if wait else '/jobs', payload)
+
+    def status(self, job_id: str) -> dict:
+        return self._request('GET', f'/jobs/{job_id}')
@@ -0,0 +1,190 @@
+"""
+DOCX Assembler Module
+
+Stream many pages into a single DOCX (one document per book) with bounded memory.
+
++ styles, numbering, theme, ... come once from the DOCXBuilder template
++ each page is built with its own DOCXBuilder, its body XML is appended to a spooled temp file
+  and the page builder is dropped, so memory is bounded by one page, not the whole book
++ images are stored once in word/media/ (deduplicated by content hash) and their relationship ids
+  are remapped in the page XML
++ pages are separated by page breaks
++ word/document.xml is written at the end by streaming the spooled body into the zip
+
+Usage:
+    with StreamingDOCXAssembler("output/book.docx") as assembler:
+        for page_folder in page_folders:
+            builder = DOCXBuilder()
+            add_ocr_json_blocks(builder, page_folder)
+            assembler.add_page(builder)
+"""
+
+import hashlib
+import io
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml.ns import qn
+from lxml import etree
+
+from docx_builder import DOCXBuilder, add_ocr_json_blocks
+from result_store import page_result_exists
+
+_PAGE_BREAK_XML = (b'<w:p xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                   b'<w:r><w:br w:type="page"/></w:r></w:p>')
+_EMBED_RE = re.compile(r'r:embed="([^"]+)"')
+_DOC_PR_RE = re.compile(r'(<wp:docPr\b[^>]*?\bid=")(\d+)(")')
+
+_IMAGE_CONTENT_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'gif': 'image/gif',
+    'bmp': 'image/bmp',
+    'tif': 'image/tiff',
+    'tiff': 'image/tiff',
+}
+
+
+class StreamingDOCXAssembler:
+    def __init__(self, save_path: str):
+        """
+        :param save_path: Path of the assembled DOCX file.
+        """
+        self.save_path = save_path
+
+        # Template package: the same styles every page builder uses
+        template = io.BytesIO()
+        DOCXBuilder().save(template)
+        template.seek(0)
+
+        self.zip = zipfile.ZipFile(save_path, 'w', zipfile.ZIP_DEFLATED)
+        with zipfile.ZipFile(template) as template_zip:
+            document_xml = template_zip.read('word/document.xml').decode('utf-8')
+            self.rels_xml = template_zip.read('word/_rels/document.xml.rels').decode('utf-8')
+            self.content_types_xml = template_zip.read('[Content_Types].xml').decode('utf-8')
+
+            # Shared parts are copied once, as is
+            for name in template_zip.namelist():
+                if name not in ('word/document.xml', 'word/_rels/document.xml.rels', '[Content_Types].xml'):
+                    self.zip.writestr(name, template_zip.read(name))
+
+        # document.xml = head + streamed page bodies + final section properties
+        body_start = document_xml.index('<w:body>') + len('<w:body>')
+        self.document_head = document_xml[:body_start].encode('utf-8')
+        self.document_tail = document_xml[document_xml.rindex('<w:sectPr'):].encode('utf-8')
+
+        self.body_file = tempfile.TemporaryFile()
+        self.images = {}          # sha1 of blob -> (relationship id, target)
+        self.image_exts = set()
+        self.doc_pr_id = 0
+        self.pages = 0
+        self.closed = False
+
+    def _store_image(self, image_part) -> str:
+        blob = image_part.blob
+        key = hashlib.sha1(blob).hexdigest()
+        if key not in self.images:
+            n = len(self.images) + 1
+            ext = image_part.partname.ext.lower()
+            target = f"media/image{n}.{ext}"
+            self.zip.writestr(f"word/{target}", blob)
+            self.images[key] = (f"rIdImg{n}", target)
+            self.image_exts.add(ext)
+        return self.images[key][0]
+
+    def _next_doc_pr_id(self, match) -> str:
+        self.doc_pr_id += 1
+        return f"{match.group(1)}{self.doc_pr_id}{match.group(3)}"
+
+    def add_page(self, docx_builder: DOCXBuilder):
+        """
+        Append the body of a page builder to the assembled document.
+        The builder can be discarded afterwards.
+        """
+        if self.closed:
+            raise ValueError("Assembler is already closed.")
+
+        if self.pages:
+            self.body_file.write(_PAGE_BREAK_XML)
+
+        # Image relationships of the page -> shared images of the assembled document
+        rid_map = {}
+        for rel in docx_builder.document.part.rels.values():
+            if rel.reltype == RT.IMAGE and not rel.is_external:
+                rid_map[rel.rId] = self._store_image(rel.target_part)
+
+        body = docx_builder.document.element.body
+        for child in body.iterchildren():
+            if child.tag == qn('w:sectPr'):
+                continue
+            xml = etree.tostring(child, encoding='unicode')
+            if rid_map:
+                xml = _EMBED_RE.sub(lambda m: f'r:embed="{rid_map.get(m.group(1), m.group(1))}"', xml)
+            # Drawing ids must be unique across the whole document
+            xml = _DOC_PR_RE.sub(self._next_doc_pr_id, xml)
+            self.body_file.write(xml.encode('utf-8'))
+
+        self.pages += 1
+
+    def close(self):
+        if self.closed:
+            return
+
+        with self.zip.open('word/document.xml', 'w') as f:
+            f.write(self.document_head)
+            self.body_file.seek(0)
+            shutil.copyfileobj(self.body_file, f)
+            f.write(self.document_tail)
+        self.body_file.close()
+
+        image_rels = ''.join(
+            f'<Relationship Id="{rid}" Type="{RT.IMAGE}" Target="{target}"/>'
+            for rid, target in self.images.values()
+        )
+        self.zip.writestr('word/_rels/document.xml.rels',
+                          self.rels_xml.replace('</Relationships>', image_rels + '</Relationships>'))
+
+        content_types = self.content_types_xml
+        for ext in sorted(self.image_exts):
+            if f'Extension="{ext}"' not in content_types:
+                default = f'<Default Extension="{ext}" ContentType="{_IMAGE_CONTENT_TYPES.get(ext, "image/" + ext)}"/>'
+                content_types = content_types.replace('<Default ', default + '<Default ', 1)
+        self.zip.writestr('[Content_Types].xml', content_types)
+
+        self.zip.close()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def assemble_docx(page_dirs, save_path: str, pbar=None) -> int:
+    """
+    Assemble the pages of several page folders into one DOCX.
+    Page folders without OCR JSON are skipped.
+
+    :param page_dirs: Page folders (output/<page_number>/), in document order.
+    :param save_path: Path of the assembled DOCX file.
+    :param pbar: Optional tqdm progress bar, updated once per folder.
+    :return: Number of pages assembled.
+    """
+    with StreamingDOCXAssembler(save_path) as assembler:
+        for page_dir in page_dirs:
+            page_number = os.path.basename(page_dir.rstrip(os.sep))
+            has_json = any(page_result_exists(os.path.join(page_dir, f"{page_number}{suffix}"))
+                           for suffix in ("_improved.json", "_res.json"))
+            if has_json:
+                builder = DOCXBuilder()
+                add_ocr_json_blocks(builder, page_dir)
+                assembler.add_page(builder)
+            if pbar is not None:
+                pbar.update(1)
+        return assembler.pages
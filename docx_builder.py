@@ -13,11 +13,14 @@ json results provide:
 from docx import Document
 from docx.shared import Pt # pt: points for font size
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT # for paragraph alignment
-import json
 import os
 
-from ocr_engine import OCREngine
 from config import Config
+from image_materializer import materialize_images, find_source_image
+from table_model import TableModel
+from docx_table_writer import append_table
+from result_store import load_page_result, page_result_exists
+from utils.tracing import span
 
 # block_label appearance so far:
 # 'text', 'doc_title', 'paragraph_title', 'table', 'image', 'number' (likely page number)
@@ -112,60 +115,59 @@ class DOCXBuilder:
 
 
     # add_table
-    def add_table(self, table_html):
+    def add_table(self, table, fast=Config.DOCX_FAST_TABLES):
         """
-        Add a table to the document from HTML format.
+        Add a table to the document.
         
-        :param table_html: HTML string containing table data
+        :param table: TableModel (parsed cell grid) or HTML string containing table data
+        :param fast: Build the whole table XML in one pass (linear in table size, handles rowspan)
+                     instead of filling it cell by cell through python-docx.
         """
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(table_html, 'html.parser')
+        if isinstance(table, str):
+            table = TableModel.from_html(table)
 
-        print("Parsing table HTML to add to DOCX...")
-        table_tag = soup.find('table')
-        if not table_tag:
-            return  # No table found
-        
-        rows = table_tag.find_all('tr')
+        if fast:
+            append_table(self.document, table, style_name='Light List Accent 1')
+        else:
+            self._add_table_cellwise(table)
+
+    def _add_table_cellwise(self, table):
+        """
+        Fill the table through python-docx's cell API (colspan only).
+        Slow on large tables, kept for comparison (benchmarks/bench_docx_tables.py).
+        """
+        rows = table.rows
         if not rows:
-            return
-        
-        # Calculate max columns (considering colspan)
-        num_cols = 0
-        for row in rows:
-            cols_in_row = 0
-            for cell in row.find_all(['td', 'th']):
-                colspan = int(cell.get('colspan', 1))
-                cols_in_row += colspan
-            num_cols = max(num_cols, cols_in_row)
+            return  # No table found
         
-        num_rows = len(rows)
+        # Max columns (considering colspan)
+        num_cols = table.num_cols
+        num_rows = table.num_rows
         
         # Create table
-        table = self.document.add_table(rows=num_rows, cols=num_cols)
-        table.style = 'Light List Accent 1'
+        docx_table = self.document.add_table(rows=num_rows, cols=num_cols)
+        docx_table.style = 'Light List Accent 1'
         
         # Populate table
-        for r, row in enumerate(rows):
-            cells = row.find_all(['td', 'th'])
+        for r, cells in enumerate(rows):
             col_index = 0
             
             for cell in cells:
-                colspan = int(cell.get('colspan', 1))
-                text = cell.get_text(strip=True)
+                colspan = cell.colspan
+                text = cell.text.strip()
                 
                 # Handle merged cells
                 if colspan > 1:
                     # Merge cells horizontally
-                    merged_cell = table.cell(r, col_index).merge(table.cell(r, col_index + colspan - 1))
+                    merged_cell = docx_table.cell(r, col_index).merge(docx_table.cell(r, col_index + colspan - 1))
                     merged_cell.text = text
                 else:
-                    table.cell(r, col_index).text = text
+                    docx_table.cell(r, col_index).text = text
                 
                 # Apply bold formatting for header cells (th tags or second row typically)
-                is_header = cell.name == 'th' or (r == 1 and len(cells) > 1)
+                is_header = cell.header or (r == 1 and len(cells) > 1)
                 if is_header:
-                    for paragraph in table.cell(r, col_index).paragraphs:
+                    for paragraph in docx_table.cell(r, col_index).paragraphs:
                         for run in paragraph.runs:
                             run.bold = True
                 
@@ -196,21 +198,38 @@ class DOCXBuilder:
         """
         self.document.save(file_path)
 
-def build_docx_from_ocr_json(res_path, save_path, ocr_engine=None):
+def build_docx_from_ocr_json(res_path, save_path, source_image_path=None, source_page=None):
     """
     Build a DOCX file from OCR JSON results.
 
     :param ocr_json: OCR results in JSON format.
     :param save_path: Path to save the generated DOCX file.
+    :param source_image_path: Optional source scan of the page (to crop missing images).
+    :param source_page: Optional decoded page OCR ran on (cropped directly, no second decode).
     """
     docx_builder = DOCXBuilder()
+    with span("docx.write"):
+        add_ocr_json_blocks(docx_builder, res_path, source_image_path=source_image_path, source_page=source_page)
+    with span("docx.save"):
+        docx_builder.save(save_path)
+
+def add_ocr_json_blocks(docx_builder, res_path, source_image_path=None, source_page=None):
+    """
+    Add the blocks of a page folder's OCR JSON (`_improved.json` if available, else `_res.json`) to a DOCX builder.
 
+    :param docx_builder: DOCXBuilder to add the blocks to.
+    :param res_path: Page folder (output/<page_number>/).
+    :param source_image_path: Source scan of the page, used to crop missing images
+                              (defaults to input/<page_number>.<ext> or the input_path recorded by OCR).
+    :param source_page: Decoded PreprocessedPage OCR ran on; crops are cut from it instead of the file.
+    """
     # res_path has:
     # [page_number]_res.json
     # img folder with images
     # image name rule: img_in_image_box_block["block_bbox"][0]_box["block_bbox"][1]_box["block_bbox"][2]_box["block_bbox"][3].jpg
     # for example: block_bbox = [34, 45, 200, 300] -> image name: img_in_image_box_34_45_200_300.jpg
     # There is also an image for table img_in_table_box_... -> ignore for now
+    # Missing crops are cut from the source scan by bbox (image_materializer), never by re-running OCR
 
     # example of ocr json: .\\output\620\620_res.json
     # res_path = .\\output\620\
@@ -220,26 +239,20 @@ def build_docx_from_ocr_json(res_path, save_path, ocr_engine=None):
 
     ocr_improved_json = ocr_json.replace("_res.json", "_improved.json")
 
-    img_num = 1 # first image in img/
-
-    if os.path.exists(ocr_improved_json):
+    if page_result_exists(ocr_improved_json):
         ocr_json = ocr_improved_json
 
-    with open(ocr_json, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    with span("docx.load"):
+        # Only the fields used here (binary results never decode the OCR geometry)
+        data = load_page_result(ocr_json, keys=('parsing_res_list', 'input_path', 'preprocess'))
     
-    # Check if has_image is true and imgs folder doesn't exist - run OCR to extract images
-    has_image = data.get('has_image')
+    # Crop image / table regions missing from imgs/ straight from the source page; blocks are matched by bbox
     imgs_dir = os.path.join(res_path, 'imgs')
+    if source_image_path is None and source_page is None:
+        source_image_path = find_source_image(page_number, data)
+    with span("docx.materialize_images"):
+        image_index = materialize_images(data, imgs_dir, source_image_path, source_page=source_page)
 
-    if has_image and ocr_engine is not None:
-        # original image path: input/<page_number>.jpg
-
-        input_image = os.path.join('input', f"{page_number}.jpg")
-
-        ocr_engine.predict(input_image, save_path=res_path)
-        
-    
     for block in data.get('parsing_res_list', []):
         label = block.get('block_label', 'text')
         content = block.get('block_content', '')
@@ -252,28 +265,21 @@ def build_docx_from_ocr_json(res_path, save_path, ocr_engine=None):
             docx_builder.add_paragraph(content)
         elif label == 'image':
 
-            # images are in imgs/
-            image_path = os.path.join(res_path, "imgs")
-            
-            # get the #img_num image in imgs/
-            image_files = sorted([f for f in os.listdir(image_path) if f.startswith("img_in_image_box_") and f.lower().endswith(('.jpg', '.jpeg', '.png'))])
-            if img_num - 1 < len(image_files):
-                image_path = os.path.join(image_path, image_files[img_num - 1])
-                img_num += 1
-            else:
-                image_path = None
+            # images are in imgs/, matched by bbox
+            bbox = block.get('block_bbox')
+            image_path = image_index.lookup('image', bbox) if bbox else None
 
             if image_path:
                 docx_builder.add_image(image_path)
                 
         elif label == 'table':
-            docx_builder.add_table(content)
+            # Use the cell grid saved by text correction when available (parsed from HTML otherwise)
+            with span("docx.html_parse"):
+                table = TableModel.from_block(block)
+            docx_builder.add_table(table)
         elif label == 'number':
             # 'number' is only a page number if:
             # + its bbox is the final in json
             # + its block_content is only a number from x to xxx
             if content.strip().isdigit() and block == data.get('parsing_res_list', [])[-1]:
-                docx_builder.add_page_number(content.strip())
-        
-
-    docx_builder.save(save_path)
\ No newline at end of file
+                docx_builder.add_page_number(content.strip())
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+DOCX Table Writer Module
+
+Fast path for large tables: build the whole `w:tbl` element of a TableModel in one pass and
+append it to the document body, instead of filling cells through python-docx's `table.cell(r, c)`
+(which rescans the grid on every call and makes building a few hundred rows superlinear).
+
+Handles:
++ colspan -> <w:gridSpan>
++ rowspan -> <w:vMerge w:val="restart"> on the first cell, <w:vMerge/> on the covered cells below
++ header styling -> bold runs (th cells, or the second row as in the cell-by-cell path)
+"""
+
+from typing import List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.shared import Emu
+
+from table_model import TableModel, TableCell
+
+# One twip = 1/20 pt = 635 EMU
+_EMU_PER_TWIP = 635
+
+
+def layout_grid(table: TableModel) -> Tuple[List[List[Tuple[int, Optional[TableCell], bool]]], int]:
+    """
+    Place the cells on the column grid, taking rowspans from the rows above into account.
+
+    :return: (rows, num_cols); each row is a list of (column, cell, is_continuation) in column order.
+             is_continuation marks a position covered by a rowspan started in an earlier row
+             (cell is then the originating cell, for its colspan).
+    """
+    rows = []
+    # column -> (cell, rows still covered below)
+    pending = {}
+    num_cols = 0
+
+    for cells in table.rows:
+        placed = []
+        col = 0
+        cell_iter = iter(cells)
+        cell = next(cell_iter, None)
+        while cell is not None or any(c >= col for c in pending):
+            if col in pending:
+                origin, remaining = pending[col]
+                placed.append((col, origin, True))
+                if remaining > 1:
+                    pending[col] = (origin, remaining - 1)
+                else:
+                    del pending[col]
+                col += origin.colspan
+                continue
+            if cell is None:
+                col += 1
+                continue
+            placed.append((col, cell, False))
+            if cell.rowspan > 1:
+                pending[col] = (cell, cell.rowspan - 1)
+            col += cell.colspan
+            cell = next(cell_iter, None)
+        num_cols = max(num_cols, col)
+        rows.append(placed)
+
+    return rows, num_cols
+
+
+def _cell_xml(width: int, colspan: int, vmerge: Optional[str], text: str, bold: bool) -> str:
+    parts = ['<w:tc><w:tcPr>', f'<w:tcW w:type="dxa" w:w="{width * colspan}"/>']
+    if colspan > 1:
+        parts.append(f'<w:gridSpan w:val="{colspan}"/>')
+    if vmerge == 'restart':
+        parts.append('<w:vMerge w:val="restart"/>')
+    elif vmerge == 'continue':
+        parts.append('<w:vMerge/>')
+    parts.append('</w:tcPr><w:p>')
+    if text:
+        run_props = '<w:rPr><w:b/></w:rPr>' if bold else ''
+        parts.append(f'<w:r>{run_props}<w:t xml:space="preserve">{escape(text)}</w:t></w:r>')
+    parts.append('</w:p></w:tc>')
+    return ''.join(parts)
+
+
+def build_tbl_xml(table: TableModel, style_id: str, total_width_twips: int) -> str:
+    """
+    Serialize a TableModel to a `w:tbl` XML string.
+
+    :param table: Table grid.
+    :param style_id: Table style id (e.g. 'LightList-Accent1').
+    :param total_width_twips: Width available to the table; split evenly between columns.
+    """
+    rows, num_cols = layout_grid(table)
+    if num_cols == 0:
+        return ''
+    col_width = total_width_twips // num_cols
+
+    parts = [
+        f'<w:tbl {nsdecls("w")}>',
+        '<w:tblPr>',
+        f'<w:tblStyle w:val="{escape(style_id)}"/>',
+        '<w:tblW w:type="auto" w:w="0"/>',
+        '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" w:noHBand="0" w:noVBand="1" w:val="04A0"/>',
+        '</w:tblPr>',
+        '<w:tblGrid>',
+        f'<w:gridCol w:w="{col_width}"/>' * num_cols,
+        '</w:tblGrid>',
+    ]
+
+    for r, placed in enumerate(rows):
+        parts.append('<w:tr>')
+        # Same header rule as the cell-by-cell path: th cells, or the second row when it has several cells
+        header_row = r == 1 and len(table.rows[r]) > 1
+        col = 0
+        for start_col, cell, is_continuation in placed:
+            # Pad gaps left by short rows so every row spans the full grid
+            while col < start_col:
+                parts.append(_cell_xml(col_width, 1, None, '', False))
+                col += 1
+            if is_continuation:
+                parts.append(_cell_xml(col_width, cell.colspan, 'continue', '', False))
+            else:
+                vmerge = 'restart' if cell.rowspan > 1 else None
+                parts.append(_cell_xml(col_width, cell.colspan, vmerge, cell.text.strip(), cell.header or header_row))
+            col += cell.colspan
+        while col < num_cols:
+            parts.append(_cell_xml(col_width, 1, None, '', False))
+            col += 1
+        parts.append('</w:tr>')
+
+    parts.append('</w:tbl>')
+    return ''.join(parts)
+
+
+def append_table(document, table: TableModel, style_name: str = 'Light List Accent 1'):
+    """
+    Build the table XML in one pass and append it to the document body (before the final section properties).
+
+    :param document: python-docx Document.
+    :param table: Table grid.
+    :param style_name: Table style name.
+    """
+    section = document.sections[-1]
+    total_width = int(Emu(section.page_width - section.left_margin - section.right_margin)) // _EMU_PER_TWIP
+    style_id = document.styles[style_name].style_id
+
+    xml = build_tbl_xml(table, style_id, total_width)
+    if not xml:
+        return
+    document.element.body._insert_tbl(parse_xml(xml))
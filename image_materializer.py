@@ -0,0 +1,160 @@
+"""
+Image Materializer Module
+
+Materialize the figure / table images of a page straight from its source scan, so rebuilding DOCX
+never has to re-run OCR just to regenerate `imgs/`.
+
++ every 'image' and 'table' block is cropped from the source page using its block_bbox
+  (file names follow the PPStructureV3 convention: img_in_<image|table>_box_<x1>_<y1>_<x2>_<y2>.jpg)
++ crops that already exist (e.g. saved by OCR) are reused, not redone
++ right after OCR the page's decoded array (image_preprocess.PreprocessedPage) is cropped directly,
+  so the scan is not decoded a second time; otherwise bboxes are mapped back to the source scan
+  through the transform recorded in _res.json
++ a bbox-keyed index of the crops is kept in imgs/crops_index.json, so blocks are matched
+  to files by bbox instead of by their position in a directory listing
+"""
+
+import json
+import os
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from image_preprocess import to_source_bbox
+
+INDEX_FILENAME = 'crops_index.json'
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png')
+INPUT_EXTS = ('.jpg', '.jpeg', '.png', '.tiff', '.bmp')
+
+# block_label -> file name prefix used by PPStructureV3
+_PREFIXES = {
+    'image': 'img_in_image_box',
+    'table': 'img_in_table_box',
+}
+
+
+def bbox_key(bbox) -> str:
+    return '_'.join(str(int(round(v))) for v in bbox)
+
+
+def find_source_image(page_number: str, data: dict, input_folder: str = 'input') -> Optional[str]:
+    """
+    Locate the source scan of a page: input/<page_number>.<ext>, else the input_path recorded by OCR.
+    """
+    for ext in INPUT_EXTS:
+        path = os.path.join(input_folder, f"{page_number}{ext}")
+        if os.path.exists(path):
+            return path
+    input_path = data.get('input_path')
+    if input_path:
+        # _res.json files written on Windows use backslashes
+        input_path = input_path.replace('\\', os.sep)
+        if os.path.exists(input_path):
+            return input_path
+    return None
+
+
+class ImageIndex:
+    def __init__(self, imgs_dir: str):
+        """
+        bbox-keyed index of the crops in a page's imgs/ folder.
+
+        :param imgs_dir: Page imgs/ folder.
+        """
+        self.imgs_dir = imgs_dir
+        self.index_path = os.path.join(imgs_dir, INDEX_FILENAME)
+        self.entries = {label: {} for label in _PREFIXES}  # label -> bbox key -> file name
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.entries.update(json.load(f))
+
+    def lookup(self, label: str, bbox) -> Optional[str]:
+        """
+        Path of the crop of a block, or None. Falls back to the PPStructureV3 file naming for
+        crops saved by OCR before the index existed.
+        """
+        key = bbox_key(bbox)
+        filename = self.entries.get(label, {}).get(key)
+        if filename and os.path.exists(os.path.join(self.imgs_dir, filename)):
+            return os.path.join(self.imgs_dir, filename)
+
+        prefix = _PREFIXES.get(label)
+        if prefix is None:
+            return None
+        for ext in IMAGE_EXTS:
+            filename = f"{prefix}_{key}{ext}"
+            if os.path.exists(os.path.join(self.imgs_dir, filename)):
+                self.entries[label][key] = filename
+                return os.path.join(self.imgs_dir, filename)
+        return None
+
+    def add(self, label: str, bbox, filename: str):
+        self.entries.setdefault(label, {})[bbox_key(bbox)] = filename
+
+    def save(self):
+        os.makedirs(self.imgs_dir, exist_ok=True)
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=4)
+
+
+def _crop_box(bbox, width: int, height: int):
+    x1, y1, x2, y2 = (int(round(v)) for v in bbox)
+    box = (max(0, x1), max(0, y1), min(width, x2), min(height, y2))
+    if box[2] <= box[0] or box[3] <= box[1]:
+        return None
+    return box
+
+
+def materialize_images(data: dict, imgs_dir: str, source_image_path: Optional[str],
+                       source_page=None) -> ImageIndex:
+    """
+    Make sure every image / table block of a page has its crop in imgs/.
+
+    :param data: Loaded page JSON.
+    :param imgs_dir: Page imgs/ folder.
+    :param source_image_path: Source scan of the page (None: only already-existing crops are indexed).
+    :param source_page: Decoded PreprocessedPage the page was OCR'd from; cropped directly when given.
+    :return: ImageIndex of the page.
+    """
+    index = ImageIndex(imgs_dir)
+
+    missing = []
+    for block in data.get('parsing_res_list', []):
+        label = block.get('block_label')
+        bbox = block.get('block_bbox')
+        if label in _PREFIXES and bbox and index.lookup(label, bbox) is None:
+            missing.append((label, bbox))
+
+    if missing and source_page is not None:
+        os.makedirs(imgs_dir, exist_ok=True)
+        # Same buffer OCR ran on: bboxes are already in its coordinates
+        image = source_page.image
+        height, width = image.shape[:2]
+        for label, bbox in missing:
+            box = _crop_box(bbox, width, height)
+            if box is None:
+                continue
+            x1, y1, x2, y2 = box
+            filename = f"{_PREFIXES[label]}_{bbox_key(bbox)}.jpg"
+            crop = np.ascontiguousarray(image[y1:y2, x1:x2, ::-1])  # BGR -> RGB
+            Image.fromarray(crop).save(os.path.join(imgs_dir, filename), quality=95)
+            index.add(label, bbox, filename)
+    elif missing and source_image_path is not None:
+        os.makedirs(imgs_dir, exist_ok=True)
+        transform = data.get('preprocess')
+        # Decode the source page once for all crops
+        with Image.open(source_image_path) as page_image:
+            page_image = page_image.convert('RGB')
+            width, height = page_image.size
+            for label, bbox in missing:
+                box = _crop_box(to_source_bbox(bbox, transform), width, height)
+                if box is None:
+                    continue
+                filename = f"{_PREFIXES[label]}_{bbox_key(bbox)}.jpg"
+                page_image.crop(box).save(os.path.join(imgs_dir, filename), quality=95)
+                index.add(label, bbox, filename)
+
+    if missing:
+        index.save()
+    return index
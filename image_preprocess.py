@@ -0,0 +1,197 @@
+"""
+Image Preprocessing Module
+
+Decode each page image once and hand the in-memory array to the OCR pipeline, instead of letting
+PPStructureV3 decode the file itself and the crop step decode it again.
+
++ optional memory-mapped reads (Config.PREPROCESS_USE_MMAP)
++ downscale to Config.PREPROCESS_MAX_SIDE: a 600-DPI scan is shrunk inside the model anyway
+  (text_det_limit_side_len); JPEGs are decoded straight at reduced size (PIL draft mode),
+  so the full-resolution bitmap is never materialized
++ optional grayscale and border trim, vectorized with NumPy
++ the transform (scale, trim offset) is recorded in _res.json ('preprocess'), so block bboxes
+  can be mapped back to the source scan when crops are redone from the file later
+
+Bboxes in _res.json are in the coordinates of the preprocessed array.
+"""
+
+import mmap
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from config import Config
+from result_store import load_page_result, save_page_result
+
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.tiff', '.bmp')
+
+
+class PreprocessedPage:
+    def __init__(self, image: np.ndarray, source_path: str, source_size: Tuple[int, int],
+                 scale: Tuple[float, float], offset: Tuple[int, int]):
+        """
+        :param image: BGR uint8 array (H x W x 3, C-contiguous) fed to the OCR pipeline.
+        :param source_path: Path of the decoded file.
+        :param source_size: (width, height) of the source image.
+        :param scale: (sx, sy) source pixels per preprocessed pixel.
+        :param offset: (x, y) trimmed off the top-left corner, in downscaled pixels.
+        """
+        self.image = image
+        self.source_path = source_path
+        self.source_size = source_size
+        self.scale = scale
+        self.offset = offset
+
+    @property
+    def nbytes(self) -> int:
+        return self.image.nbytes
+
+    def transform(self) -> dict:
+        return {
+            'source_size': list(self.source_size),
+            'scale': [round(s, 6) for s in self.scale],
+            'offset': list(self.offset),
+        }
+
+
+def preprocess_settings() -> Optional[dict]:
+    """
+    Active preprocessing settings (None when preprocessing is off). Anything reusing OCR outputs
+    across runs (e.g. the page index) must key on these, since they change the results.
+    """
+    if not Config.USE_PREPROCESSING:
+        return None
+    return {
+        'max_side': Config.PREPROCESS_MAX_SIDE,
+        'grayscale': Config.PREPROCESS_GRAYSCALE,
+        'trim_border': Config.PREPROCESS_TRIM_BORDER,
+        'trim_tolerance': Config.PREPROCESS_TRIM_TOLERANCE,
+    }
+
+
+def is_image(path: str) -> bool:
+    return path.lower().endswith(IMAGE_EXTS)
+
+
+def _decode(img: Image.Image, max_side: Optional[int]) -> Tuple[Image.Image, Tuple[int, int]]:
+    source_size = img.size
+    target = None
+    if max_side and max(source_size) > max_side:
+        ratio = max_side / max(source_size)
+        target = (max(1, round(source_size[0] * ratio)), max(1, round(source_size[1] * ratio)))
+        # JPEG: let the decoder downscale by 1/2, 1/4 or 1/8 in the DCT domain (no-op for other formats)
+        img.draft('RGB', target)
+
+    img = img.convert('RGB')
+    if target is not None and img.size != target:
+        img = img.resize(target, Image.BILINEAR, reducing_gap=2.0)
+    return img, source_size
+
+
+def decode_image(path: str, max_side: Optional[int] = None,
+                 use_mmap: bool = Config.PREPROCESS_USE_MMAP) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    Decode an image file once into an RGB array, downscaled so its longest side is at most max_side.
+
+    :return: (RGB uint8 array, (source width, source height)).
+    """
+    if use_mmap and os.path.getsize(path) > 0:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with Image.open(mapped) as img:
+                img, source_size = _decode(img, max_side)
+                return np.asarray(img), source_size
+
+    with Image.open(path) as img:
+        img, source_size = _decode(img, max_side)
+        return np.asarray(img), source_size
+
+
+def to_grayscale(rgb: np.ndarray) -> np.ndarray:
+    """
+    ITU-R BT.601 luma of an RGB uint8 array, integer arithmetic (H x W uint8).
+    """
+    luma = rgb[:, :, 0].astype(np.uint16) * 77
+    luma += rgb[:, :, 1].astype(np.uint16) * 150
+    luma += rgb[:, :, 2].astype(np.uint16) * 29
+    luma >>= 8
+    return luma.astype(np.uint8)
+
+
+def border_box(gray: np.ndarray, tolerance: int = Config.PREPROCESS_TRIM_TOLERANCE,
+               margin: int = 8) -> Tuple[int, int, int, int]:
+    """
+    Content box (x1, y1, x2, y2) of a page: rows / columns that differ from the border color
+    (median of the outermost pixels) by more than `tolerance`, padded by `margin` pixels.
+    Returns the whole page if nothing stands out.
+    """
+    height, width = gray.shape
+    frame = np.concatenate((gray[0], gray[-1], gray[:, 0], gray[:, -1]))
+    border = int(np.median(frame))
+    content = np.abs(gray.astype(np.int16) - border) > tolerance
+
+    rows = np.flatnonzero(content.any(axis=1))
+    cols = np.flatnonzero(content.any(axis=0))
+    if rows.size == 0 or cols.size == 0:
+        return 0, 0, width, height
+    return (max(0, int(cols[0]) - margin), max(0, int(rows[0]) - margin),
+            min(width, int(cols[-1]) + 1 + margin), min(height, int(rows[-1]) + 1 + margin))
+
+
+def preprocess_image(path: str,
+                     max_side: Optional[int] = Config.PREPROCESS_MAX_SIDE,
+                     grayscale: bool = Config.PREPROCESS_GRAYSCALE,
+                     trim_border: bool = Config.PREPROCESS_TRIM_BORDER,
+                     use_mmap: bool = Config.PREPROCESS_USE_MMAP) -> PreprocessedPage:
+    """
+    Decode a page image once and prepare the BGR array for PPStructureV3.
+
+    :param path: Image file.
+    :param max_side: Longest side of the array in pixels (None: keep the source resolution).
+    :param grayscale: Convert to grayscale (still 3 channels, as the pipeline expects).
+    :param trim_border: Cut the uniform scanner border around the page content.
+    :param use_mmap: Read the file through a memory map.
+    """
+    rgb, source_size = decode_image(path, max_side=max_side, use_mmap=use_mmap)
+    height, width = rgb.shape[:2]
+    scale = (source_size[0] / width, source_size[1] / height)
+
+    gray = to_grayscale(rgb) if grayscale or trim_border else None
+
+    x1, y1 = 0, 0
+    if trim_border:
+        x1, y1, x2, y2 = border_box(gray)
+        rgb = rgb[y1:y2, x1:x2]
+        gray = gray[y1:y2, x1:x2]
+
+    if grayscale:
+        image = np.repeat(gray[:, :, None], 3, axis=2)
+    else:
+        # RGB -> BGR
+        image = np.ascontiguousarray(rgb[:, :, ::-1])
+
+    return PreprocessedPage(image, path, source_size, scale, (x1, y1))
+
+
+def to_source_bbox(bbox, transform: Optional[dict]):
+    """
+    Map a bbox from preprocessed-array coordinates back to the source scan.
+    """
+    if not transform:
+        return bbox
+    sx, sy = transform['scale']
+    ox, oy = transform['offset']
+    x1, y1, x2, y2 = bbox
+    return [(x1 + ox) * sx, (y1 + oy) * sy, (x2 + ox) * sx, (y2 + oy) * sy]
+
+
+def record_transform(res_json_path: str, page: PreprocessedPage):
+    """
+    Store the source path and preprocessing transform in a page's _res.json
+    (OCR on an array has no input_path of its own).
+    """
+    data = load_page_result(res_json_path)
+    data['input_path'] = page.source_path
+    data['preprocess'] = page.transform()
+    save_page_result(res_json_path, data)
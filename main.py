@@ -1,5 +1,6 @@
 import logging
 import os
+import time
 import argparse
 from tqdm import tqdm
 
@@ -10,47 +11,25 @@ def suppress_logs():
     os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3" # Suppress logs from TensorFlow except errors; 3 means ERROR
 
 from utils.timer import Timer, Time
+from utils.tracing import span, tracer
+from utils.pipeline import StagedPipeline
+from output_folder import OutputPageFolder
 from config import Config
-from ocr_engine import OCREngine
-from text_correction import TextCorrector
+from components import LazyComponent, create_component
 from docx_builder import DOCXBuilder, build_docx_from_ocr_json
+from image_preprocess import is_image, preprocess_image
+from ocr_backends import is_remote_backend, ocr_backend_names
+from profiles import profile_names
+from result_store import convert_output_folder, load_page_result, page_result_exists
 
-import json
 
-from paddleocr import PPStructureV3
-
-# Class for output folder management
-# Structure:
-# output/[page_number]/[page_number]/
-# - imgs/
-# - [page_number]_res.json
-# - [page_number]_improved.json
-# - [page_number]_result.docx
-# - [page_number].md (ignore for now)
-
-class OutputPageFolder:
-
-    def __init__(self, base_output_dir: str, page_number: str):
-        self.base_output_dir = base_output_dir
-        self.page_number = page_number
-        self.page_output_dir = os.path.join(base_output_dir, page_number)
-
-        self.imgs_dir = os.path.join(self.page_output_dir, "imgs")
-        self.res_json_path = os.path.join(self.page_output_dir, f"{page_number}_res.json")
-        self.improved_json_path = os.path.join(self.page_output_dir, f"{page_number}_improved.json")
-        self.docx_path = os.path.join(self.page_output_dir, f"{page_number}_result.docx")
-        self.md_path = os.path.join(self.page_output_dir, f"{page_number}.md")
-
-        self._create_dirs()
-
-    def _create_dirs(self):
-        os.makedirs(self.imgs_dir, exist_ok=True)
-        os.makedirs(self.page_output_dir, exist_ok=True)
+# OCR (Paddle) and text correction (Torch / Transformers) are heavy to import:
+# commands get them through the lazy component registry, so e.g. --build_docx never loads them.
 
 def ocr_cli(input_image_path: str, save_path: str):
     timer = Timer(name="Initialize OCR engine timer")
     timer.start()
-    ocr_engine = OCREngine()
+    ocr_engine = create_component('ocr_engine')
     timer.stop()
     print(f"OCR engine initialized in {timer.runtime}")
 
@@ -63,7 +42,7 @@ def ocr_cli(input_image_path: str, save_path: str):
 def correct_text_cli(input_json_path: str, save_path: str):
     timer = Timer(name="Initialize text corrector timer")
     timer.start()
-    text_corrector = TextCorrector()
+    text_corrector = create_component('text_corrector')
     timer.stop()
     print(f"Initialized Text Corrector in {timer.runtime}")
 
@@ -72,6 +51,72 @@ def correct_text_cli(input_json_path: str, save_path: str):
     text_corrector.improve_json(input_json_path, save_path)
     timer.stop()
     print(f"Text correction completed in {timer.runtime}")
+    print(text_corrector.summary())
+
+def ocr_page(ocr_engine, input_image_path: str, output_folder: OutputPageFolder, page_index=None, page=None):
+    """
+    OCR one page into its output folder.
+    With a page index, duplicate pages are cloned from the matching page instead of running OCR.
+
+    :param page: Already decoded PreprocessedPage of the image (decoded by the OCR engine if None).
+    :return: The decoded page, to crop images from without decoding the scan again (None if unavailable).
+    """
+    if page_index is not None:
+        page_index.predict(ocr_engine, input_image_path, output_folder, page=page)
+        return page
+    return ocr_engine.predict_page(input_image_path, output_folder, page=page)
+
+def ocr_pdf_cli(pdf_path: str, output_base_folder: str = "output"):
+    ocr_engine = create_component('ocr_engine')
+    timer = Timer(name="PDF OCR timer")
+    timer.start()
+    for output_folder in ocr_engine.predict_pdf(pdf_path, output_base_folder):
+        print(f"OCR results saved to: {output_folder.page_output_dir}")
+    timer.stop()
+    print(f"PDF OCR completed in {timer.runtime}")
+
+def is_pdf(filename: str) -> bool:
+    return filename.lower().endswith('.pdf')
+
+def expand_input_pages(input_folder: str, files_to_process):
+    """
+    One entry per page: (page_number, input_path, pdf_page_index).
+    Images are one page each (pdf_page_index None); a PDF expands to one entry per page,
+    which is only rendered when its OCR starts (see pdf_ingest.render_pdf_page).
+    """
+    from pdf_ingest import pdf_page_count, pdf_page_number
+
+    pages = []
+    for filename in files_to_process:
+        input_path = os.path.join(input_folder, filename)
+        if is_pdf(filename):
+            for pdf_page_index in range(pdf_page_count(input_path)):
+                pages.append((pdf_page_number(input_path, pdf_page_index), input_path, pdf_page_index))
+        else:
+            pages.append((os.path.splitext(filename)[0], input_path, None))
+    return pages
+
+def ocr_pdf_page(ocr_engine, pdf_path: str, pdf_page_index: int, output_folder: OutputPageFolder):
+    from pdf_ingest import render_pdf_page
+
+    image = render_pdf_page(pdf_path, pdf_page_index)
+    ocr_engine.predict_array(image, output_folder)
+
+def daemon_cli(stage: str, input_path: str):
+    from daemon import DaemonClient
+
+    job = DaemonClient().submit(stage, input_path)
+    if job['status'] != 'done':
+        print(f"Daemon job {job['job_id']} failed: {job['error']}")
+        return
+
+    timings = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in job['timings'].items())
+    print(f"Daemon job {job['job_id']} done ({timings})")
+    # A PDF job has one result per page
+    for result in job['result'].get('pages', [job['result']]):
+        for key, path in result.items():
+            if key.endswith('_path') or key.endswith('_dir'):
+                print(f"  {key}: {path}")
 
 # Mass conversion pipeline:
 # 1. Input: folder with images or PDFs (input); each file named as <page_number>.jpg
@@ -80,62 +125,390 @@ def correct_text_cli(input_json_path: str, save_path: str):
 #  b. OCR: ocr_cli(input_image_path, save_path)
 #  c. Text correction: correct_text_cli(input_json_path, save_path)
 #  d. Build DOCX: build_docx_from_ocr_json(res_path, save_path)
-def mass_conversion(input_folder: str, output_base_folder: str, min_page_number: int = None, max_page_number: int = None):
-    # Create only 1 pipeline instances to save time
-    ocr_engine = OCREngine()
-    text_corrector = TextCorrector()
-
-    # Get list of files to process
+def collect_input_files(input_folder: str, min_page_number: int = None, max_page_number: int = None):
+    """
+    List input files (named <page_number>.<ext>) within the page range.
+    Files with a non-numeric name (e.g. book.pdf, whose pages become book_p001, ...) have no place in the range
+    and are always included.
+    """
     files_to_process = []
     for filename in os.listdir(input_folder):
         if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.pdf')):
             page_number = os.path.splitext(filename)[0]
             
-            if min_page_number is not None and int(page_number) < min_page_number:
-                continue
-            if max_page_number is not None and int(page_number) > max_page_number:
-                continue
+            if page_number.isdigit():
+                if min_page_number is not None and int(page_number) < min_page_number:
+                    continue
+                if max_page_number is not None and int(page_number) > max_page_number:
+                    continue
             
             files_to_process.append(filename)
+    return files_to_process
+
+def select_page_folders(parser, option: str, values: list, output_base_folder: str):
+    """
+    Page numbers named by --assemble_docx / --mass_build_docx: a page range (min max) or the stem of a PDF
+    (its <stem>_p<NNN> page folders).
+
+    :return: (page numbers, label for messages / file names)
+    """
+    from pdf_ingest import pdf_page_folders
+
+    if len(values) == 2 and all(value.isdigit() for value in values):
+        min_page, max_page = int(values[0]), int(values[1])
+        return [str(page_num) for page_num in range(min_page, max_page + 1)], f"{min_page}_{max_page}"
+    if len(values) == 1:
+        return pdf_page_folders(output_base_folder, values[0]), values[0]
+    parser.error(f"{option} takes <min_page_number> <max_page_number> or <pdf_stem>")
+
+def run_stage(planner, manifest, stage: str, page_number: str, fn):
+    """
+    Run one stage of a page unless its build manifest says it is up to date, then record it.
+
+    :return: What fn returned, or None if the stage was skipped.
+    :raises StageError: If the stage failed (names the stage for the dead-letter list).
+    """
+    from supervisor import StageError
+
+    if not planner.needs(manifest, stage):
+        return None
+    start = time.perf_counter()
+    try:
+        with span(stage, page=page_number):
+            result = fn()
+    except Exception as e:
+        raise StageError(stage, e) from e
+    planner.done(manifest, stage, time.perf_counter() - start)
+    return result
+
+def recycle_models(supervisor, *components):
+    """
+    Reload the lazily built models once the supervisor asks for it (page count, RSS or a timeout).
+    """
+    import gc
+
+    if not supervisor.recycle_due():
+        return
+    for component in components:
+        component.reset()
+    gc.collect()
+    supervisor.recycled()
+
+def mass_conversion(input_folder: str, output_base_folder: str, min_page_number: int = None, max_page_number: int = None,
+                    dedup: bool = False, force: bool = False):
+    from build_manifest import BuildPlanner
+    from supervisor import PageSupervisor
+
+    # Create only 1 pipeline instances to save time; built on first use, so a resumed run
+    # whose pages are all up to date loads no model
+    ocr_engine = LazyComponent('ocr_engine')
+    text_corrector = LazyComponent('text_corrector')
+    page_index = create_component('page_index') if dedup else None
+    planner = BuildPlanner(force=force)
+    # Failed pages are retried, then go to the dead-letter list instead of ending the run
+    supervisor = PageSupervisor()
+
+    # Get list of pages to process (a PDF is one entry per page, rendered only when its OCR runs)
+    files_to_process = collect_input_files(input_folder, min_page_number, max_page_number)
+    pages = expand_input_pages(input_folder, files_to_process)
     
     # Create progress bar
-    print(f"\nStarting mass conversion of {len(files_to_process)} files...\n")
-    pbar = tqdm(files_to_process, desc="Processing files", unit="file", ncols=100, colour='green')
+    print(f"\nStarting mass conversion of {len(pages)} pages from {len(files_to_process)} files...\n")
+    pbar = tqdm(pages, desc="Processing pages", unit="page", ncols=100, colour='green')
     
-    for filename in pbar:
-        page_number = os.path.splitext(filename)[0]
-        input_image_path = os.path.join(input_folder, filename)
+    for page_number, input_image_path, pdf_page_index in pbar:
         output_folder = OutputPageFolder(base_output_dir=output_base_folder, page_number=page_number)
+        manifest = planner.manifest(output_folder, input_image_path, pdf_page_index)
 
         pbar.set_description(f"Processing page {page_number}")
-        timer = Timer()
+        if planner.is_complete(manifest):
+            pbar.set_postfix_str("Up to date")
+            continue
+
+        def convert_page():
+            # Step 1: OCR
+            pbar.set_postfix_str("OCR...")
+            if pdf_page_index is not None:
+                page = run_stage(planner, manifest, 'ocr', page_number,
+                                 lambda: ocr_pdf_page(ocr_engine, input_image_path, pdf_page_index, output_folder))
+            else:
+                page = run_stage(planner, manifest, 'ocr', page_number,
+                                 lambda: ocr_page(ocr_engine, input_image_path, output_folder, page_index))
+
+            # Step 2: Text Correction
+            pbar.set_postfix_str("Correcting text...")
+            run_stage(planner, manifest, 'correction', page_number,
+                      lambda: text_corrector.improve_json(input_json=output_folder.res_json_path, output_json=output_folder.improved_json_path))
+
+            # Step 3: Build DOCX
+            pbar.set_postfix_str("Building DOCX...")
+            source_image_path = input_image_path if pdf_page_index is None else None
+            run_stage(planner, manifest, 'docx', page_number,
+                      lambda: build_docx_from_ocr_json(res_path=output_folder.page_output_dir, save_path=output_folder.docx_path,
+                                                       source_image_path=source_image_path, source_page=page))
+
+        timer = Timer(name="page")
         timer.start()
-
-        # Step 1: OCR
-        pbar.set_postfix_str("OCR...")
-        ocr_timer = Timer()
-        ocr_timer.start()
-        ocr_engine.predict(input_image_path, save_path=output_folder.page_output_dir)
-        ocr_timer.stop()
-        
-        # Step 2: Text Correction
-        pbar.set_postfix_str("Correcting text...")
-        correction_timer = Timer()
-        correction_timer.start()
-        text_corrector.improve_json(input_json=output_folder.res_json_path, output_json=output_folder.improved_json_path)
-        correction_timer.stop()
-        
-        # Step 3: Build DOCX
-        pbar.set_postfix_str("Building DOCX...")
-        build_docx_from_ocr_json(res_path=output_folder.page_output_dir, save_path=output_folder.docx_path)
-
+        # A retry re-runs only the stages the manifest does not have yet
+        ok = supervisor.run(page_number, convert_page, input_path=input_image_path)
         timer.stop()
-        pbar.set_postfix_str(f"Done ({timer.runtime})")
+        pbar.set_postfix_str(f"Done ({timer.runtime})" if ok else "Failed")
+        recycle_models(supervisor, ocr_engine, text_corrector)
     
     pbar.close()
+    if page_index is not None:
+        page_index.save()
+        print(page_index.summary())
+    if text_corrector.loaded:
+        print(text_corrector.summary())
+    print(planner.summary())
+    print(supervisor.summary())
+    print(f"\n{'='*100}")
+    print(f"Mass conversion completed" + (" successfully!" if not supervisor.failed else f" with {supervisor.failed} failed pages."))
+    print(f"Processed {len(pages)} pages from {len(files_to_process)} files.")
+    print(f"{'='*100}\n")
+
+# Pipelined mass conversion:
+# Same steps as mass_conversion, but OCR, text correction and DOCX building each run in their own worker
+# and pages flow between them through bounded queues:
+#   page N+1 is OCR'd while page N is corrected and page N-1 is written to DOCX.
+# Per-stage occupancy is printed at the end to show which stage is the bottleneck.
+def pipelined_mass_conversion(input_folder: str, output_base_folder: str, min_page_number: int = None, max_page_number: int = None,
+                              queue_size: int = Config.PIPELINE_QUEUE_SIZE, dedup: bool = False, force: bool = False):
+    from build_manifest import BuildPlanner
+    from supervisor import PageSupervisor
+
+    ocr_engine = LazyComponent('ocr_engine')
+    text_corrector = LazyComponent('text_corrector')
+    page_index = create_component('page_index') if dedup else None
+    planner = BuildPlanner(force=force)
+    supervisor = PageSupervisor()
+
+    files_to_process = collect_input_files(input_folder, min_page_number, max_page_number)
+    pages = expand_input_pages(input_folder, files_to_process)
+
+    def timed(page, stage, fn):
+        # The pipeline already traces each stage; only the manifest needs the duration.
+        # Stages run in threads, so a stage is retried on its own (no time limit, see supervisor.time_limit)
+        start = time.perf_counter()
+        supervisor.attempt(fn, page['output_folder'].page_number, stage)
+        planner.done(page['manifest'], stage, time.perf_counter() - start)
+
+    def decode_stage(page):
+        page['run_ocr'] = planner.needs(page['manifest'], 'ocr')
+        # Images are decoded once here; OCR and the crop step both use this buffer
+        if page['run_ocr'] and page['pdf_page_index'] is None and Config.USE_PREPROCESSING and is_image(page['input_path']):
+            page['decoded'] = preprocess_image(page['input_path'])
+        return page
+
+    def ocr_stage(page):
+        if not page['run_ocr']:
+            return page
+        output_folder = page['output_folder']
+        if page['pdf_page_index'] is not None:
+            # Rendered here, not in the feeder, so at most one rasterized PDF page is alive at a time
+            timed(page, 'ocr', lambda: ocr_pdf_page(ocr_engine, page['input_path'], page['pdf_page_index'], output_folder))
+        else:
+            timed(page, 'ocr', lambda: ocr_page(ocr_engine, page['input_path'], output_folder, page_index, page=page['decoded']))
+        return page
+
+    def correction_stage(page):
+        output_folder = page['output_folder']
+        if planner.needs(page['manifest'], 'correction'):
+            timed(page, 'correction', lambda: text_corrector.improve_json(input_json=output_folder.res_json_path,
+                                                                          output_json=output_folder.improved_json_path))
+        return page
+
+    def docx_stage(page):
+        output_folder = page['output_folder']
+        if planner.needs(page['manifest'], 'docx'):
+            timed(page, 'docx', lambda: build_docx_from_ocr_json(res_path=output_folder.page_output_dir,
+                                                                 save_path=output_folder.docx_path,
+                                                                 source_page=page['decoded']))
+        page['decoded'] = None
+        return page
+
+    pipeline = StagedPipeline(queue_size=queue_size)
+    pipeline.add_stage("decode", decode_stage)
+    pipeline.add_stage("ocr", ocr_stage)
+    pipeline.add_stage("correction", correction_stage)
+    pipeline.add_stage("docx", docx_stage)
+
+    print(f"\nStarting pipelined mass conversion of {len(pages)} pages from {len(files_to_process)} files...\n")
+    pbar = tqdm(total=len(pages), desc="Processing pages", unit="page", ncols=100, colour='green')
+
+    def on_item_done(stage_name, item):
+        if stage_name == "docx":
+            if item.error is None:
+                supervisor.page_succeeded(item.key)
+            else:
+                supervisor.page_failed(item.key, item.exception, item.payload['input_path'], item.failed_stage)
+            # OCR and correction each run in one thread that only touches its own model, so resetting
+            # the components here is safe: a running call keeps its instance, the next call builds a new one
+            recycle_models(supervisor, ocr_engine, text_corrector)
+            pbar.update(1)
+            pbar.set_postfix_str(f"Done page {item.key}" if item.error is None else f"Error page {item.key}")
+
+    def items():
+        for page_number, input_path, pdf_page_index in pages:
+            output_folder = OutputPageFolder(base_output_dir=output_base_folder, page_number=page_number)
+            manifest = planner.manifest(output_folder, input_path, pdf_page_index)
+            if planner.is_complete(manifest):
+                pbar.update(1)
+                continue
+            yield page_number, {'output_folder': output_folder, 'input_path': input_path,
+                                'pdf_page_index': pdf_page_index, 'decoded': None, 'manifest': manifest}
+
+    results = pipeline.run(items(), on_item_done=on_item_done)
+    pbar.close()
+
+    failed = [item for item in results if item.error is not None]
+    for item in failed:
+        print(f"Page {item.key} failed at stage '{item.failed_stage}': {item.error}")
+
+    pipeline.print_report()
+    if page_index is not None:
+        page_index.save()
+        print(page_index.summary())
+    if text_corrector.loaded:
+        print(text_corrector.summary())
+    print(planner.summary())
+    print(supervisor.summary())
     print(f"\n{'='*100}")
-    print(f"Mass conversion completed successfully!")
-    print(f"Processed {len(files_to_process)} files.")
+    print(f"Pipelined mass conversion completed!")
+    print(f"Processed {len(results) - len(failed)}/{len(results)} pages in {pipeline.wall_time:.2f}s "
+          f"({len(pages) - len(results)} already up to date).")
+    print(f"{'='*100}\n")
+
+# Multi-process mass conversion (CPU-only nodes):
+# N OCR worker processes, each with its own OCREngine and a share of Config.CPU_THREADS, pull pages from a shared queue.
+# With a remote OCR backend, up to N requests are in flight instead (remote_ocr.RemoteOCRPool) and no OCR runs locally.
+# The main process runs text correction and DOCX building for each page as soon as its OCR result comes back.
+def parallel_mass_conversion(input_folder: str, output_base_folder: str, num_workers: int,
+                             min_page_number: int = None, max_page_number: int = None, dedup: bool = False,
+                             force: bool = False):
+    from build_manifest import BuildPlanner
+    from ocr_worker_pool import OCRWorkerPool
+    from supervisor import PageSupervisor
+
+    remote = is_remote_backend(Config.OCR_BACKEND)
+    ocr_label = f"{num_workers} OCR requests in flight ({Config.OCR_BACKEND})" if remote else f"{num_workers} OCR workers"
+    planner = BuildPlanner(force=force)
+    # OCR is supervised by the pool (timeouts, retries, worker recycling); the supervisor retries
+    # correction / DOCX in this process and keeps the dead-letter list for both
+    supervisor = PageSupervisor()
+    files_to_process = collect_input_files(input_folder, min_page_number, max_page_number)
+    # PDFs are split into per-page tasks; each worker renders only the pages it OCRs
+    manifests = {}
+    input_paths = {}
+    tasks = []
+    ocr_done_pages = []  # OCR up to date: only correction / DOCX may need to run
+    up_to_date = 0
+    for page_number, input_path, pdf_page_index in expand_input_pages(input_folder, files_to_process):
+        manifest = planner.manifest(OutputPageFolder(base_output_dir=output_base_folder, page_number=page_number),
+                                    input_path, pdf_page_index)
+        manifests[page_number] = manifest
+        input_paths[page_number] = input_path
+        if planner.is_complete(manifest):
+            up_to_date += 1
+        elif planner.needs(manifest, 'ocr'):
+            tasks.append((page_number, input_path, output_base_folder, pdf_page_index))
+        else:
+            ocr_done_pages.append(page_number)
+    num_pages = len(tasks) + len(ocr_done_pages)
+
+    text_corrector = LazyComponent('text_corrector')
+
+    # With dedup, duplicates of already-indexed pages are cloned up front and never reach the workers
+    page_index = create_component('page_index') if dedup else None
+    cloned_pages = []
+    page_hashes = {}
+    if page_index is not None:
+        ocr_tasks = []
+        for task in tasks:
+            page_number, input_image_path, _, pdf_page_index = task
+            if pdf_page_index is not None:
+                # The page index hashes image files; rendered PDF pages always go to OCR
+                ocr_tasks.append(task)
+                continue
+            output_folder = OutputPageFolder(base_output_dir=output_base_folder, page_number=page_number)
+            cloned, hashes = page_index.reuse(input_image_path, output_folder)
+            if cloned:
+                planner.done(manifests[page_number], 'ocr')
+                cloned_pages.append(page_number)
+            else:
+                page_hashes[page_number] = hashes
+                ocr_tasks.append(task)
+        tasks = ocr_tasks
+
+    print(f"\nStarting mass conversion of {num_pages} pages with {ocr_label} "
+          f"({up_to_date} pages already up to date)...\n")
+    pbar = tqdm(total=num_pages, desc="Processing pages", unit="page", ncols=100, colour='green')
+
+    def finish_page(page_number):
+        output_folder = OutputPageFolder(base_output_dir=output_base_folder, page_number=page_number)
+        manifest = manifests[page_number]
+
+        def correct_and_build():
+            pbar.set_postfix_str(f"Correcting page {page_number}...")
+            run_stage(planner, manifest, 'correction', page_number,
+                      lambda: text_corrector.improve_json(input_json=output_folder.res_json_path, output_json=output_folder.improved_json_path))
+            pbar.set_postfix_str(f"Building DOCX page {page_number}...")
+            run_stage(planner, manifest, 'docx', page_number,
+                      lambda: build_docx_from_ocr_json(res_path=output_folder.page_output_dir, save_path=output_folder.docx_path))
+
+        if not supervisor.run(page_number, correct_and_build, input_path=input_paths[page_number]):
+            failed.append(page_number)
+        recycle_models(supervisor, text_corrector)
+        pbar.update(1)
+
+    timer = Timer(name="mass_conversion")
+    timer.start()
+    failed = []
+    for page_number in ocr_done_pages + cloned_pages:
+        finish_page(page_number)
+    # No worker is started (and no OCR model loaded) when every page already has its OCR results
+    if tasks:
+        if remote:
+            from remote_ocr import RemoteOCRPool
+            ocr_pool = RemoteOCRPool(max_in_flight=num_workers)
+        else:
+            ocr_pool = OCRWorkerPool(num_workers=num_workers)
+        with ocr_pool as pool:
+            for page_number, error, ocr_seconds in pool.map(tasks):
+                if error is not None:
+                    details = pool.failures.get(page_number, {})
+                    supervisor.record_failure(page_number, 'ocr', error, details.get('traceback'),
+                                              details.get('attempts', 1), input_paths[page_number])
+                    failed.append(page_number)
+                    pbar.update(1)
+                    continue
+
+                planner.done(manifests[page_number], 'ocr', ocr_seconds)
+                if page_index is not None:
+                    page_index.add(page_hashes[page_number],
+                                   OutputPageFolder(base_output_dir=output_base_folder, page_number=page_number))
+                finish_page(page_number)
+        pool_summary = pool.summary()
+    else:
+        pool_summary = None
+    timer.stop()
+    pbar.close()
+
+    if page_index is not None:
+        page_index.save()
+        print(page_index.summary())
+    if text_corrector.loaded:
+        print(text_corrector.summary())
+    print(planner.summary())
+    if pool_summary is not None:
+        print(pool_summary)
+    print(supervisor.summary())
+
+    print(f"\n{'='*100}")
+    print(f"Mass conversion completed with {ocr_label}!")
+    print(f"Processed {num_pages - len(failed)}/{num_pages} pages in {timer.runtime} "
+          f"({num_pages / max(timer.elapsed(), 1e-9):.2f} pages/s).")
     print(f"{'='*100}\n")
 
 def main():
@@ -160,17 +533,129 @@ def main():
                         help='Mass convert all images/PDFs in the input folder. Optionally specify min and max page numbers to process.'
     )
     
+    parser.add_argument('--pipeline',
+                        action='store_true',
+                        help='With --mass_convert: run OCR, text correction and DOCX building as overlapping stages connected by bounded queues.'
+    )
+    
+    parser.add_argument('--workers',
+                        type=int,
+                        default=None,
+                        help=f'With --mass_convert: number of OCR worker processes (CPU-only nodes). Each worker gets a share of Config.CPU_THREADS. With a remote --ocr_backend: OCR requests in flight (default: {Config.REMOTE_OCR_MAX_IN_FLIGHT}).'
+    )
+    
+    parser.add_argument('--dedup',
+                        action='store_true',
+                        help='With --mass_convert: skip OCR for pages whose image matches an already-processed page (exact or perceptual hash) and clone its results.'
+    )
+    
+    parser.add_argument('--force',
+                        action='store_true',
+                        help='With --mass_convert or --watch: run every stage even if the build manifest says it is up to date.'
+    )
+    
+    parser.add_argument('--assemble_docx',
+                        nargs='+',
+                        metavar='PAGES',
+                        help='Assemble the pages of the output folder in the given range (<min_page_number> <max_page_number>), or the pages of a PDF (<pdf_stem>), into one DOCX (output/book_<min>_<max>.docx, output/book_<pdf_stem>.docx).'
+    )
+
+    parser.add_argument('--watch',
+                        type=str,
+                        metavar='input_folder',
+                        help='Watch a folder and run OCR, text correction and DOCX building on new or modified images as they arrive.'
+    )
+
+    parser.add_argument('--serve',
+                        action='store_true',
+                        help='Run the warm-model daemon (localhost HTTP) that keeps the OCR engine and text corrector loaded.'
+    )
+
+    parser.add_argument('--via-daemon',
+                        dest='via_daemon',
+                        action='store_true',
+                        help='Send --ocr_image / --correct_text / --build_docx to the running daemon instead of loading the models.'
+    )
+
+    parser.add_argument('--export_correction_model',
+                        choices=['torch_int8', 'onnx'],
+                        help='Build and cache the int8-quantized or ONNX Runtime version of the correction model (one-time).'
+    )
+
+    parser.add_argument('--compare_correction_backends',
+                        type=str,
+                        metavar='page_folder',
+                        help='Compare latency, throughput and output agreement of the correction backends on the text of a page folder.'
+    )
+    
+    parser.add_argument('--profile',
+                        choices=profile_names(),
+                        help=f'Speed / accuracy profile of the OCR pipeline and the correction model (default: {Config.PROFILE}).'
+    )
+
+    parser.add_argument('--ocr_backend',
+                        choices=ocr_backend_names(),
+                        help=f'OCR backend: PPStructureV3 (paddle) or a multimodal LLM over HTTP (gemini, needs GEMINI_API_KEY) (default: {Config.OCR_BACKEND}).'
+    )
+
+    parser.add_argument('--calibrate',
+                        type=str,
+                        metavar='sample_folder',
+                        help='Time the OCR modules and correction beam settings on sample pages and write a recommended profile for this machine.'
+    )
+    
+    parser.add_argument('--trace',
+                        nargs='?',
+                        const=Config.TRACE_DIR,
+                        metavar='trace_dir',
+                        help=f'Record nested timing spans (page -> stage -> step) and write trace.json (Chrome trace) and metrics.prom (Prometheus textfile) to trace_dir (default: {Config.TRACE_DIR}).'
+    )
+
+    parser.add_argument('--convert_results',
+                        choices=['json', 'binary'],
+                        help='Convert the _res / _improved results of every page folder in the output folder to JSON or to the compact binary format (.ocrb).'
+    )
+
     parser.add_argument('--mass_build_docx',
-                        nargs=2,
-                        metavar=('min_page_number', 'max_page_number'),
-                        help='Mass build DOCX files from existing JSON in output folder. Specify min and max page numbers.'
+                        nargs='+',
+                        metavar='PAGES',
+                        help='Mass build DOCX files from existing JSON in output folder. Specify min and max page numbers, or the stem of a PDF for its page folders.'
     )
 
     args = parser.parse_args()
 
     #suppress_logs()
 
-    if args.ocr_image:
+    if args.trace or Config.TRACE_ENABLED:
+        tracer.enable()
+
+    if args.profile:
+        Config.PROFILE = args.profile
+
+    if args.ocr_backend:
+        Config.OCR_BACKEND = args.ocr_backend
+
+    if args.calibrate:
+        from calibration import calibrate
+        calibrate(args.calibrate)
+        return
+
+    if args.serve:
+        from daemon import serve
+        serve()
+        return
+
+    if args.via_daemon:
+        # Route the single-page commands to the warm-model daemon
+        for stage, input_path in (('ocr', args.ocr_image), ('correct', args.correct_text), ('docx', args.build_docx)):
+            if input_path:
+                daemon_cli(stage, input_path)
+        args.ocr_image = args.correct_text = args.build_docx = None
+
+    if args.ocr_image and is_pdf(args.ocr_image):
+        # One page folder per PDF page
+        ocr_pdf_cli(args.ocr_image, output_base_folder="output")
+    elif args.ocr_image:
         page_number = os.path.splitext(os.path.basename(args.ocr_image))[0]
         output_folder = OutputPageFolder(base_output_dir="output", page_number=page_number)
 
@@ -195,34 +680,79 @@ def main():
         print(f"DOCX file saved to: {output_folder.docx_path}")
 
     if args.mass_convert:
-        mass_conversion(input_folder=args.mass_convert[0], output_base_folder="output", min_page_number=int(args.mass_convert[1]), max_page_number=int(args.mass_convert[2]))
+        if args.workers or is_remote_backend(Config.OCR_BACKEND):
+            # A remote backend waits on the network, not on local cores: always keep several pages in flight
+            parallel_mass_conversion(input_folder=args.mass_convert[0], output_base_folder="output", num_workers=args.workers or Config.REMOTE_OCR_MAX_IN_FLIGHT, min_page_number=int(args.mass_convert[1]), max_page_number=int(args.mass_convert[2]), dedup=args.dedup, force=args.force)
+        elif args.pipeline:
+            pipelined_mass_conversion(input_folder=args.mass_convert[0], output_base_folder="output", min_page_number=int(args.mass_convert[1]), max_page_number=int(args.mass_convert[2]), dedup=args.dedup, force=args.force)
+        else:
+            mass_conversion(input_folder=args.mass_convert[0], output_base_folder="output", min_page_number=int(args.mass_convert[1]), max_page_number=int(args.mass_convert[2]), dedup=args.dedup, force=args.force)
 
         print(f"Mass conversion completed. Check the 'output' folder for results.")
     
+    if args.watch:
+        from watcher import watch_folder
+        watch_folder(input_folder=args.watch, output_base_folder="output", force=args.force)
+
+    if args.assemble_docx:
+        from docx_assembler import assemble_docx
+        page_numbers, label = select_page_folders(parser, '--assemble_docx', args.assemble_docx, "output")
+        save_path = os.path.join("output", f"book_{label}.docx")
+
+        print(f"\nAssembling pages {' to '.join(args.assemble_docx)} ({len(page_numbers)} pages) into one DOCX...")
+        pbar = tqdm(total=len(page_numbers), desc="Assembling DOCX", unit="page", ncols=100, colour='blue')
+        timer = Timer(name="assemble_docx")
+        timer.start()
+        page_dirs = [os.path.join("output", page_number) for page_number in page_numbers]
+        pages = assemble_docx(page_dirs, save_path, pbar=pbar)
+        timer.stop()
+        pbar.close()
+
+        print(f"Assembled {pages} pages in {timer.runtime} ({pages / max(timer.elapsed(), 1e-9):.1f} pages/s).")
+        print(f"DOCX file saved to: {save_path}")
+
+    if args.export_correction_model:
+        from correction_backends import export_correction_model
+        path = export_correction_model(Config.PROTONX_CORRECTION_MODEL, args.export_correction_model, force=True)
+        print(f"Correction model artifacts saved to: {path}")
+
+    if args.compare_correction_backends:
+        from correction_backends import compare_backends, print_comparison
+        page_number = os.path.basename(args.compare_correction_backends.rstrip(os.sep))
+        output_folder = OutputPageFolder(base_output_dir="output", page_number=page_number)
+
+        data = load_page_result(output_folder.res_json_path, keys=('parsing_res_list', 'overall_ocr_res'))
+        # Text blocks plus every OCR line (covers table cells)
+        texts = [block['block_content'] for block in data.get('parsing_res_list', [])
+                 if block.get('block_label') != 'table' and block.get('block_content', '').strip()]
+        texts += [text for text in data.get('overall_ocr_res', {}).get('rec_texts', []) if text.strip()]
+
+        print_comparison(compare_backends(texts))
+
+    if args.convert_results:
+        converted = convert_output_folder("output", args.convert_results)
+        print(f"Converted {converted} result files to {args.convert_results}.")
+
     if args.mass_build_docx:
-        min_page = int(args.mass_build_docx[0])
-        max_page = int(args.mass_build_docx[1])
-        
-        print(f"\nBuilding DOCX files for pages {min_page} to {max_page}...")
-        pbar = tqdm(range(min_page, max_page + 1), desc="Building DOCX", unit="file", ncols=100, colour='blue')
+        page_numbers, _ = select_page_folders(parser, '--mass_build_docx', args.mass_build_docx, "output")
         
-        ocr_engine = OCREngine()  # Initialize once
+        print(f"\nBuilding DOCX files for pages {' to '.join(args.mass_build_docx)}...")
+        pbar = tqdm(page_numbers, desc="Building DOCX", unit="file", ncols=100, colour='blue')
 
-
-        for page_num in pbar:
-            page_number = str(page_num)
+        # No OCR engine needed: missing images are cropped from the source scans
+        for page_number in pbar:
             output_folder = OutputPageFolder(base_output_dir="output", page_number=page_number)
             
             # Check if JSON exists
-            json_path = output_folder.improved_json_path if os.path.exists(output_folder.improved_json_path) else output_folder.res_json_path
+            json_path = output_folder.improved_json_path if page_result_exists(output_folder.improved_json_path) else output_folder.res_json_path
             
-            if not os.path.exists(json_path):
+            if not page_result_exists(json_path):
                 pbar.set_postfix_str(f"Skipped (no JSON)")
                 continue
             
             try:
                 pbar.set_postfix_str(f"Building...")
-                build_docx_from_ocr_json(res_path=output_folder.page_output_dir, save_path=output_folder.docx_path, ocr_engine=ocr_engine)
+                build_docx_from_ocr_json(res_path=output_folder.page_output_dir, save_path=output_folder.docx_path)
                 pbar.set_postfix_str(f"Done")
             except Exception as e:
                 pbar.set_postfix_str(f"Error: {str(e)[:30]}")
@@ -230,6 +760,11 @@ def main():
         pbar.close()
         print(f"\nMass DOCX build completed. Check the 'output' folder for results.")
 
+    if tracer.enabled:
+        trace_path, metrics_path = tracer.export(args.trace or Config.TRACE_DIR)
+        print(tracer.summary())
+        print(f"Trace saved to: {trace_path} (open in chrome://tracing or ui.perfetto.dev), metrics to: {metrics_path}")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
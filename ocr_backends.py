@@ -0,0 +1,134 @@
+"""
+OCR Backends Module
+
+OCREngine hands the recognition itself to a backend (Config.OCR_BACKEND), so engines other than PPStructureV3
+can be plugged in. A backend turns a page (image path or BGR array) into results that follow the PPStructureV3
+result protocol, which is what correction, DOCX building and the result store read:
++ a dict with 'input_path' and 'parsing_res_list': blocks with block_label ('doc_title', 'paragraph_title',
+  'text', 'table' (HTML content), 'image', 'number'), block_content, block_bbox [x1, y1, x2, y2] in page pixels,
+  block_id and block_order
++ save_to_json(save_path) / save_to_markdown(save_path): save_path is a folder (<input stem>_res.json,
+  <input stem>.md) or the full file path
+
+Backends:
++ 'paddle': PPStructureV3, local (Paddle)
++ 'gemini': multimodal LLM over HTTP (remote_ocr.py). Nothing runs locally, so GPU-less nodes can offload OCR;
+  mass conversion keeps many pages in flight (remote_ocr.RemoteOCRPool)
+
+Register another backend with register_ocr_backend(name, module, class); like the component registry,
+the module is only imported when the backend is used.
+"""
+
+import importlib
+import json
+import os
+from typing import List, Optional
+
+# name -> (module, class)
+_BACKENDS = {
+    'paddle': ('ocr_backends', 'PaddleBackend'),
+    'gemini': ('remote_ocr', 'GeminiBackend'),
+}
+
+
+class OCRBackend:
+    """
+    Base class of the OCR backends.
+    """
+    # Backends that wait on the network: mass conversion sends many pages at once instead of starting OCR processes
+    remote = False
+
+    def __init__(self, pipeline_config: Optional[dict] = None):
+        """
+        :param pipeline_config: PPStructureV3-style settings (backends use what applies to them).
+        """
+        self.pipeline_config = pipeline_config or {}
+
+    def predict(self, input) -> list:
+        """
+        OCR an image path, PDF path or BGR image array.
+
+        :return: One result per page (see the module docstring).
+        """
+        raise NotImplementedError
+
+
+class PaddleBackend(OCRBackend):
+    def __init__(self, pipeline_config: Optional[dict] = None):
+        super().__init__(pipeline_config)
+        # Imported here: only this backend needs Paddle
+        from paddleocr import PPStructureV3
+
+        self.pipeline = PPStructureV3(**self.pipeline_config)
+
+    def predict(self, input) -> list:
+        return self.pipeline.predict(input)
+
+
+class PageResult(dict):
+    """
+    Result of a backend other than PPStructureV3, with the same JSON shape and save methods.
+    """
+    @classmethod
+    def from_blocks(cls, blocks: List[dict], input_path: Optional[str] = None,
+                    model_settings: Optional[dict] = None) -> 'PageResult':
+        """
+        :param blocks: Blocks in reading order: {'block_label', 'block_content', 'block_bbox'}
+                       (block_id and block_order are filled in).
+        """
+        parsing_res_list = []
+        for order, block in enumerate(blocks, start=1):
+            parsing_res_list.append(dict(block, block_id=order - 1, block_order=order))
+        return cls(input_path=input_path, page_index=None, model_settings=model_settings or {},
+                   parsing_res_list=parsing_res_list)
+
+    def _path(self, save_path: str, suffix: str) -> str:
+        if save_path.endswith(suffix):
+            return save_path
+        stem = os.path.splitext(os.path.basename(self.get('input_path') or 'page'))[0]
+        if self.get('page_index') is not None:
+            stem = f"{stem}_{self['page_index']}"
+        return os.path.join(save_path, f"{stem}{'_res' if suffix == '.json' else ''}{suffix}")
+
+    def save_to_json(self, save_path: str):
+        path = self._path(save_path, '.json')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self, f, ensure_ascii=False, indent=4)
+
+    def save_to_markdown(self, save_path: str):
+        path = self._path(save_path, '.md')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n\n".join(block['block_content'] for block in self['parsing_res_list']
+                                if block['block_label'] != 'image'))
+
+
+def register_ocr_backend(name: str, module: str, attribute: str):
+    """
+    Register (or replace) an OCR backend.
+
+    :param name: Backend name (Config.OCR_BACKEND, --ocr_backend).
+    :param module: Module to import when the backend is first used.
+    :param attribute: OCRBackend subclass in that module.
+    """
+    _BACKENDS[name] = (module, attribute)
+
+
+def ocr_backend_names() -> List[str]:
+    return sorted(_BACKENDS)
+
+
+def ocr_backend_class(name: str):
+    if name not in _BACKENDS:
+        raise KeyError(f"Unknown OCR backend '{name}' (registered: {', '.join(ocr_backend_names())}).")
+    module, attribute = _BACKENDS[name]
+    return getattr(importlib.import_module(module), attribute)
+
+
+def is_remote_backend(name: str) -> bool:
+    return ocr_backend_class(name).remote
+
+
+def create_ocr_backend(name: str, pipeline_config: Optional[dict] = None) -> OCRBackend:
+    return ocr_backend_class(name)(pipeline_config)
@@ -1,5 +1,3 @@
-from paddleocr import PPStructureV3
-
 # PPStructureV3 pipeline parameters:
 # ==============================================================================
 # INPUT & OUTPUT
@@ -118,6 +116,11 @@ from paddleocr import PPStructureV3
 # paddlex_config: (str) Path to PaddleX pipeline config file.
 
 from config import Config
+from ocr_backends import create_ocr_backend
+from output_folder import OutputPageFolder
+from profiles import build_pipeline_config, resolve_device
+from result_store import convert_page_result
+from utils.tracing import span
 
 class OCREngine:
     
@@ -128,16 +131,26 @@ class OCREngine:
     #    'layout_detection_model_name': 'lp://PubLayNet/ppyolov2_r50vd_dcn_365e_publaynet',
     # }
     # config is a dict
-    def __init__(self, pipeline_config = Config.PIPELINE_DEFAULT_CONFIG):
+    def __init__(self, pipeline_config = None, backend = None):
         """
-        Initialize the OCR engine (PPStructureV3 pipeline specifically) with the provided pipeline configuration.
+        Initialize the OCR engine (PPStructureV3 pipeline by default) with the provided pipeline configuration.
         
-        :param pipeline_config: Configuration dictionary for the OCR engine.
+        :param pipeline_config: Configuration dictionary for the OCR engine
+                                (default: the Config.PROFILE profile for the detected device).
+        :param backend: OCR backend name (default: Config.OCR_BACKEND, see ocr_backends.py).
         """
+        if pipeline_config is None:
+            pipeline_config = build_pipeline_config()
+        else:
+            pipeline_config = dict(pipeline_config)
+            pipeline_config['device'] = resolve_device(pipeline_config.get('device'))
         self.pipeline_config = pipeline_config
+        self.device = pipeline_config['device']
+        
+        self.backend = backend or Config.OCR_BACKEND
         
-        # Load PPStructureV3 pipeline
-        self.ocr_pipeline = PPStructureV3(**pipeline_config)
+        # Load the backend's pipeline (PPStructureV3 for 'paddle')
+        self.ocr_pipeline = create_ocr_backend(self.backend, pipeline_config)
 
     def predict(self, input_path, save_path=None):
         """
@@ -147,10 +160,79 @@ class OCREngine:
         :param save_path: Optional path to save the results.
         :return: OCR results.
         """
-        results = self.ocr_pipeline.predict(input_path)
+        with span("ocr.predict"):
+            results = self.ocr_pipeline.predict(input_path)
 
         if save_path:
+            with span("ocr.save"):
+                for res in results:
+                    # <input stem>_res.json is what text correction and DOCX building read
+                    res.save_to_json(save_path=save_path)
+                    res.save_to_markdown(save_path=save_path)
+        return results
+
+    def predict_array(self, image, output_folder: OutputPageFolder):
+        """
+        Perform OCR prediction on an in-memory image (BGR numpy array) and save the results
+        under the page folder's names (an array has no file name to derive them from).
+
+        :param image: BGR image array.
+        :param output_folder: OutputPageFolder of the page.
+        :return: OCR results.
+        """
+        with span("ocr.predict", height=image.shape[0], width=image.shape[1]):
+            results = list(self.ocr_pipeline.predict(image))
+        with span("ocr.save"):
             for res in results:
-                res.save_to_markdown(save_path=save_path)
+                res.save_to_json(save_path=output_folder.res_json_path)
+                res.save_to_markdown(save_path=output_folder.md_path)
+            # PPStructureV3 writes JSON; store it in Config.RESULT_FORMAT
+            convert_page_result(output_folder.res_json_path)
         return results
 
+    def predict_page(self, input_path, output_folder: OutputPageFolder, page=None):
+        """
+        OCR one page image into its page folder.
+        With Config.USE_PREPROCESSING the image is decoded once (image_preprocess) and the array is fed
+        to the pipeline; the decoded page is returned so later steps (e.g. cropping) can reuse it.
+
+        :param input_path: Path to the input image.
+        :param output_folder: OutputPageFolder of the page.
+        :param page: Already decoded PreprocessedPage of input_path (decoded here if None).
+        :return: PreprocessedPage, or None when preprocessing is off / the input is not an image.
+        """
+        from image_preprocess import is_image, preprocess_image, record_transform
+
+        if page is None and not (Config.USE_PREPROCESSING and is_image(input_path)):
+            self.predict(input_path, save_path=output_folder.page_output_dir)
+            convert_page_result(output_folder.res_json_path)
+            return None
+
+        if page is None:
+            with span("decode"):
+                page = preprocess_image(input_path)
+        self.predict_array(page.image, output_folder)
+        record_transform(output_folder.res_json_path, page)
+        return page
+
+    def predict_pdf(self, pdf_path, output_base_dir, dpi=Config.PDF_RENDER_DPI):
+        """
+        OCR a PDF one page at a time: each page is rasterized, OCR'd, saved to its own
+        OutputPageFolder (<pdf stem>_p<NNN>) and released before the next one is rendered,
+        so memory stays constant regardless of the PDF's length.
+
+        :param pdf_path: Path to the PDF.
+        :param output_base_dir: Output folder.
+        :param dpi: Rendering resolution.
+        :return: Generator of OutputPageFolder, one per page, yielded as soon as the page is saved.
+        """
+        from pdf_ingest import iter_pdf_pages, pdf_page_number
+
+        for page_index, image in iter_pdf_pages(pdf_path, dpi=dpi):
+            output_folder = OutputPageFolder(base_output_dir=output_base_dir,
+                                             page_number=pdf_page_number(pdf_path, page_index))
+            self.predict_array(image, output_folder)
+            # Drop this page's buffers before the next page is rendered
+            del image
+            yield output_folder
+
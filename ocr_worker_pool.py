@@ -0,0 +1,311 @@
+"""
+OCR Worker Pool Module
+
+Multi-process OCR for CPU-only nodes.
+One PPStructureV3 pipeline works through pages one at a time, so on a many-core node without GPU
+we start N worker processes instead. Each worker:
++ loads its own OCREngine once (on CPU, with a share of the cpu_threads budget)
++ gets one page at a time from the pool
++ writes results to the usual OutputPageFolder layout
++ reports back the page's error (if any), seconds and its own RSS on a result queue
+
+The pool supervises the workers (see supervisor.py for the in-process side):
++ a page running longer than Config.PAGE_TIMEOUT_SECONDS gets its worker killed and restarted
++ a worker that crashes (segfault, OOM kill) is restarted
++ a failed / timed-out page is retried up to Config.PAGE_MAX_RETRIES times, then reported as failed
+  (details in pool.failures)
++ a worker is recycled (stopped and replaced by a fresh process) after Config.WORKER_MAX_PAGES pages
+  or once its RSS passes Config.WORKER_MAX_RSS_MB
+
+Workers use the 'spawn' start method: Paddle is not fork-safe once initialized.
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import time
+import traceback
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import Config
+from output_folder import OutputPageFolder
+from profiles import build_pipeline_config
+
+# Sentinel telling a worker to exit
+_STOP = None
+# How often the pool checks its workers for timeouts and crashes while waiting for results (seconds)
+_POLL_SECONDS = 0.5
+
+
+def split_cpu_threads(num_workers: int, total_threads: int = Config.CPU_THREADS) -> List[int]:
+    """
+    Split the cpu_threads budget between workers as evenly as possible (each worker gets at least 1).
+
+    :param num_workers: Number of worker processes.
+    :param total_threads: Total CPU threads available to OCR.
+    :return: List of per-worker thread counts.
+    """
+    base, extra = divmod(max(total_threads, num_workers), num_workers)
+    return [base + (1 if i < extra else 0) for i in range(num_workers)]
+
+
+def _ocr_worker(worker_id: int, generation: int, cpu_threads: int, pipeline_config: dict, backend: str,
+                task_queue, result_queue):
+    # Limit the BLAS / OpenMP pools as well, otherwise every worker still grabs every core
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(cpu_threads)
+
+    from ocr_engine import OCREngine
+    from supervisor import rss_mb
+
+    config = dict(pipeline_config)
+    config['device'] = 'cpu'
+    config['cpu_threads'] = cpu_threads
+
+    def report(kind: str, **fields):
+        result_queue.put(dict(fields, kind=kind, worker=worker_id, generation=generation, rss_mb=rss_mb()))
+
+    try:
+        ocr_engine = OCREngine(pipeline_config=config, backend=backend)
+    except Exception as e:
+        report('init_failed', error=f"Worker {worker_id} failed to load OCR engine: {e}")
+        return
+    report('ready')
+
+    while True:
+        task = task_queue.get()
+        if task is _STOP:
+            break
+
+        page_number, input_path, output_base_folder, pdf_page_index = task
+        start = time.perf_counter()
+        try:
+            output_folder = OutputPageFolder(base_output_dir=output_base_folder, page_number=page_number)
+            if pdf_page_index is not None:
+                from pdf_ingest import render_pdf_page
+                ocr_engine.predict_array(render_pdf_page(input_path, pdf_page_index), output_folder)
+            else:
+                ocr_engine.predict_page(input_path, output_folder)
+            report('done', page=page_number, error=None, traceback=None, seconds=time.perf_counter() - start)
+        except Exception as e:
+            report('done', page=page_number, error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc(),
+                   seconds=time.perf_counter() - start)
+
+
+class _WorkerHandle:
+    """Pool-side state of one worker process."""
+    def __init__(self, generation: int, process, task_queue):
+        self.generation = generation
+        self.process = process
+        self.task_queue = task_queue
+        self.ready = False
+        self.dead = False       # failed to start: not restarted
+        self.task = None        # (task, failed attempts) being processed
+        self.started = 0.0
+        self.pages = 0
+
+
+class OCRWorkerPool:
+    def __init__(self, num_workers: int,
+                 pipeline_config: dict = None,
+                 backend: Optional[str] = None,
+                 total_cpu_threads: int = Config.CPU_THREADS,
+                 timeout: Optional[float] = Config.PAGE_TIMEOUT_SECONDS,
+                 max_retries: int = Config.PAGE_MAX_RETRIES,
+                 retry_backoff: float = Config.PAGE_RETRY_BACKOFF_SECONDS,
+                 max_pages: Optional[int] = Config.WORKER_MAX_PAGES,
+                 max_rss_mb: Optional[float] = Config.WORKER_MAX_RSS_MB):
+        """
+        Start N OCR worker processes, each with its own OCREngine.
+
+        :param num_workers: Number of worker processes.
+        :param pipeline_config: PPStructureV3 config shared by all workers (device is forced to 'cpu').
+                                Default: the Config.PROFILE profile, resolved here so the workers get the same one.
+        :param backend: OCR backend of the workers (default: Config.OCR_BACKEND, resolved here for the same reason).
+        :param total_cpu_threads: cpu_threads budget split between the workers.
+        :param timeout: Seconds per page before its worker is killed (None: no limit).
+        :param max_retries: Retries of a failed page before it is reported as failed.
+        :param retry_backoff: Pause before the first retry of a page, doubled on each further retry.
+        :param max_pages: Pages per worker process before it is replaced (None: never).
+        :param max_rss_mb: RSS of a worker above which it is replaced (None: never).
+        """
+        self.num_workers = num_workers
+        if pipeline_config is None:
+            pipeline_config = build_pipeline_config(device='cpu')
+        self.pipeline_config = pipeline_config
+        self.backend = backend or Config.OCR_BACKEND
+        self.threads_per_worker = split_cpu_threads(num_workers, total_cpu_threads)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+
+        # Failed attempts per page: {page_number: {'attempts', 'error', 'traceback'}} (kept for failed pages)
+        self.failures: Dict[str, dict] = {}
+        self.restarts = {'timeout': 0, 'crash': 0, 'pages': 0, 'rss': 0}
+
+        self.ctx = mp.get_context("spawn")
+        self.result_queue = self.ctx.Queue()
+        self.workers: List[Optional[_WorkerHandle]] = [None] * num_workers
+        for slot in range(num_workers):
+            self._start_worker(slot)
+
+    def _start_worker(self, slot: int):
+        previous = self.workers[slot]
+        generation = previous.generation + 1 if previous is not None else 0
+        task_queue = self.ctx.Queue()
+        process = self.ctx.Process(target=_ocr_worker,
+                                   args=(slot, generation, self.threads_per_worker[slot], self.pipeline_config,
+                                         self.backend,
+                                         task_queue, self.result_queue),
+                                   name=f"ocr-worker-{slot}", daemon=True)
+        process.start()
+        self.workers[slot] = _WorkerHandle(generation, process, task_queue)
+
+    def _stop_worker(self, slot: int, kill: bool = False):
+        handle = self.workers[slot]
+        if kill:
+            handle.process.terminate()
+        else:
+            handle.task_queue.put(_STOP)
+        handle.process.join(timeout=30)
+        if handle.process.is_alive():
+            handle.process.kill()
+            handle.process.join()
+
+    def _restart_worker(self, slot: int, reason: str, kill: bool = False):
+        self._stop_worker(slot, kill=kill)
+        self.restarts[reason] += 1
+        self._start_worker(slot)
+
+    def _dispatch(self, pending: deque):
+        now = time.perf_counter()
+        for handle in self.workers:
+            if not handle.ready or handle.dead or handle.task is not None:
+                continue
+            # First page whose retry pause is over
+            for i, (task, attempts, not_before) in enumerate(pending):
+                if not_before <= now:
+                    del pending[i]
+                    handle.task_queue.put(task)
+                    handle.task = (task, attempts)
+                    handle.started = now
+                    break
+
+    def _page_failed(self, handle: _WorkerHandle, error: str, traceback_text: Optional[str],
+                     pending: deque) -> bool:
+        """
+        Record a failed attempt of the worker's page and queue a retry.
+
+        :return: True if the page is out of retries.
+        """
+        task, attempts = handle.task
+        handle.task = None
+        attempts += 1
+        self.failures[task[0]] = {'attempts': attempts, 'error': error, 'traceback': traceback_text}
+        if attempts > self.max_retries:
+            return True
+        print(f"Page {task[0]} failed during OCR (attempt {attempts}): {error}; retrying...")
+        pending.append((task, attempts, time.perf_counter() + self.retry_backoff * 2 ** (attempts - 1)))
+        return False
+
+    def map(self, tasks: List[Tuple[str, str, str, Optional[int]]]) -> Iterator[Tuple[str, Optional[str], float]]:
+        """
+        Submit pages and yield results as soon as any worker finishes one (completion order).
+        A page is only reported as failed once it is out of retries.
+
+        :param tasks: List of (page_number, input_path, output_base_folder, pdf_page_index).
+                      pdf_page_index is None for images; for PDF pages the worker renders just that page.
+        :return: Iterator of (page_number, error or None, seconds).
+        """
+        pending = deque((task, 0, 0.0) for task in tasks)
+        remaining = len(tasks)
+        while remaining > 0:
+            self._dispatch(pending)
+            try:
+                message = self.result_queue.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                message = None
+
+            if message is not None:
+                slot = message['worker']
+                handle = self.workers[slot]
+                if message['generation'] != handle.generation:
+                    pass  # from a worker that was killed / replaced since
+                elif message['kind'] == 'ready':
+                    handle.ready = True
+                elif message['kind'] == 'init_failed':
+                    # A worker died while loading; the others keep draining the queue
+                    print(message['error'])
+                    handle.dead = True
+                elif handle.task is not None:
+                    page_number = handle.task[0][0]
+                    handle.pages += 1
+                    if message['error'] is None:
+                        handle.task = None
+                        self.failures.pop(page_number, None)
+                        finished = True
+                    else:
+                        finished = self._page_failed(handle, message['error'], message['traceback'], pending)
+
+                    # Recycle before yielding, so the new worker loads while the caller handles the page
+                    if self.max_pages and handle.pages >= self.max_pages:
+                        self._restart_worker(slot, 'pages')
+                    elif self.max_rss_mb and message['rss_mb'] is not None and message['rss_mb'] >= self.max_rss_mb:
+                        self._restart_worker(slot, 'rss')
+
+                    if finished:
+                        remaining -= 1
+                        yield page_number, message['error'], message['seconds']
+
+            # Timeouts and crashes
+            now = time.perf_counter()
+            for slot, handle in enumerate(self.workers):
+                if handle.dead:
+                    continue
+                if handle.task is not None and self.timeout and now - handle.started > self.timeout:
+                    error = f"PageTimeout: OCR timed out after {self.timeout}s (worker killed)"
+                    page_number = handle.task[0][0]
+                    out_of_retries = self._page_failed(handle, error, None, pending)
+                    self._restart_worker(slot, 'timeout', kill=True)
+                    if out_of_retries:
+                        remaining -= 1
+                        yield page_number, error, now - handle.started
+                elif not handle.process.is_alive():
+                    if not handle.ready:
+                        # Crashed while loading: restarting would crash again
+                        print(f"Worker {slot} exited with code {handle.process.exitcode} while loading the OCR engine.")
+                        handle.dead = True
+                        continue
+                    if handle.task is not None:
+                        error = f"WorkerCrash: OCR worker exited with code {handle.process.exitcode}"
+                        page_number = handle.task[0][0]
+                        if self._page_failed(handle, error, None, pending):
+                            remaining -= 1
+                            yield page_number, error, now - handle.started
+                    self._restart_worker(slot, 'crash')
+
+            if all(handle.dead for handle in self.workers):
+                raise RuntimeError("All OCR workers failed to start.")
+
+    def summary(self) -> str:
+        return (f"OCR worker restarts: {self.restarts['timeout']} after a timeout, {self.restarts['crash']} after a crash, "
+                f"{self.restarts['pages']} at the page limit, {self.restarts['rss']} at the RSS limit")
+
+    def close(self):
+        for handle in self.workers:
+            if handle.process.is_alive():
+                handle.task_queue.put(_STOP)
+        for handle in self.workers:
+            handle.process.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            for handle in self.workers:
+                handle.process.terminate()
+        self.close()
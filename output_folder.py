@@ -0,0 +1,29 @@
+import os
+
+# Class for output folder management
+# Structure:
+# output/[page_number]/[page_number]/
+# - imgs/
+# - [page_number]_res.json
+# - [page_number]_improved.json
+# - [page_number]_result.docx
+# - [page_number].md (ignore for now)
+
+class OutputPageFolder:
+
+    def __init__(self, base_output_dir: str, page_number: str):
+        self.base_output_dir = base_output_dir
+        self.page_number = page_number
+        self.page_output_dir = os.path.join(base_output_dir, page_number)
+
+        self.imgs_dir = os.path.join(self.page_output_dir, "imgs")
+        self.res_json_path = os.path.join(self.page_output_dir, f"{page_number}_res.json")
+        self.improved_json_path = os.path.join(self.page_output_dir, f"{page_number}_improved.json")
+        self.docx_path = os.path.join(self.page_output_dir, f"{page_number}_result.docx")
+        self.md_path = os.path.join(self.page_output_dir, f"{page_number}.md")
+
+        self._create_dirs()
+
+    def _create_dirs(self):
+        os.makedirs(self.imgs_dir, exist_ok=True)
+        os.makedirs(self.page_output_dir, exist_ok=True)
@@ -0,0 +1,254 @@
+"""
+Page Index Module
+
+Content index in front of OCREngine.predict so duplicate pages skip OCR.
+Input folders often contain re-scans and duplicate pages under different page numbers;
+each entry maps the content of an already-processed image to its page output folder:
++ exact hash: sha256 of the file bytes (byte-identical copies)
++ perceptual hash: 64-bit dHash of the grayscale image (re-scans, re-encodes, small shifts), only used with
+  Config.PAGE_INDEX_NEAR_DUPLICATES. 64 bits cannot tell apart text pages with the same layout, so a near match
+  is only a candidate: it is cloned only if the 1024-bit dHash of both images (32x32, stored with each entry) is
+  within Config.PAGE_INDEX_VERIFY_MAX_DISTANCE too
+Entries are scoped to the pipeline config, so a page OCR'd with different settings is never reused.
+Each entry also records the mtime of the page result it points to: once that page is OCR'd again (e.g. its input
+was replaced by another scan) the entry no longer matches its result and is ignored; add() drops it right away.
+
+When a new page matches, its `_res.json`, `.md` and `imgs/` are cloned (hard-linked when possible)
+from the matching page instead of running OCR again; the clone records the source page and the match distance.
+The index is persisted as JSON and survives across runs.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from config import Config
+from image_preprocess import preprocess_settings
+from profiles import get_profile
+from output_folder import OutputPageFolder
+from result_store import load_page_result, page_result_path, save_page_result
+
+
+def exact_hash(image_path: str) -> str:
+    """
+    sha256 of the file bytes.
+    """
+    h = hashlib.sha256()
+    with open(image_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+VERIFY_HASH_SIZE = 32
+
+
+def _dhash(gray: Image.Image, hash_size: int) -> int:
+    small = gray.resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(''.join('1' if b else '0' for b in bits), 2)
+
+
+def perceptual_hashes(image_path: str, hash_size: int = 8) -> Tuple[int, int]:
+    """
+    dHash: shrink the grayscale image to (hash_size + 1) x hash_size and compare horizontally adjacent pixels.
+    Robust to re-encoding, small scale changes and brightness shifts.
+
+    :return: (hash_size * hash_size bit hash, VERIFY_HASH_SIZE * VERIFY_HASH_SIZE bit verification hash),
+             from one decode.
+    """
+    with Image.open(image_path) as img:
+        size = max(hash_size, VERIFY_HASH_SIZE) * 16
+        img.draft('L', (size, size))  # fast JPEG downscale on decode
+        gray = img.convert('L')
+    return _dhash(gray, hash_size), _dhash(gray, VERIFY_HASH_SIZE)
+
+
+def config_scope(pipeline_config: dict) -> str:
+    """
+    Short stable id of a pipeline config; index entries are only reused within the same scope.
+    """
+    payload = json.dumps(pipeline_config, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _link_or_copy(src: str, dst: str):
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class PageIndex:
+    def __init__(self, index_path: str = Config.PAGE_INDEX_PATH,
+                 pipeline_config: dict = None,
+                 near_duplicates: bool = Config.PAGE_INDEX_NEAR_DUPLICATES,
+                 max_distance: int = Config.PAGE_INDEX_MAX_HAMMING_DISTANCE,
+                 verify_max_distance: float = Config.PAGE_INDEX_VERIFY_MAX_DISTANCE):
+        """
+        :param index_path: JSON file the index is persisted to.
+        :param pipeline_config: OCR pipeline config; defines the scope of the entries
+                                (default: Config.PIPELINE_DEFAULT_CONFIG with the selected profile).
+        :param near_duplicates: Also reuse pages that are not byte-identical (off: exact matches only).
+        :param max_distance: Max Hamming distance between 64-bit perceptual hashes to be a near-duplicate candidate.
+        :param verify_max_distance: Max share of the verification hash bits a candidate may differ in.
+        """
+        self.near_duplicates = near_duplicates
+        self.index_path = index_path
+        # Preprocessing changes the OCR results (and their bbox coordinates) as much as the pipeline config
+        if pipeline_config is None:
+            pipeline_config = dict(Config.PIPELINE_DEFAULT_CONFIG, profile=get_profile())
+        scope_config = dict(pipeline_config)
+        if preprocess_settings() is not None:
+            scope_config['preprocess'] = preprocess_settings()
+        self.scope = config_scope(scope_config)
+        self.max_distance = max_distance
+        self.verify_max_bits = int(verify_max_distance * VERIFY_HASH_SIZE * VERIFY_HASH_SIZE)
+        self._lock = threading.Lock()
+
+        # Run statistics
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+        self.data = {}
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+        # exact_hash -> {"page": ..., "output_base": ..., "phash": ..., "vhash": <hex>, "result_mtime": <ns>}
+        self.entries = self.data.setdefault(self.scope, {})
+
+    def lookup(self, image_path: str) -> Tuple[Optional[dict], dict, Optional[int]]:
+        """
+        Find an already-processed page with the same content.
+
+        :return: (entry or None, hashes of the image (for add()), distance: 0 for an exact match,
+                  else the verification hash distance in bits)
+        """
+        phash, vhash = perceptual_hashes(image_path)
+        hashes = {'ehash': exact_hash(image_path), 'phash': phash, 'vhash': vhash}
+
+        with self._lock:
+            entry = self.entries.get(hashes['ehash'])
+            if entry is not None and self._is_valid(entry):
+                return entry, hashes, 0
+            if not self.near_duplicates:
+                return None, hashes, None
+
+            candidates = sorted((((candidate['phash'] ^ phash).bit_count(), i, candidate)
+                                 for i, candidate in enumerate(self.entries.values())), key=lambda c: c[:2])
+            for distance, _, candidate in candidates:
+                if distance > self.max_distance:
+                    break
+                if 'vhash' not in candidate:
+                    continue  # recorded before verification hashes: can't be verified
+                verify_distance = (int(candidate['vhash'], 16) ^ vhash).bit_count()
+                if verify_distance <= self.verify_max_bits and self._is_valid(candidate):
+                    return candidate, hashes, verify_distance
+            return None, hashes, None
+
+    @staticmethod
+    def _result_mtime(output_base: str, page) -> Optional[int]:
+        path = page_result_path(OutputPageFolder(output_base, page).res_json_path)
+        return os.stat(path).st_mtime_ns if path is not None else None
+
+    def _is_valid(self, entry: dict) -> bool:
+        # The source page outputs may have been deleted or re-OCR'd from other content since the entry was recorded
+        mtime = self._result_mtime(entry['output_base'], entry['page'])
+        return mtime is not None and mtime == entry.get('result_mtime')
+
+    def add(self, hashes: dict, output_folder: OutputPageFolder):
+        """
+        Record a page that was just OCR'd; entries that pointed to the same page (its previous content) are dropped.
+        """
+        page, output_base = output_folder.page_number, output_folder.base_output_dir
+        result_mtime = self._result_mtime(output_base, page)
+        with self._lock:
+            stale = [ehash for ehash, entry in self.entries.items()
+                     if entry['page'] == page and entry['output_base'] == output_base]
+            for ehash in stale:
+                del self.entries[ehash]
+            self.misses += 1
+            if result_mtime is None:
+                return
+            self.entries[hashes['ehash']] = {
+                'page': page,
+                'output_base': output_base,
+                'phash': hashes['phash'],
+                'vhash': f"{hashes['vhash']:x}",
+                'result_mtime': result_mtime,
+            }
+
+    def clone(self, entry: dict, output_folder: OutputPageFolder, input_path: str, distance: int = 0):
+        """
+        Materialize the outputs of the matched page into `output_folder`.
+        `_res.json` is rewritten (its input_path points to the new page, with the source page and match distance);
+        `.md` and `imgs/` are linked.
+        """
+        source = OutputPageFolder(entry['output_base'], entry['page'])
+
+        data = load_page_result(source.res_json_path)
+        data['input_path'] = input_path
+        data['dedup_source_page'] = source.page_number
+        data['dedup_distance'] = distance
+        save_page_result(output_folder.res_json_path, data)
+
+        if os.path.exists(source.md_path):
+            _link_or_copy(source.md_path, output_folder.md_path)
+
+        for filename in os.listdir(source.imgs_dir):
+            _link_or_copy(os.path.join(source.imgs_dir, filename), os.path.join(output_folder.imgs_dir, filename))
+
+        with self._lock:
+            if distance == 0:
+                self.exact_hits += 1
+            else:
+                self.near_hits += 1
+
+    def reuse(self, input_path: str, output_folder: OutputPageFolder) -> Tuple[bool, dict]:
+        """
+        Clone the outputs of a page with the same content into `output_folder`, if there is one.
+
+        :return: (True if cloned, hashes of the image: pass them to add() once the page is OCR'd otherwise)
+        """
+        entry, hashes, distance = self.lookup(input_path)
+        if entry is not None and entry['page'] != output_folder.page_number:
+            self.clone(entry, output_folder, input_path, distance)
+            return True, hashes
+        return False, hashes
+
+    def predict(self, ocr_engine, input_path: str, output_folder: OutputPageFolder, page=None) -> bool:
+        """
+        Drop-in for `ocr_engine.predict_page(input_path, output_folder, page)`:
+        clone the outputs of a matching page if there is one, otherwise run OCR and record the page.
+
+        :return: True if OCR was skipped.
+        """
+        cloned, hashes = self.reuse(input_path, output_folder)
+        if cloned:
+            return True
+
+        ocr_engine.predict_page(input_path, output_folder, page=page)
+        self.add(hashes, output_folder)
+        return False
+
+    def save(self):
+        with self._lock:
+            tmp_path = self.index_path + '.tmp'
+            os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f)
+            os.replace(tmp_path, self.index_path)
+
+    def summary(self) -> str:
+        return (f"Page index: {self.exact_hits} exact hits, {self.near_hits} near-duplicates, "
+                f"{self.misses} misses ({len(self.entries)} pages indexed)")
@@ -0,0 +1,101 @@
+"""
+PDF Ingestion Module
+
+Rasterize a PDF one page at a time, so OCR memory stays constant regardless of the PDF's length.
+Uses pypdfium2 (the PDF backend PaddleX already depends on).
+
+Each page is rendered at a configurable DPI into a BGR numpy array (the layout PPStructureV3 expects),
+yielded to the caller, and its bitmap / page handles are closed as soon as the caller moves on.
+A PDF page gets its own output folder, named by pdf_page_number (e.g. report.pdf -> report_p001, report_p002, ...).
+"""
+
+import os
+import re
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from config import Config
+
+
+def pdf_page_number(pdf_path: str, page_index: int) -> str:
+    """
+    Output page number of a PDF page: <pdf stem>_p<page, 1-based, 3 digits>, e.g. 12_p001.
+    """
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    return f"{stem}_p{page_index + 1:03d}"
+
+
+def pdf_page_folders(output_base_dir: str, stem: str) -> List[str]:
+    """
+    Page numbers of the page folders of a PDF (<stem>_p<NNN>) in an output folder, in page order.
+    """
+    pattern = re.compile(rf"{re.escape(stem)}_p(\d+)")
+    if not os.path.isdir(output_base_dir):
+        return []
+    matches = [(int(match.group(1)), name) for name in os.listdir(output_base_dir)
+               if (match := pattern.fullmatch(name)) and os.path.isdir(os.path.join(output_base_dir, name))]
+    return [name for _, name in sorted(matches)]
+
+
+def pdf_page_count(pdf_path: str) -> int:
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def _render(page, dpi: int) -> np.ndarray:
+    bitmap = page.render(scale=dpi / 72)
+    try:
+        # pypdfium2 renders BGR(A) by default; drop alpha if present.
+        # Copy out of the bitmap buffer so the array stays valid after the bitmap is closed.
+        array = bitmap.to_numpy()
+        if array.ndim == 3 and array.shape[2] == 4:
+            array = array[:, :, :3]
+        return np.array(array, copy=True, order='C')
+    finally:
+        bitmap.close()
+
+
+def render_pdf_page(pdf_path: str, page_index: int, dpi: int = Config.PDF_RENDER_DPI) -> np.ndarray:
+    """
+    Render a single page (0-based page_index) to a BGR image array.
+    """
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        page = pdf[page_index]
+        try:
+            return _render(page, dpi)
+        finally:
+            page.close()
+    finally:
+        pdf.close()
+
+
+def iter_pdf_pages(pdf_path: str, dpi: int = Config.PDF_RENDER_DPI) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Yield (page_index, BGR image array) for each page, one page in memory at a time.
+
+    :param pdf_path: Path to the PDF.
+    :param dpi: Rendering resolution.
+    """
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        for page_index in range(len(pdf)):
+            page = pdf[page_index]
+            try:
+                image = _render(page, dpi)
+            finally:
+                page.close()
+            yield page_index, image
+            del image
+    finally:
+        pdf.close()
@@ -0,0 +1,142 @@
+"""
+Profiles Module
+
+Named speed / accuracy profiles for the OCR pipeline and the correction model (Config.PROFILE, --profile):
++ fast:      small layout / detection models, lower detection resolution, only the table module, greedy correction
++ balanced:  default models, table module, no formula / seal / chart / region modules (our scans never have them)
++ accurate:  default models, higher detection resolution, formula and region modules on, wider beam search
++ calibrated: the profile written for this machine by `python main.py --calibrate <sample_folder>` (calibration.py)
+
+Each profile has:
++ 'pipeline':   PPStructureV3 arguments (module toggles, models, text_det_limit_side_len, batch sizes)
++ 'cpu':        PPStructureV3 arguments applied only when running on CPU (enable_mkldnn, cpu_threads)
++ 'correction': ProtonX generation settings (num_beams, ...)
+
+The device is detected (Config.DEVICE = "auto"): GPU when Paddle sees a CUDA device, CPU otherwise.
+"""
+
+import json
+import os
+from typing import Optional
+
+from config import Config
+
+PROFILES = {
+    'fast': {
+        'pipeline': {
+            'layout_detection_model_name': 'PP-DocLayout-S',
+            'text_detection_model_name': 'PP-OCRv5_mobile_det',
+            'text_det_limit_side_len': 736,
+            'text_det_limit_type': 'max',
+            'text_recognition_batch_size': 16,
+            'use_table_recognition': True,
+            'use_formula_recognition': False,
+            'use_seal_recognition': False,
+            'use_chart_recognition': False,
+            'use_region_detection': False,
+        },
+        'cpu': {'enable_mkldnn': True},
+        'correction': {'num_beams': 1},
+    },
+    'balanced': {
+        'pipeline': {
+            'text_det_limit_side_len': 960,
+            'text_det_limit_type': 'max',
+            'text_recognition_batch_size': 8,
+            'use_table_recognition': True,
+            'use_formula_recognition': False,
+            'use_seal_recognition': False,
+            'use_chart_recognition': False,
+            'use_region_detection': False,
+        },
+        'cpu': {'enable_mkldnn': True},
+        'correction': {'num_beams': 3},
+    },
+    'accurate': {
+        'pipeline': {
+            'text_det_limit_side_len': 1280,
+            'text_det_limit_type': 'max',
+            'text_recognition_batch_size': 4,
+            'formula_recognition_batch_size': 1,
+            'use_table_recognition': True,
+            'use_formula_recognition': True,
+            'use_seal_recognition': False,
+            'use_chart_recognition': False,
+            'use_region_detection': True,
+        },
+        'cpu': {'enable_mkldnn': True},
+        'correction': {'num_beams': 4},
+    },
+}
+
+CALIBRATED = 'calibrated'
+
+
+def profile_names():
+    return sorted(PROFILES) + [CALIBRATED]
+
+
+def get_profile(name: Optional[str] = None) -> dict:
+    """
+    Settings of a profile (Config.PROFILE if name is None).
+    """
+    name = name or Config.PROFILE
+    if name == CALIBRATED:
+        if not os.path.exists(Config.CALIBRATED_PROFILE_PATH):
+            raise FileNotFoundError(f"No calibrated profile at {Config.CALIBRATED_PROFILE_PATH} "
+                                    f"(run: python main.py --calibrate <sample_folder>).")
+        with open(Config.CALIBRATED_PROFILE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    if name not in PROFILES:
+        raise ValueError(f"Unknown profile '{name}' (choose from {', '.join(profile_names())}).")
+    return PROFILES[name]
+
+
+def detect_device() -> str:
+    """
+    "gpu" if Paddle is built with CUDA and sees a device, else "cpu".
+    """
+    try:
+        import paddle
+
+        if paddle.device.is_compiled_with_cuda() and paddle.device.cuda.device_count() > 0:
+            return "gpu"
+    except Exception:
+        pass
+    return "cpu"
+
+
+def resolve_device(device: Optional[str]) -> str:
+    return detect_device() if device in (None, "auto") else device
+
+
+def build_pipeline_config(profile: Optional[str] = None, device: Optional[str] = None,
+                          cpu_threads: int = Config.CPU_THREADS) -> dict:
+    """
+    PPStructureV3 arguments for a profile on this machine.
+
+    :param profile: Profile name (Config.PROFILE if None).
+    :param device: "cpu", "gpu", ... (Config.DEVICE if None; "auto" is detected).
+    :param cpu_threads: CPU inference threads (CPU only).
+    """
+    settings = get_profile(profile)
+    config = dict(Config.PIPELINE_DEFAULT_CONFIG)
+    config.update({
+        'use_doc_orientation_classify': Config.USE_DOC_ORIENTATION_CLASSIFY,
+        'use_doc_unwarping': Config.USE_DOC_UNWARPING,
+        'use_textline_orientation': Config.USE_TEXTLINE_ORIENTATION,
+    })
+    config.update(settings.get('pipeline', {}))
+
+    config['device'] = resolve_device(device or config.get('device'))
+    if config['device'] == 'cpu':
+        config.update(settings.get('cpu', {}))
+        config['cpu_threads'] = cpu_threads
+    return config
+
+
+def correction_settings(profile: Optional[str] = None) -> dict:
+    """
+    Generation settings of a profile for the correction model.
+    """
+    return dict(get_profile(profile).get('correction', {}))
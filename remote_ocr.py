@@ -0,0 +1,484 @@
+"""
+Remote OCR Module
+
+OCR offloaded to a multimodal LLM over HTTP (Gemini generateContent), for nodes without a GPU: page throughput
+is bound by the number of requests in flight, not by local cores.
++ asyncio: pages are sent concurrently, at most Config.REMOTE_OCR_MAX_IN_FLIGHT requests at a time
++ token bucket: at most Config.REMOTE_OCR_REQUESTS_PER_MINUTE requests, in bursts of up to Config.REMOTE_OCR_BURST
++ retries: HTTP 408 / 429 / 5xx, timeouts, connection errors and unreadable answers are retried up to
+  Config.REMOTE_OCR_MAX_RETRIES times with exponential backoff and jitter (Retry-After is honoured)
++ batching: up to Config.REMOTE_OCR_BATCH_SIZE pages per request (one image per page); when the answer does not
+  have one entry per page, the pages of the batch are sent again one by one
+
+The model is asked for JSON blocks (label, bbox, content), which become the parsing_res_list of an
+ocr_backends.PageResult, so correction and DOCX building work unchanged.
+HTTP goes through urllib on a thread pool sized to the in-flight limit (no extra dependency).
+The endpoint is configurable (Config.REMOTE_OCR_ENDPOINT), so tests and benchmarks can point it at a local mock
+server (benchmarks/mock_llm_server.py).
+
+Mass conversion uses RemoteOCRPool, which has the same interface as ocr_worker_pool.OCRWorkerPool.
+"""
+
+import asyncio
+import base64
+import io
+import json
+import os
+import queue
+import random
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from config import Config
+from ocr_backends import OCRBackend, PageResult, ocr_backend_class
+from output_folder import OutputPageFolder
+from result_store import convert_page_result
+from utils.tracing import span
+
+PROMPT = """You are an OCR engine for scanned Vietnamese documents. You are given {count} page image(s), in order.
+For each page, list its layout blocks in reading order. Each block is an object with:
+- "label": one of "doc_title", "paragraph_title", "text", "table", "image", "number" (page number)
+- "bbox": [x1, y1, x2, y2], the block's box in coordinates normalized to 0-1000 of the page width / height
+- "content": the text exactly as printed, keeping every diacritic and not fixing spelling; for "table",
+  an HTML <table> with one <td> per cell; for "image", an empty string
+Answer with JSON only: {{"pages": [{{"blocks": [...]}}, ...]}} with exactly {count} entries in "pages"."""
+
+# Labels the model may use for the PPStructureV3 ones
+LABEL_ALIASES = {
+    'title': 'doc_title',
+    'heading': 'paragraph_title',
+    'header': 'paragraph_title',
+    'paragraph': 'text',
+    'list': 'text',
+    'figure': 'image',
+    'page_number': 'number',
+}
+LABELS = ('doc_title', 'paragraph_title', 'text', 'table', 'image', 'number')
+
+
+class RemoteOCRError(Exception):
+    def __init__(self, message: str, status: Optional[int] = None, retryable: bool = False,
+                 retry_after: Optional[float] = None, batch_mismatch: bool = False):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.batch_mismatch = batch_mismatch
+        self.attempts = 1
+
+
+class TokenBucket:
+    """
+    Rate limiter: `rate` requests per second, with up to `capacity` saved up for bursts.
+    A request takes its token right away and sleeps until the token is due, so waiting requests go in order.
+    Thread-safe (several event loops may share the backend).
+    """
+    def __init__(self, rate: Optional[float], capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token; return the seconds until it is available."""
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += wait
+            return wait
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def _strip_fence(text: str) -> str:
+    # Models sometimes wrap JSON in a ```json fence despite the response MIME type
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return text
+
+
+class GeminiBackend(OCRBackend):
+    remote = True
+
+    def __init__(self, pipeline_config: Optional[dict] = None,
+                 api_key: Optional[str] = Config.GEMINI_API_KEY,
+                 model: str = Config.GEMINI_MODEL,
+                 endpoint: str = Config.REMOTE_OCR_ENDPOINT,
+                 max_in_flight: int = Config.REMOTE_OCR_MAX_IN_FLIGHT,
+                 requests_per_minute: Optional[float] = Config.REMOTE_OCR_REQUESTS_PER_MINUTE,
+                 burst: int = Config.REMOTE_OCR_BURST,
+                 batch_size: int = Config.REMOTE_OCR_BATCH_SIZE,
+                 max_retries: int = Config.REMOTE_OCR_MAX_RETRIES,
+                 retry_backoff: float = Config.REMOTE_OCR_RETRY_BACKOFF_SECONDS,
+                 timeout: float = Config.REMOTE_OCR_TIMEOUT_SECONDS):
+        """
+        :param pipeline_config: Unused (PPStructureV3 settings).
+        :param api_key: Gemini API key (GEMINI_API_KEY).
+        :param model: Model name, substituted for {model} in the endpoint.
+        :param endpoint: generateContent URL.
+        :param max_in_flight: Max requests waiting for an answer at a time.
+        :param requests_per_minute: Token bucket rate (None: unlimited).
+        :param burst: Token bucket capacity.
+        :param batch_size: Pages per request.
+        :param max_retries: Retries of a failed request.
+        :param retry_backoff: Pause before the first retry, doubled on each further retry (with jitter).
+        :param timeout: Seconds per HTTP request.
+        """
+        super().__init__(pipeline_config)
+        if not api_key:
+            raise ValueError("The 'gemini' OCR backend needs an API key: set the GEMINI_API_KEY environment variable.")
+        self.api_key = api_key
+        self.model = model
+        self.url = endpoint.format(model=model)
+        self.max_in_flight = max(1, max_in_flight)
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+        self.bucket = TokenBucket(requests_per_minute / 60 if requests_per_minute else None, burst)
+        # Blocking HTTP calls run here; its size also caps the requests in flight across event loops
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="remote-ocr")
+
+        self.requests = 0
+        self.retries = 0
+        self.pages = 0
+        self.in_flight = 0
+        self.max_in_flight_seen = 0
+        self._stats_lock = threading.Lock()
+
+    # Pages
+
+    @staticmethod
+    def encode_page(image: Union[str, np.ndarray], input_path: Optional[str] = None,
+                    page_index: Optional[int] = None) -> dict:
+        """
+        Encode one page for a request.
+
+        :param image: Image path or BGR array.
+        :return: {'data' (base64), 'mime', 'width', 'height', 'input_path', 'page_index'}
+        """
+        if isinstance(image, str):
+            input_path = input_path or image
+            with Image.open(image) as img:
+                width, height = img.size
+                if img.format in ('JPEG', 'PNG'):
+                    # Sent as is: no re-encoding loss
+                    with open(image, 'rb') as f:
+                        data = f.read()
+                    mime = f"image/{img.format.lower()}"
+                else:
+                    data, mime = _to_jpeg(img.convert('RGB')), "image/jpeg"
+        else:
+            height, width = image.shape[:2]
+            data, mime = _to_jpeg(Image.fromarray(np.ascontiguousarray(image[:, :, ::-1]))), "image/jpeg"
+        return {'data': base64.b64encode(data).decode('ascii'), 'mime': mime, 'width': width, 'height': height,
+                'input_path': input_path, 'page_index': page_index}
+
+    def _encode_input(self, input) -> List[dict]:
+        if isinstance(input, str) and input.lower().endswith('.pdf'):
+            from pdf_ingest import iter_pdf_pages
+            return [self.encode_page(image, input, page_index) for page_index, image in iter_pdf_pages(input)]
+        return [self.encode_page(input)]
+
+    # HTTP
+
+    def _request_body(self, pages: List[dict]) -> bytes:
+        parts = [{'text': PROMPT.format(count=len(pages))}]
+        for page in pages:
+            parts.append({'inline_data': {'mime_type': page['mime'], 'data': page['data']}})
+        body = {
+            'contents': [{'role': 'user', 'parts': parts}],
+            'generationConfig': {'responseMimeType': 'application/json', 'temperature': 0},
+        }
+        return json.dumps(body).encode('utf-8')
+
+    def _post(self, body: bytes) -> dict:
+        request = urllib.request.Request(self.url, data=body, method='POST',
+                                         headers={'Content-Type': 'application/json', 'x-goog-api-key': self.api_key})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            retry_after = e.headers.get('Retry-After') if e.headers else None
+            try:
+                retry_after = float(retry_after) if retry_after is not None else None
+            except ValueError:
+                retry_after = None
+            detail = e.read()[:200].decode('utf-8', 'replace')
+            raise RemoteOCRError(f"HTTP {e.code}: {detail}", status=e.code,
+                                 retryable=e.code in (408, 429) or e.code >= 500, retry_after=retry_after)
+        except (urllib.error.URLError, OSError) as e:
+            # Connection refused / reset, DNS, timeouts
+            raise RemoteOCRError(f"{type(e).__name__}: {e}", retryable=True)
+        except ValueError as e:
+            raise RemoteOCRError(f"Unreadable response: {e}", retryable=True)
+
+    def _parse(self, response: dict, pages: List[dict]) -> List[PageResult]:
+        try:
+            parts = response['candidates'][0]['content']['parts']
+            payload = json.loads(_strip_fence("".join(part.get('text', '') for part in parts)))
+        except (KeyError, IndexError, TypeError, AttributeError, ValueError) as e:
+            raise RemoteOCRError(f"Unexpected answer ({type(e).__name__}: {e})", retryable=True)
+
+        if isinstance(payload, dict) and 'pages' not in payload and 'blocks' in payload:
+            payload = {'pages': [payload]}
+        entries = payload.get('pages') if isinstance(payload, dict) else payload
+        if not isinstance(entries, list) or len(entries) != len(pages):
+            count = len(entries) if isinstance(entries, list) else 0
+            raise RemoteOCRError(f"Expected {len(pages)} pages in the answer, got {count}", batch_mismatch=True)
+        return [self._to_result(entry, page) for entry, page in zip(entries, pages)]
+
+    def _to_result(self, entry: dict, page: dict) -> PageResult:
+        # A malformed answer is retried like an unreadable one (the model may answer well next time)
+        if not isinstance(entry, dict) or not isinstance(entry.get('blocks', []), list):
+            raise RemoteOCRError(f"Malformed page in the answer: {str(entry)[:200]}", retryable=True)
+        if not all(isinstance(block, dict) for block in entry.get('blocks', [])):
+            raise RemoteOCRError(f"Malformed block in the answer: {str(entry)[:200]}", retryable=True)
+        width, height = page['width'], page['height']
+        blocks = []
+        for block in entry.get('blocks', []):
+            label = str(block.get('label', 'text')).lower()
+            label = LABEL_ALIASES.get(label, label)
+            if label not in LABELS:
+                label = 'text'
+            try:
+                x1, y1, x2, y2 = [float(v) for v in block.get('bbox', [0, 0, 1000, 1000])]
+            except (TypeError, ValueError):  # also a bbox without 4 values
+                x1, y1, x2, y2 = 0, 0, 1000, 1000
+            bbox = [int(round(min(max(x1, 0), 1000) * width / 1000)), int(round(min(max(y1, 0), 1000) * height / 1000)),
+                    int(round(min(max(x2, 0), 1000) * width / 1000)), int(round(min(max(y2, 0), 1000) * height / 1000))]
+            blocks.append({'block_label': label, 'block_content': str(block.get('content') or ''), 'block_bbox': bbox})
+        result = PageResult.from_blocks(blocks, input_path=page['input_path'],
+                                        model_settings={'backend': 'gemini', 'model': self.model})
+        result['page_index'] = page['page_index']
+        return result
+
+    # asyncio
+
+    async def _send(self, pages: List[dict], semaphore: asyncio.Semaphore) -> List[PageResult]:
+        """One request with retries."""
+        body = self._request_body(pages)
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            try:
+                async with semaphore:
+                    with self._stats_lock:
+                        self.requests += 1
+                        self.in_flight += 1
+                        self.max_in_flight_seen = max(self.max_in_flight_seen, self.in_flight)
+                    try:
+                        with span("ocr.remote_request", pages=len(pages), attempt=attempt):
+                            response = await loop.run_in_executor(self._executor, self._post, body)
+                    finally:
+                        with self._stats_lock:
+                            self.in_flight -= 1
+                results = self._parse(response, pages)
+                with self._stats_lock:
+                    self.pages += len(results)
+                return results
+            except RemoteOCRError as e:
+                e.attempts = attempt + 1
+                if not e.retryable or attempt >= self.max_retries:
+                    raise
+                delay = e.retry_after if e.retry_after is not None else \
+                    self.retry_backoff * 2 ** attempt * (0.5 + random.random())
+                attempt += 1
+                with self._stats_lock:
+                    self.retries += 1
+                await asyncio.sleep(delay)
+
+    async def ocr_batch(self, pages: List[dict], semaphore: asyncio.Semaphore) -> List[Union[PageResult, Exception]]:
+        """
+        OCR up to batch_size pages in one request (one by one if the answer does not match the batch).
+
+        :return: Per page, its result or the exception that ended it.
+        """
+        try:
+            return list(await self._send(pages, semaphore))
+        except RemoteOCRError as e:
+            if e.batch_mismatch and len(pages) > 1:
+                with self._stats_lock:
+                    self.retries += 1
+                return [outcome[0] if isinstance(outcome, list) else outcome for outcome in
+                        await asyncio.gather(*(self._send([page], semaphore) for page in pages), return_exceptions=True)]
+            return [e] * len(pages)
+
+    async def ocr_pages(self, pages: List[dict]) -> List[Union[PageResult, Exception]]:
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        batches = [pages[i:i + self.batch_size] for i in range(0, len(pages), self.batch_size)]
+        outcomes = await asyncio.gather(*(self.ocr_batch(batch, semaphore) for batch in batches))
+        return [outcome for batch in outcomes for outcome in batch]
+
+    def predict(self, input) -> List[PageResult]:
+        outcomes = asyncio.run(self.ocr_pages(self._encode_input(input)))
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                raise outcome
+        return outcomes
+
+    def summary(self) -> str:
+        return (f"Remote OCR ({self.model}): {self.pages} pages in {self.requests} requests, {self.retries} retries, "
+                f"max {self.max_in_flight_seen} in flight, {self.bucket.waited:.1f}s waiting on the rate limit")
+
+
+def _to_jpeg(img: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=Config.REMOTE_OCR_JPEG_QUALITY)
+    return buffer.getvalue()
+
+
+class RemoteOCRPool:
+    """
+    OCR of many pages through a remote backend, with the interface of ocr_worker_pool.OCRWorkerPool
+    (map / failures / summary / context manager). Pages are read and encoded on a small thread pool,
+    sent from one event loop with up to max_in_flight requests at a time, and saved to their page folders
+    as soon as their answer arrives. At most 2 x max_in_flight pages are held in memory.
+    """
+    def __init__(self, max_in_flight: int = Config.REMOTE_OCR_MAX_IN_FLIGHT,
+                 backend: Optional[OCRBackend] = None):
+        """
+        :param max_in_flight: Requests in flight (used to build the backend if none is given).
+        :param backend: Remote backend (default: Config.OCR_BACKEND).
+        """
+        self.backend = backend if backend is not None else ocr_backend_class(Config.OCR_BACKEND)(max_in_flight=max_in_flight)
+        self.max_in_flight = self.backend.max_in_flight
+        # Failed pages: {page_number: {'attempts', 'error', 'traceback'}}
+        self.failures: Dict[str, dict] = {}
+        self._io_executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="remote-ocr-io")
+
+    def _prepare(self, task: Tuple[str, str, str, Optional[int]]) -> dict:
+        from image_preprocess import is_image, preprocess_image
+
+        page_number, input_path, output_base_folder, pdf_page_index = task
+        preprocessed = None
+        if pdf_page_index is not None:
+            from pdf_ingest import render_pdf_page
+            page = self.backend.encode_page(render_pdf_page(input_path, pdf_page_index), input_path, pdf_page_index)
+        elif Config.USE_PREPROCESSING and is_image(input_path):
+            # Same input as the local engine gets (OCREngine.predict_page), so the crop step lines up
+            preprocessed = preprocess_image(input_path)
+            page = self.backend.encode_page(preprocessed.image, input_path)
+        else:
+            page = self.backend.encode_page(input_path)
+        return {'page': page, 'preprocessed': preprocessed,
+                'output_folder': OutputPageFolder(base_output_dir=output_base_folder, page_number=page_number)}
+
+    @staticmethod
+    def _save(prepared: dict, result: PageResult):
+        from image_preprocess import record_transform
+
+        output_folder = prepared['output_folder']
+        result.save_to_json(save_path=output_folder.res_json_path)
+        result.save_to_markdown(save_path=output_folder.md_path)
+        convert_page_result(output_folder.res_json_path)
+        if prepared['preprocessed'] is not None:
+            record_transform(output_folder.res_json_path, prepared['preprocessed'])
+
+    def _failed(self, page_number: str, error: BaseException) -> str:
+        message = f"{type(error).__name__}: {error}"
+        self.failures[page_number] = {
+            'attempts': getattr(error, 'attempts', 1),
+            'error': message,
+            'traceback': "".join(traceback.format_exception(type(error), error, error.__traceback__)),
+        }
+        return message
+
+    async def _run(self, tasks: list, results: queue.Queue):
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        window = asyncio.Semaphore(2 * self.max_in_flight)  # bounds the pages decoded and waiting
+
+        async def handle(batch: list):
+            async with window:
+                start = time.perf_counter()
+                pending = {task[0] for task in batch}  # pages of the batch not reported yet
+
+                def report(page_number: str, error: Optional[BaseException] = None):
+                    pending.discard(page_number)
+                    message = None if error is None else self._failed(page_number, error)
+                    results.put((page_number, message, time.perf_counter() - start))
+
+                try:
+                    ready = []
+                    for task, prepared in zip(batch, await asyncio.gather(
+                            *(loop.run_in_executor(self._io_executor, self._prepare, task) for task in batch),
+                            return_exceptions=True)):
+                        if isinstance(prepared, Exception):
+                            report(task[0], prepared)
+                        else:
+                            ready.append((task, prepared))
+                    if not ready:
+                        return
+                    outcomes = await self.backend.ocr_batch([prepared['page'] for _, prepared in ready], semaphore)
+                    for (task, prepared), outcome in zip(ready, outcomes):
+                        if not isinstance(outcome, Exception):
+                            try:
+                                await loop.run_in_executor(self._io_executor, self._save, prepared, outcome)
+                            except Exception as e:
+                                outcome = e
+                        report(task[0], outcome if isinstance(outcome, Exception) else None)
+                except Exception as e:
+                    # Anything unexpected fails the pages of this batch (dead-letter list), not the whole run
+                    for page_number in sorted(pending):
+                        report(page_number, e)
+
+        batch_size = self.backend.batch_size
+        await asyncio.gather(*(handle(tasks[i:i + batch_size]) for i in range(0, len(tasks), batch_size)))
+
+    def map(self, tasks: List[Tuple[str, str, str, Optional[int]]]) -> Iterator[Tuple[str, Optional[str], float]]:
+        """
+        OCR the pages and yield results as they arrive (completion order); retries happen inside the backend.
+
+        :param tasks: List of (page_number, input_path, output_base_folder, pdf_page_index).
+        :return: Iterator of (page_number, error or None, seconds from reading the page to saving its result).
+        """
+        results = queue.Queue()
+
+        def run():
+            try:
+                asyncio.run(self._run(tasks, results))
+            except BaseException as e:  # surfaced in the caller's thread
+                results.put(e)
+
+        thread = threading.Thread(target=run, name="remote-ocr-loop", daemon=True)
+        thread.start()
+        for _ in range(len(tasks)):
+            item = results.get()
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+        thread.join()
+
+    def summary(self) -> str:
+        return self.backend.summary()
+
+    def close(self):
+        self._io_executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,416 @@
+"""
+Result Store Module
+
+Compact binary format for the per-page OCR results (`<page>_res.ocrb` / `<page>_improved.ocrb`),
+an alternative to the pretty-printed `_res.json` / `_improved.json` (Config.RESULT_FORMAT = "binary").
+
+The JSON tree is split into:
++ typed arrays: rectangular lists of numbers that are all ints or all floats (dt_polys, rec_polys, rec_boxes,
+  rec_scores, block_bbox columns, ...), stored as int16 / int32 / int64 / float32 / float64 (the smallest lossless
+  type); mixed int / float lists and ints beyond int64 stay in the skeleton, so every value reads back unchanged
++ string tables: lists of strings (rec_texts, block contents, ...) as one UTF-8 blob plus uint32 offsets
++ block tables: lists of dicts with the same keys (parsing_res_list, layout boxes, ...) stored column by column
++ a small JSON skeleton for everything else (settings, scalars), with references to the sections above
+
+File layout:
+    b"OCRB" | uint16 version | uint32 header length | header JSON {"skeleton", "sections"} | padding | sections
+Every section starts on an 8-byte boundary and is decoded only when its field is accessed (large files are
+memory-mapped), so reading `parsing_res_list` never touches the OCR geometry.
+
+Readers go through load_page_result / save_page_result with the usual `_res.json` path: the binary file next to it
+is used when present (the newer of the two if both exist), so JSON and binary page folders can be mixed.
+
+Usage:
+    with ResultFile("output/483/483_res.ocrb") as result:
+        blocks = result.get('parsing_res_list')         # only the block table sections are decoded
+        boxes = result.array('overall_ocr_res.rec_boxes')  # zero-copy numpy view (N, 4)
+    json_to_store("output/483/483_res.json")           # -> output/483/483_res.ocrb
+    store_to_json("output/483/483_res.ocrb")           # -> output/483/483_res.json
+"""
+
+import json
+import mmap
+import os
+import struct
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from config import Config
+
+MAGIC = b"OCRB"
+VERSION = 1
+STORE_EXT = ".ocrb"
+_PREFIX = struct.Struct("<4sHI")  # magic, version, header length
+_ALIGN = 8
+
+# Smaller files are read in one call: mapping a ~15 KB page costs more than reading it
+MMAP_MIN_BYTES = 1024 * 1024
+# Shorter lists stay in the JSON skeleton (a section header would cost more than it saves)
+MIN_SECTION_ITEMS = 4
+# Skeleton markers
+_SECTION, _TABLE, _DICT = "$s", "$t", "$d"
+
+
+def _align(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _int_dtype(array: np.ndarray):
+    if array.size == 0:
+        return np.int32
+    low, high = int(array.min()), int(array.max())
+    for dtype in (np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return np.int64
+
+
+def _number_type(value: list) -> Optional[type]:
+    """int or float if every item of the nested list is a number of that one type, else None."""
+    number_type = None
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(item)
+            continue
+        if isinstance(item, (bool, np.bool_)) or not isinstance(item, (int, float, np.integer, np.floating)):
+            return None
+        item_type = int if isinstance(item, (int, np.integer)) else float
+        if number_type is None:
+            number_type = item_type
+        elif item_type is not number_type:
+            return None  # e.g. [1, 2, 3.5]: an array would read back as all floats
+    return number_type
+
+
+def _numeric_array(value: list) -> Optional[np.ndarray]:
+    """
+    Typed array for a rectangular list of numbers that are all ints (within int64) or all floats, else None:
+    anything else stays in the skeleton, so it reads back with the same Python types.
+    """
+    number_type = _number_type(value)
+    if number_type is None:
+        return None
+    try:
+        array = np.array(value, dtype=np.int64 if number_type is int else np.float64)
+    except (ValueError, OverflowError):
+        return None  # ragged, or ints beyond int64
+    if array.dtype.kind == 'i':
+        return array.astype(_int_dtype(array), copy=False)
+    if array.dtype.kind == 'f':
+        single = array.astype(np.float32)
+        # float32 only when it round-trips exactly (Paddle outputs mostly are float32 values)
+        return single if np.array_equal(single, array) else array.astype(np.float64, copy=False)
+    return None
+
+
+def _is_string_list(value: list) -> bool:
+    return all(isinstance(item, str) for item in value)
+
+
+def _table_keys(value: list) -> Optional[List[str]]:
+    """All keys (in first-seen order) of a list of dicts, else None."""
+    if not all(isinstance(item, dict) for item in value):
+        return None
+    return list(dict.fromkeys(key for item in value for key in item))
+
+
+class _Encoder:
+    def __init__(self):
+        self.sections = []  # (kind, dtype, shape, bytes)
+        self._index = {}    # identical sections are stored once (dt_polys and rec_polys usually are)
+
+    def _add(self, kind: str, dtype: str, shape, payload: bytes) -> dict:
+        key = (kind, dtype, tuple(shape), payload)
+        if key not in self._index:
+            self.sections.append((kind, dtype, list(shape), payload))
+            self._index[key] = len(self.sections) - 1
+        return {_SECTION: self._index[key]}
+
+    def _strings(self, value: List[str]) -> dict:
+        encoded = [item.encode('utf-8') for item in value]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+        np.cumsum([len(item) for item in encoded], out=offsets[1:])
+        return self._add('str', 'uint32', [len(encoded)], offsets.tobytes() + b"".join(encoded))
+
+    def encode(self, value):
+        if isinstance(value, dict):
+            encoded = {key: self.encode(item) for key, item in value.items()}
+            # A real dict using a marker-like key is wrapped so it can't be mistaken for one
+            if any(key.startswith('$') for key in value):
+                return {_DICT: encoded}
+            return encoded
+
+        if isinstance(value, list) and len(value) >= MIN_SECTION_ITEMS:
+            if _is_string_list(value):
+                return self._strings(value)
+            keys = _table_keys(value)
+            if keys is not None:
+                table = {'n': len(value), 'cols': {}, 'rows': {}}
+                for key in keys:
+                    rows = [i for i, item in enumerate(value) if key in item]
+                    table['cols'][key] = self.encode([value[i][key] for i in rows])
+                    if len(rows) < len(value):
+                        # Key only present in some rows (e.g. 'correction' on gated blocks)
+                        table['rows'][key] = rows
+                return {_TABLE: table}
+            if not any(isinstance(item, (bool, dict, str)) or item is None for item in value):
+                array = _numeric_array(value)
+                if array is not None:
+                    return self._add('array', array.dtype.str, array.shape, np.ascontiguousarray(array).tobytes())
+
+        if isinstance(value, list):
+            return [self.encode(item) for item in value]
+        return value
+
+
+def encode_result(data: dict) -> bytes:
+    """
+    Serialize a result dict (loaded `_res.json`) to the binary format.
+    """
+    encoder = _Encoder()
+    skeleton = encoder.encode(data)
+
+    sections, offset = [], 0
+    for kind, dtype, shape, payload in encoder.sections:
+        sections.append([kind, dtype, shape, offset, len(payload)])
+        offset = _align(offset + len(payload))
+
+    header = json.dumps({'skeleton': skeleton, 'sections': sections}, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    data_start = _align(_PREFIX.size + len(header))
+
+    parts = [_PREFIX.pack(MAGIC, VERSION, len(header)), header, b"\0" * (data_start - _PREFIX.size - len(header))]
+    for _, _, _, payload in encoder.sections:
+        parts.append(payload)
+        parts.append(b"\0" * (_align(len(payload)) - len(payload)))
+    return b"".join(parts)
+
+
+class ResultFile:
+    """
+    Lazy reader of a `.ocrb` file: the header is parsed on open, each section is decoded on access.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size >= MMAP_MIN_BYTES:
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._buffer = f.read()
+        magic, version, header_length = _PREFIX.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a result store file.")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{path}: unsupported result store version {version}.")
+        header = json.loads(self._buffer[_PREFIX.size:_PREFIX.size + header_length].decode('utf-8'))
+        self._skeleton = header['skeleton']
+        if _DICT in self._skeleton:
+            self._skeleton = self._skeleton[_DICT]
+        self._sections = header['sections']
+        self._data_start = _align(_PREFIX.size + header_length)
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            try:
+                self._buffer.close()
+            except BufferError:
+                pass  # arrays returned by array() still use the map; it is released with them
+        self._buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def keys(self):
+        return list(self._skeleton.keys())
+
+    def __contains__(self, key) -> bool:
+        return key in self._skeleton
+
+    def __getitem__(self, key):
+        return self._decode(self._skeleton[key])
+
+    def get(self, key, default=None):
+        return self[key] if key in self._skeleton else default
+
+    def to_dict(self, keys: Optional[Iterable[str]] = None) -> dict:
+        """The whole result (or only `keys`) as plain Python objects, as json.load would return them."""
+        keys = self.keys() if keys is None else [key for key in keys if key in self._skeleton]
+        return {key: self[key] for key in keys}
+
+    def array(self, field: str) -> np.ndarray:
+        """
+        Zero-copy numpy view of an array field, e.g. 'overall_ocr_res.rec_boxes' or 'parsing_res_list.block_bbox'
+        (a column of a block table). The view keeps the memory map alive after close().
+        """
+        node = self._skeleton
+        for part in field.split('.'):
+            if isinstance(node, dict) and _DICT in node:
+                node = node[_DICT]
+            if isinstance(node, dict) and _TABLE in node:
+                node = node[_TABLE]['cols']
+            node = node[part]
+        if not (isinstance(node, dict) and _SECTION in node and self._sections[node[_SECTION]][0] == 'array'):
+            raise KeyError(f"{field} is not stored as an array.")
+        return self._array(node[_SECTION])
+
+    def _view(self, index: int) -> memoryview:
+        _, _, _, offset, length = self._sections[index]
+        start = self._data_start + offset
+        return memoryview(self._buffer)[start:start + length]
+
+    def _array(self, index: int) -> np.ndarray:
+        _, dtype, shape, _, _ = self._sections[index]
+        return np.frombuffer(self._view(index), dtype=np.dtype(dtype)).reshape(shape)
+
+    def _strings(self, index: int) -> List[str]:
+        count = self._sections[index][2][0]
+        view = self._view(index)
+        offsets = np.frombuffer(view, dtype=np.uint32, count=count + 1)
+        blob = bytes(view[(count + 1) * 4:])
+        return [blob[start:end].decode('utf-8') for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+    def _decode(self, node):
+        if isinstance(node, dict):
+            if _SECTION in node:
+                index = node[_SECTION]
+                return self._strings(index) if self._sections[index][0] == 'str' else self._array(index).tolist()
+            if _TABLE in node:
+                table = node[_TABLE]
+                items = [{} for _ in range(table['n'])]
+                for key, column in table['cols'].items():
+                    rows = table['rows'].get(key, range(table['n']))
+                    for i, value in zip(rows, self._decode(column)):
+                        items[i][key] = value
+                return items
+            if _DICT in node:
+                node = node[_DICT]
+            return {key: self._decode(item) for key, item in node.items()}
+        if isinstance(node, list):
+            return [self._decode(item) for item in node]
+        return node
+
+
+def write_result(path: str, data: dict):
+    payload = encode_result(data)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def read_result(path: str, keys: Optional[Iterable[str]] = None) -> dict:
+    with ResultFile(path) as result:
+        return result.to_dict(keys)
+
+
+def store_path_for(json_path: str) -> str:
+    """`<page>_res.json` -> `<page>_res.ocrb`"""
+    return os.path.splitext(json_path)[0] + STORE_EXT
+
+
+def json_to_store(json_path: str, store_path: Optional[str] = None, remove_json: bool = False) -> str:
+    store_path = store_path or store_path_for(json_path)
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    write_result(store_path, data)
+    if remove_json:
+        os.remove(json_path)
+    return store_path
+
+
+def store_to_json(store_path: str, json_path: Optional[str] = None, remove_store: bool = False) -> str:
+    json_path = json_path or os.path.splitext(store_path)[0] + ".json"
+    data = read_result(store_path)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+    if remove_store:
+        os.remove(store_path)
+    return json_path
+
+
+def page_result_path(json_path: str) -> Optional[str]:
+    """The file holding a page result: the binary or the JSON one, the newer if both exist."""
+    store_path = store_path_for(json_path)
+    candidates = [path for path in (store_path, json_path) if os.path.exists(path)]
+    if not candidates:
+        return None
+    return max(candidates, key=os.path.getmtime)
+
+
+def page_result_exists(json_path: str) -> bool:
+    return page_result_path(json_path) is not None
+
+
+def load_page_result(json_path: str, keys: Optional[Iterable[str]] = None) -> dict:
+    """
+    Load a page result by its JSON path (`<page>_res.json` / `<page>_improved.json`) in whichever format it was saved.
+
+    :param keys: Only these top-level fields (binary results decode nothing else).
+    """
+    path = page_result_path(json_path)
+    if path is None:
+        raise FileNotFoundError(f"No such result: {json_path}")
+    if path.endswith(STORE_EXT):
+        return read_result(path, keys)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data if keys is None else {key: data[key] for key in keys if key in data}
+
+
+def save_page_result(json_path: str, data: dict, result_format: str = None):
+    """
+    Save a page result next to `json_path` in Config.RESULT_FORMAT ("json" or "binary");
+    the copy in the other format is removed so readers never pick up a stale one.
+    """
+    result_format = result_format or Config.RESULT_FORMAT
+    store_path = store_path_for(json_path)
+    if result_format == "binary":
+        write_result(store_path, data)
+        stale = json_path
+    elif result_format == "json":
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        stale = store_path
+    else:
+        raise ValueError(f"Unknown result format '{result_format}' (choose from json, binary).")
+    if os.path.exists(stale):
+        os.remove(stale)
+
+
+def convert_page_result(json_path: str, result_format: str = None):
+    """
+    Rewrite a page result in Config.RESULT_FORMAT (no-op if it is already in that format or missing).
+    """
+    result_format = result_format or Config.RESULT_FORMAT
+    path = page_result_path(json_path)
+    if path is None or path.endswith(STORE_EXT) == (result_format == "binary"):
+        return
+    save_page_result(json_path, load_page_result(json_path), result_format)
+
+
+def convert_output_folder(output_base_dir: str, result_format: str) -> int:
+    """
+    Convert the `_res` / `_improved` results of every page folder under output_base_dir.
+
+    :return: Number of files converted.
+    """
+    converted = 0
+    for page_number in sorted(os.listdir(output_base_dir)):
+        page_dir = os.path.join(output_base_dir, page_number)
+        if not os.path.isdir(page_dir):
+            continue
+        for suffix in ("_res.json", "_improved.json"):
+            json_path = os.path.join(page_dir, f"{page_number}{suffix}")
+            path = page_result_path(json_path)
+            if path is not None and path.endswith(STORE_EXT) != (result_format == "binary"):
+                convert_page_result(json_path, result_format)
+                converted += 1
+    return converted
@@ -0,0 +1,297 @@
+"""
+Supervisor Module
+
+Keeps one bad page from ending a mass conversion:
++ each page (or stage, in pipelined mode) is retried up to Config.PAGE_MAX_RETRIES times, with a growing pause
++ each attempt gets Config.PAGE_TIMEOUT_SECONDS; in-process the limit is a SIGALRM timer, so it only applies on the
+  main thread (sequential mode) and only interrupts Python code. With --workers the pool kills the worker instead
+  (see ocr_worker_pool)
++ pages that still fail go to a persistent dead-letter list (Config.DEAD_LETTER_PATH) with the stage, error,
+  traceback and number of attempts; a page that succeeds in a later run is removed from it
++ recycling: after Config.WORKER_MAX_PAGES pages, when the RSS passes Config.WORKER_MAX_RSS_MB, or after a timeout,
+  recycle_due() tells the caller to reload the models (worker processes are restarted by the pool).
+  In-process, a reload does not always give memory back (the allocator keeps freed pages, and the models alone may
+  be over the limit), so the RSS limit only triggers once the RSS also grew by Config.WORKER_RSS_GROWTH_MB since the
+  models were last loaded, and RSS recycling stops for the run if a reload frees less than that
+
+Usage:
+    supervisor = PageSupervisor()
+    for page_number, input_path in pages:
+        supervisor.run(page_number, lambda: convert(input_path), input_path=input_path)
+        if supervisor.recycle_due():
+            reload_models()
+            supervisor.recycled()
+    print(supervisor.summary())
+"""
+
+import json
+import os
+import signal
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from config import Config
+
+
+class PageTimeout(Exception):
+    pass
+
+
+class StageError(Exception):
+    """
+    Failure of one stage of a page; keeps the original error, its traceback and the number of attempts.
+    """
+    def __init__(self, stage: Optional[str], error: BaseException, attempts: int = 1):
+        super().__init__(f"{type(error).__name__}: {error}")
+        self.stage = stage
+        self.error = error
+        self.attempts = attempts
+        self.traceback = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+
+
+def rss_mb() -> Optional[float]:
+    """
+    Current resident set size of this process in MB (None if it can't be read).
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        import sys
+        # No /proc (e.g. macOS): peak RSS is the closest available figure (bytes on macOS, KiB elsewhere)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except (ImportError, OSError):
+        return None
+
+
+@contextmanager
+def time_limit(seconds: Optional[float]):
+    """
+    Raise PageTimeout in the block after `seconds` (no limit off the main thread or without SIGALRM).
+    """
+    if not seconds or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise PageTimeout(f"timed out after {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class DeadLetterList:
+    """
+    Pages that failed after all retries, kept across runs: {page_number: entry}.
+    Saved after every change, so the list survives a crash of the run itself.
+    """
+    def __init__(self, path: str = Config.DEAD_LETTER_PATH):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()  # pipelined stages report from their own threads
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get('pages', {})
+            except (OSError, ValueError):
+                pass
+
+    def add(self, page_number: str, stage: Optional[str], error: str, traceback_text: Optional[str] = None,
+            attempts: int = 1, input_path: Optional[str] = None):
+        with self._lock:
+            self.entries[str(page_number)] = {
+                'page': str(page_number),
+                'input_path': input_path,
+                'stage': stage,
+                'error': error,
+                'traceback': traceback_text,
+                'attempts': attempts,
+                'failed_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+            self._save()
+
+    def remove(self, page_number: str):
+        with self._lock:
+            if self.entries.pop(str(page_number), None) is not None:
+                self._save()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, page_number):
+        return str(page_number) in self.entries
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'pages': self.entries}, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, self.path)
+
+    def summary(self) -> str:
+        if not self.entries:
+            return "Dead-letter list: empty"
+        lines = [f"Dead-letter list: {len(self.entries)} pages ({self.path})"]
+        for entry in self.entries.values():
+            lines.append(f"  page {entry['page']} failed at stage '{entry['stage']}' "
+                         f"after {entry['attempts']} attempts: {entry['error']}")
+        return "\n".join(lines)
+
+
+class PageSupervisor:
+    def __init__(self, max_retries: int = Config.PAGE_MAX_RETRIES,
+                 timeout: Optional[float] = Config.PAGE_TIMEOUT_SECONDS,
+                 retry_backoff: float = Config.PAGE_RETRY_BACKOFF_SECONDS,
+                 max_pages: Optional[int] = Config.WORKER_MAX_PAGES,
+                 max_rss_mb: Optional[float] = Config.WORKER_MAX_RSS_MB,
+                 rss_growth_mb: float = Config.WORKER_RSS_GROWTH_MB,
+                 dead_letter: Optional[DeadLetterList] = None):
+        """
+        :param max_retries: Attempts after the first failure before a page goes to the dead-letter list.
+        :param timeout: Seconds per attempt (None: no limit).
+        :param retry_backoff: Pause before the first retry, doubled on each further retry.
+        :param max_pages: Pages between model reloads (None: never).
+        :param max_rss_mb: RSS that triggers a model reload (None: never).
+        :param rss_growth_mb: Growth of the RSS since the models were loaded needed as well.
+        """
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.retry_backoff = retry_backoff
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.rss_growth_mb = rss_growth_mb
+        self.dead_letter = dead_letter if dead_letter is not None else DeadLetterList()
+
+        self.succeeded = 0
+        self.failed = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.recycles = 0
+        self.pages_since_recycle = 0
+        self._timed_out = False
+        # RSS after the first page since the last reload (models loaded), and at the last RSS-triggered reload
+        self._rss_baseline: Optional[float] = None
+        self._rss_at_recycle: Optional[float] = None
+        self._rss_due = False
+        self._lock = threading.Lock()
+
+    def attempt(self, fn: Callable, page_number: str, stage: Optional[str] = None):
+        """
+        Call fn with retries and the time limit.
+
+        :return: What fn returned.
+        :raises StageError: After the last failed attempt.
+        """
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                with time_limit(self.timeout):
+                    return fn()
+            except Exception as e:
+                if isinstance(e.error if isinstance(e, StageError) else e, PageTimeout):
+                    with self._lock:
+                        self.timeouts += 1
+                        self._timed_out = True  # the models may be left mid-inference: reload them
+                error_stage = e.stage if isinstance(e, StageError) else stage
+                if attempts > self.max_retries:
+                    if isinstance(e, StageError):
+                        e.attempts = attempts
+                        raise
+                    raise StageError(error_stage, e, attempts) from e
+                with self._lock:
+                    self.retries += 1
+                error = e if isinstance(e, StageError) else f"{type(e).__name__}: {e}"
+                print(f"Page {page_number} failed at stage '{error_stage}' (attempt {attempts}): {error}; retrying...")
+                time.sleep(self.retry_backoff * 2 ** (attempts - 1))
+
+    def run(self, page_number: str, fn: Callable, input_path: Optional[str] = None) -> bool:
+        """
+        Run the work of one page under supervision; record the outcome.
+
+        :return: True if the page succeeded, False if it went to the dead-letter list.
+        """
+        try:
+            self.attempt(fn, page_number)
+        except StageError as e:
+            self.page_failed(page_number, e, input_path)
+            return False
+        self.page_succeeded(page_number)
+        return True
+
+    def page_succeeded(self, page_number: str):
+        with self._lock:
+            self.succeeded += 1
+            self.pages_since_recycle += 1
+        self._measure_baseline()
+        self.dead_letter.remove(page_number)
+
+    def page_failed(self, page_number: str, error: BaseException, input_path: Optional[str] = None,
+                    stage: Optional[str] = None):
+        if not isinstance(error, StageError):
+            error = StageError(stage, error)
+        self.record_failure(page_number, error.stage, str(error), error.traceback, error.attempts, input_path)
+
+    def record_failure(self, page_number: str, stage: Optional[str], error: str, traceback_text: Optional[str] = None,
+                       attempts: int = 1, input_path: Optional[str] = None):
+        """Count a failed page and add it to the dead-letter list (e.g. reported by an OCR worker process)."""
+        with self._lock:
+            self.failed += 1
+            self.pages_since_recycle += 1
+        self._measure_baseline()
+        self.dead_letter.add(page_number, stage, error, traceback_text, attempts, input_path)
+
+    def _measure_baseline(self):
+        if not self.max_rss_mb or self._rss_baseline is not None:
+            return
+        rss = rss_mb()
+        with self._lock:
+            self._rss_baseline = rss
+            if rss is not None and self._rss_at_recycle is not None \
+                    and rss > self._rss_at_recycle - self.rss_growth_mb:
+                print(f"Reloading the models did not free memory (RSS {self._rss_at_recycle:.0f} MB before, "
+                      f"{rss:.0f} MB after); no more reloads for RSS in this run.")
+                self.max_rss_mb = None
+            self._rss_at_recycle = None
+
+    def recycle_due(self) -> bool:
+        """True if the models should be reloaded (page count, RSS or a timeout)."""
+        if self._timed_out:
+            return True
+        if self.max_pages and self.pages_since_recycle >= self.max_pages:
+            return True
+        if self.max_rss_mb:
+            rss = rss_mb()
+            if rss is not None and rss >= self.max_rss_mb and \
+                    (self._rss_baseline is None or rss >= self._rss_baseline + self.rss_growth_mb):
+                self._rss_due = True
+                self._rss_at_recycle = rss
+                return True
+        return False
+
+    def recycled(self):
+        with self._lock:
+            self.recycles += 1
+            self.pages_since_recycle = 0
+            self._timed_out = False
+            # Re-measured after the next page, once the models are loaded again
+            self._rss_baseline = None
+            if not self._rss_due:
+                self._rss_at_recycle = None
+            self._rss_due = False
+
+    def summary(self) -> str:
+        return (f"Supervisor: {self.succeeded} pages ok, {self.failed} failed, {self.retries} retries, "
+                f"{self.timeouts} timeouts, {self.recycles} model reloads\n{self.dead_letter.summary()}")
@@ -0,0 +1,163 @@
+"""
+Table Model Module
+
+Structured cell grid for OCR'd table blocks, shared by text correction and the DOCX builder.
+The table HTML from PPStructureV3 is parsed once (with the standard library HTML parser, no soup tree),
+correction edits the cell texts in place, and the grid is saved next to the HTML in `_improved.json`
+under block['block_table'], so `DOCXBuilder.add_table` can use it directly.
+
+block['block_table'] format:
+{
+    "rows": [
+        [{"text": "...", "rowspan": 1, "colspan": 2, "header": false}, ...],
+        ...
+    ]
+}
+"""
+
+from html import escape
+from html.parser import HTMLParser
+from typing import List, Optional
+
+
+class TableCell:
+    __slots__ = ('text', 'rowspan', 'colspan', 'header')
+
+    def __init__(self, text: str = '', rowspan: int = 1, colspan: int = 1, header: bool = False):
+        self.text = text
+        self.rowspan = rowspan
+        self.colspan = colspan
+        self.header = header
+
+    def to_dict(self) -> dict:
+        return {'text': self.text, 'rowspan': self.rowspan, 'colspan': self.colspan, 'header': self.header}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'TableCell':
+        return cls(d.get('text', ''), d.get('rowspan', 1), d.get('colspan', 1), d.get('header', False))
+
+
+def _span(value: Optional[str]) -> int:
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return 1
+
+
+class _TableHTMLParser(HTMLParser):
+    """
+    Collect rows and cells of the first <table> in the HTML.
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows: List[List[TableCell]] = []
+        self._depth = 0          # table nesting depth
+        self._done = False
+        self._cell: Optional[TableCell] = None
+        self._cell_parts: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if self._done:
+            return
+        if tag == 'table':
+            self._depth += 1
+            return
+        if self._depth != 1:
+            return
+        if tag == 'tr':
+            self._close_cell()
+            self.rows.append([])
+        elif tag in ('td', 'th'):
+            self._close_cell()
+            if not self.rows:
+                self.rows.append([])
+            attrs = dict(attrs)
+            self._cell = TableCell(rowspan=_span(attrs.get('rowspan')), colspan=_span(attrs.get('colspan')),
+                                   header=(tag == 'th'))
+            self._cell_parts = []
+        elif tag == 'br' and self._cell is not None:
+            self._cell_parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if self._done:
+            return
+        if tag == 'table':
+            self._depth -= 1
+            if self._depth == 0:
+                self._close_cell()
+                self._done = True
+        elif self._depth == 1 and tag in ('td', 'th', 'tr'):
+            self._close_cell()
+
+    def handle_data(self, data):
+        if self._cell is not None and self._depth == 1:
+            self._cell_parts.append(data)
+
+    def _close_cell(self):
+        if self._cell is not None:
+            self._cell.text = ''.join(self._cell_parts)
+            self.rows[-1].append(self._cell)
+            self._cell = None
+            self._cell_parts = []
+
+
+class TableModel:
+    def __init__(self, rows: Optional[List[List[TableCell]]] = None):
+        self.rows = rows or []
+
+    @classmethod
+    def from_html(cls, table_html: str) -> 'TableModel':
+        parser = _TableHTMLParser()
+        parser.feed(table_html)
+        parser.close()
+        parser._close_cell()
+        return cls([row for row in parser.rows if row])
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'TableModel':
+        return cls([[TableCell.from_dict(cell) for cell in row] for row in d.get('rows', [])])
+
+    @classmethod
+    def from_block(cls, block: dict) -> 'TableModel':
+        """
+        Table model of a table block: the saved grid if there is one, otherwise parsed from the HTML.
+        """
+        if block.get('block_table'):
+            return cls.from_dict(block['block_table'])
+        return cls.from_html(block.get('block_content', ''))
+
+    def to_dict(self) -> dict:
+        return {'rows': [[cell.to_dict() for cell in row] for row in self.rows]}
+
+    def to_html(self) -> str:
+        """
+        HTML in the same shape PPStructureV3 produces (<html><body><table>...).
+        """
+        parts = ['<html><body><table>']
+        for row in self.rows:
+            parts.append('<tr>')
+            for cell in row:
+                tag = 'th' if cell.header else 'td'
+                attrs = ''
+                if cell.rowspan > 1:
+                    attrs += f' rowspan="{cell.rowspan}"'
+                if cell.colspan > 1:
+                    attrs += f' colspan="{cell.colspan}"'
+                parts.append(f'<{tag}{attrs}>{escape(cell.text, quote=False)}</{tag}>')
+            parts.append('</tr>')
+        parts.append('</table></body></html>')
+        return ''.join(parts)
+
+    def cells(self):
+        """Iterate over all cells, row by row."""
+        for row in self.rows:
+            yield from row
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.rows)
+
+    @property
+    def num_cols(self) -> int:
+        """Max columns in a row, counting colspans (same rule as the original add_table)."""
+        return max((sum(cell.colspan for cell in row) for row in self.rows), default=0)
@@ -0,0 +1,70 @@
+"""
+Build manifests (resumable builds): which stages count as up to date.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import build_manifest
+from build_manifest import OCR_BACKEND_SOURCES, STAGE_SOURCES, BuildManifest, stage_versions
+from output_folder import OutputPageFolder
+
+
+def make_page(tmp_path):
+    input_path = str(tmp_path / '1.jpg')
+    with open(input_path, 'wb') as f:
+        f.write(b'scan')
+    output_folder = OutputPageFolder(str(tmp_path / 'output'), '1')
+    return BuildManifest(output_folder, input_path), output_folder
+
+
+def test_stage_sources_exist():
+    for filenames in list(STAGE_SOURCES.values()) + list(OCR_BACKEND_SOURCES.values()):
+        for filename in filenames:
+            assert os.path.exists(os.path.join(ROOT, filename)), filename
+
+
+def test_ocr_version_follows_the_ocr_sources(monkeypatch):
+    for filename in ('ocr_engine.py', 'image_preprocess.py', 'profiles.py', 'ocr_backends.py'):
+        assert filename in STAGE_SOURCES['ocr']
+
+    versions = stage_versions()
+    original = build_manifest._sources_hash
+    monkeypatch.setattr(build_manifest, '_sources_hash',
+                        lambda filenames: original(filenames) + ('x' if 'image_preprocess.py' in filenames else ''))
+    changed = stage_versions()
+    assert changed['ocr'] != versions['ocr']
+    assert changed['correction'] == versions['correction']
+    assert changed['docx'] == versions['docx']
+
+
+def test_recorded_stage_is_fresh_until_its_output_changes(tmp_path):
+    manifest, output_folder = make_page(tmp_path)
+    with open(output_folder.res_json_path, 'w', encoding='utf-8') as f:
+        json.dump({'parsing_res_list': []}, f)
+    manifest.record('ocr', 'v1')
+
+    assert manifest.is_fresh('ocr', 'v1')
+    assert not manifest.is_fresh('ocr', 'v2')
+    with open(output_folder.res_json_path, 'w', encoding='utf-8') as f:
+        json.dump({'parsing_res_list': [{'block_content': 'edited'}]}, f)
+    assert not manifest.is_fresh('ocr', 'v1')
+
+
+def test_stage_without_output_is_never_fresh(tmp_path):
+    manifest, output_folder = make_page(tmp_path)
+    with open(output_folder.res_json_path, 'w', encoding='utf-8') as f:
+        json.dump({'parsing_res_list': []}, f)
+    manifest.record('ocr', 'v1')
+
+    # Correction "finished" without writing _improved.json
+    manifest.record('correction', 'v1')
+    assert 'correction' not in manifest.data['stages']
+    assert not manifest.is_fresh('correction', 'v1')
@@ -0,0 +1,92 @@
+"""
+Segment-level correction cache: hits across instances, size accounting and LRU eviction.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from correction_cache import CorrectionCache, normalize_segment
+
+
+def table_size(cache) -> int:
+    return cache._conn.execute("SELECT COALESCE(SUM(size), 0) FROM corrections").fetchone()[0]
+
+
+def entry_size(text, value) -> int:
+    return len(text.encode('utf-8')) + len(value.encode('utf-8'))
+
+
+def test_normalize_segment():
+    decomposed = 'Nghị định'
+    assert normalize_segment(f'  {decomposed}  \t số  1 \n dòng 2 ') == 'Nghị định số 1 \n dòng 2'
+
+
+def test_hits_survive_reopening_and_depend_on_the_namespace(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = CorrectionCache(path, namespace='model-a')
+    cache.put_many({'nghi dinh': 'nghị định'})
+    cache.close()
+
+    cache = CorrectionCache(path, namespace='model-a')
+    assert cache.get_many(['nghi dinh', 'thong tu']) == {'nghi dinh': 'nghị định'}
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+    other = CorrectionCache(path, namespace='model-b')
+    assert other.get_many(['nghi dinh']) == {}
+    other.close()
+
+
+def test_size_is_tracked_through_inserts_and_replacements(tmp_path):
+    cache = CorrectionCache(str(tmp_path / 'cache.sqlite3'), max_bytes=10 ** 6)
+    cache.put_many({'một': 'một', 'hai': 'hai'})
+    assert cache.size_bytes() == table_size(cache) == entry_size('một', 'một') + entry_size('hai', 'hai')
+
+    # Replacing an entry counts its new size only
+    cache.put_many({'một': 'một trăm'})
+    assert cache.size_bytes() == table_size(cache) == entry_size('một', 'một trăm') + entry_size('hai', 'hai')
+    cache.close()
+
+
+def test_size_of_a_cache_written_before_the_running_total(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE corrections (key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                 " size INTEGER NOT NULL, last_access REAL NOT NULL)")
+    conn.execute("INSERT INTO corrections VALUES ('k1', 'v', 100, 0), ('k2', 'v', 50, 0)")
+    conn.commit()
+    conn.close()
+
+    cache = CorrectionCache(path)
+    assert cache.size_bytes() == 150
+    cache.put_many({'ba': 'ba'})
+    assert cache.size_bytes() == table_size(cache) == 150 + entry_size('ba', 'ba')
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    text_size = entry_size('segment 00', 'value 00')
+    cache = CorrectionCache(str(tmp_path / 'cache.sqlite3'), max_bytes=10 * text_size)
+    for i in range(10):
+        cache.put_many({f'segment {i:02d}': f'value {i:02d}'})
+        time.sleep(0.002)  # distinct access times
+    assert cache.size_bytes() == 10 * text_size
+
+    # Segment 00 is used again, so segment 01 is now the least recently used
+    assert cache.get_many(['segment 00'])
+    time.sleep(0.002)
+    cache.put_many({'segment 10': 'value 10'})
+
+    # Over budget: back to 90% of it, oldest first
+    assert cache.size_bytes() == table_size(cache) <= 0.9 * cache.max_bytes
+    remaining = cache.get_many([f'segment {i:02d}' for i in range(11)])
+    assert 'segment 00' in remaining and 'segment 10' in remaining
+    assert 'segment 01' not in remaining and 'segment 02' not in remaining
+    cache.close()
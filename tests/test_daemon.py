@@ -0,0 +1,111 @@
+"""
+Daemon job manager (--serve): job records, PDF routing and bounded memory, with fake engines (no Paddle / Torch).
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from daemon import JobManager
+from output_folder import OutputPageFolder
+
+
+class FakeOCREngine:
+    def __init__(self, pdf_pages=3):
+        self.pdf_pages = pdf_pages
+        self.calls = []
+
+    def predict_page(self, input_path, output_folder, page=None):
+        self.calls.append(('page', input_path))
+        with open(output_folder.res_json_path, 'w', encoding='utf-8') as f:
+            json.dump({'input_path': input_path}, f)
+
+    def predict_pdf(self, pdf_path, output_base_dir):
+        self.calls.append(('pdf', pdf_path))
+        stem = os.path.splitext(os.path.basename(pdf_path))[0]
+        for i in range(self.pdf_pages):
+            output_folder = OutputPageFolder(output_base_dir, f"{stem}_p{i + 1:03d}")
+            self.predict_page(pdf_path, output_folder)
+            yield output_folder
+
+
+def make_manager(max_concurrency=2, **kwargs) -> JobManager:
+    manager = JobManager(max_concurrency=max_concurrency, **kwargs)
+    manager.engines._engines['ocr_engine'] = FakeOCREngine()
+    return manager
+
+
+def wait(manager, job) -> dict:
+    assert job['done_event'].wait(10)
+    return manager.public(job)
+
+
+def test_pdf_is_ocrd_into_one_folder_per_page(tmp_path):
+    manager = make_manager()
+    try:
+        record = wait(manager, manager.submit('ocr', str(tmp_path / 'book.pdf'), str(tmp_path / 'output')))
+    finally:
+        manager.shutdown()
+
+    assert record['status'] == 'done', record['error']
+    pages = record['result']['pages']
+    assert [page['page_number'] for page in pages] == ['book_p001', 'book_p002', 'book_p003']
+    assert all(os.path.exists(page['res_json_path']) for page in pages)
+    assert not os.path.exists(tmp_path / 'output' / 'book')
+    assert manager.engines.get('ocr_engine').calls[0] == ('pdf', str(tmp_path / 'book.pdf'))
+
+
+def test_image_is_ocrd_into_its_page_folder(tmp_path):
+    manager = make_manager()
+    try:
+        record = wait(manager, manager.submit('ocr', str(tmp_path / '12.jpg'), str(tmp_path / 'output')))
+    finally:
+        manager.shutdown()
+
+    assert record['status'] == 'done', record['error']
+    assert record['result']['page_number'] == '12'
+    assert 'done_event' not in record and 'ocr' in record['timings']
+
+
+def test_finished_jobs_are_dropped_beyond_the_cap(tmp_path):
+    # One job at a time: jobs finish in the order they were submitted
+    manager = make_manager(max_concurrency=1, max_finished=3)
+    try:
+        jobs = [manager.submit('ocr', str(tmp_path / f'{i}.jpg'), str(tmp_path / 'output')) for i in range(10)]
+        for job in jobs:
+            wait(manager, job)
+    finally:
+        manager.shutdown()
+
+    assert manager.counts() == {'queued': 0, 'running': 0, 'done': 10, 'failed': 0}
+    assert len(manager.jobs) == 3
+    assert manager.get(jobs[0]['job_id']) is None
+    assert manager.get(jobs[-1]['job_id']) is not None
+
+
+def test_public_record_is_a_consistent_snapshot(tmp_path):
+    manager = make_manager()
+    job = manager.submit('ocr', str(tmp_path / '1.jpg'), str(tmp_path / 'output'))
+    stop = threading.Event()
+
+    def write_timings():
+        i = 0
+        while not stop.is_set():
+            manager._timed(job, f'step{i % 50}', lambda: None)
+            i += 1
+
+    writer = threading.Thread(target=write_timings)
+    writer.start()
+    try:
+        for _ in range(200):
+            json.dumps(manager.public(job))
+    finally:
+        stop.set()
+        writer.join()
+        manager.shutdown()
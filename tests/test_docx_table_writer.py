@@ -0,0 +1,111 @@
+"""
+One-pass DOCX tables (docx_table_writer.py): grid layout of spanned cells and the generated w:tbl.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+
+from docx_table_writer import append_table, build_tbl_xml, layout_grid
+from table_model import TableModel
+
+SPANNED_HTML = (
+    '<table>'
+    '<tr><td rowspan="3">A</td><td colspan="2">B</td></tr>'
+    '<tr><td>C</td><td>D</td></tr>'
+    '<tr><td>E</td></tr>'
+    '<tr><td>F &amp; G</td></tr>'
+    '</table>'
+)
+
+
+def placements(rows):
+    return [[(col, cell.text, is_continuation) for col, cell, is_continuation in row] for row in rows]
+
+
+def cell_props(tbl):
+    """Per row: (gridSpan, vMerge, text) of every w:tc."""
+    rows = []
+    for tr in tbl.findall(qn('w:tr')):
+        row = []
+        for tc in tr.findall(qn('w:tc')):
+            tc_pr = tc.find(qn('w:tcPr'))
+            grid_span = tc_pr.find(qn('w:gridSpan'))
+            vmerge = tc_pr.find(qn('w:vMerge'))
+            row.append((
+                int(grid_span.get(qn('w:val'))) if grid_span is not None else 1,
+                None if vmerge is None else (vmerge.get(qn('w:val')) or 'continue'),
+                ''.join(t.text for t in tc.iter(qn('w:t'))),
+            ))
+        rows.append(row)
+    return rows
+
+
+def test_layout_places_rowspans_on_the_rows_below():
+    rows, num_cols = layout_grid(TableModel.from_html(SPANNED_HTML))
+    assert num_cols == 3
+    assert placements(rows) == [
+        [(0, 'A', False), (1, 'B', False)],
+        [(0, 'A', True), (1, 'C', False), (2, 'D', False)],
+        [(0, 'A', True), (1, 'E', False)],
+        [(0, 'F & G', False)],
+    ]
+
+
+def test_layout_of_a_rowspan_under_a_colspan():
+    table = TableModel.from_html('<table><tr><td rowspan="2" colspan="2">A</td><td>B</td></tr>'
+                                 '<tr><td>C</td></tr></table>')
+    rows, num_cols = layout_grid(table)
+    assert num_cols == 3
+    assert placements(rows) == [[(0, 'A', False), (2, 'B', False)], [(0, 'A', True), (2, 'C', False)]]
+
+
+def test_tbl_xml_merges_and_pads_cells():
+    tbl = parse_xml(build_tbl_xml(TableModel.from_html(SPANNED_HTML), 'LightList-Accent1', 9000))
+
+    assert tbl.find(qn('w:tblPr')).find(qn('w:tblStyle')).get(qn('w:val')) == 'LightList-Accent1'
+    grid = tbl.find(qn('w:tblGrid')).findall(qn('w:gridCol'))
+    assert [col.get(qn('w:w')) for col in grid] == ['3000'] * 3
+    assert cell_props(tbl) == [
+        [(1, 'restart', 'A'), (2, None, 'B')],
+        [(1, 'continue', ''), (1, None, 'C'), (1, None, 'D')],
+        [(1, 'continue', ''), (1, None, 'E'), (1, None, '')],
+        [(1, None, 'F & G'), (1, None, ''), (1, None, '')],
+    ]
+
+
+def test_header_rows_are_bold():
+    table = TableModel.from_html('<table><tr><th>H</th><td>x</td></tr><tr><td>a</td><td>b</td></tr>'
+                                 '<tr><td>c</td><td>d</td></tr></table>')
+    tbl = parse_xml(build_tbl_xml(table, 'TableGrid', 6000))
+    bold = [[tc.find('.//' + qn('w:b')) is not None for tc in tr.iter(qn('w:tc'))
+             if tc.find('.//' + qn('w:t')) is not None] for tr in tbl.findall(qn('w:tr'))]
+    # th cells, and the second row like the cell-by-cell path
+    assert bold == [[True, False], [True, True], [False, False]]
+
+
+def test_empty_table_builds_nothing():
+    assert build_tbl_xml(TableModel(), 'TableGrid', 9000) == ''
+
+
+def test_appended_table_reads_back_through_python_docx():
+    document = Document()
+    document.add_paragraph('before')
+    append_table(document, TableModel.from_html(SPANNED_HTML))
+
+    [table] = document.tables
+    assert (len(table.rows), len(table.columns)) == (4, 3)
+    # Merged cells resolve to the same cell
+    assert table.cell(0, 1).text == table.cell(0, 2).text == 'B'
+    assert table.cell(2, 0).text == 'A'
+    assert table.cell(3, 0).text == 'F & G'
+    # The section properties stay last in the body
+    assert document.element.body[-1].tag == qn('w:sectPr')
@@ -0,0 +1,111 @@
+"""
+Figure / table crops (image_materializer.py): cropping from the source scan and the bbox-keyed index.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_materializer import INDEX_FILENAME, ImageIndex, bbox_key, find_source_image, materialize_images
+
+RED = (200, 30, 30)
+BLUE = (30, 30, 200)
+
+
+def make_scan(path, size=(300, 200)):
+    """White page with a red figure at (50, 20)-(90, 60) and a blue table at (120, 100)-(280, 180)."""
+    pixels = np.full((size[1], size[0], 3), 255, dtype=np.uint8)
+    pixels[20:60, 50:90] = RED
+    pixels[100:180, 120:280] = BLUE
+    Image.fromarray(pixels).save(path)
+    return path
+
+
+def page_data(*blocks):
+    return {'parsing_res_list': [{'block_label': label, 'block_bbox': bbox} for label, bbox in blocks]}
+
+
+def mean_color(path):
+    with Image.open(path) as img:
+        return tuple(int(round(v)) for v in np.asarray(img.convert('RGB')).reshape(-1, 3).mean(axis=0))
+
+
+def test_blocks_are_cropped_by_bbox(tmp_path):
+    scan = make_scan(str(tmp_path / '1.png'))
+    imgs_dir = str(tmp_path / 'imgs')
+    data = page_data(('image', [50, 20, 90, 60]), ('table', [120.4, 99.6, 280, 180]), ('text', [0, 0, 10, 10]))
+
+    index = materialize_images(data, imgs_dir, scan)
+
+    figure = index.lookup('image', [50, 20, 90, 60])
+    table = index.lookup('table', [120, 100, 280, 180])
+    assert os.path.basename(figure) == 'img_in_image_box_50_20_90_60.jpg'
+    assert os.path.basename(table) == 'img_in_table_box_120_100_280_180.jpg'
+    with Image.open(figure) as img:
+        assert img.size == (40, 40)
+    assert all(abs(a - b) < 8 for a, b in zip(mean_color(figure), RED))
+    assert all(abs(a - b) < 8 for a, b in zip(mean_color(table), BLUE))
+    assert sorted(os.listdir(imgs_dir)) == sorted([INDEX_FILENAME, os.path.basename(figure), os.path.basename(table)])
+
+    with open(os.path.join(imgs_dir, INDEX_FILENAME), encoding='utf-8') as f:
+        assert json.load(f)['image'] == {'50_20_90_60': 'img_in_image_box_50_20_90_60.jpg'}
+
+
+def test_existing_crops_are_reused(tmp_path):
+    scan = make_scan(str(tmp_path / '1.png'))
+    imgs_dir = str(tmp_path / 'imgs')
+    data = page_data(('image', [50, 20, 90, 60]))
+    materialize_images(data, imgs_dir, scan)
+    crop = os.path.join(imgs_dir, 'img_in_image_box_50_20_90_60.jpg')
+    mtime = os.stat(crop).st_mtime_ns
+
+    # Without the source scan the indexed crop is still found
+    os.remove(scan)
+    index = materialize_images(data, imgs_dir, None)
+    assert index.lookup('image', [50, 20, 90, 60]) == crop
+    assert os.stat(crop).st_mtime_ns == mtime
+
+
+def test_crops_saved_by_ocr_are_found_by_their_file_name(tmp_path):
+    imgs_dir = tmp_path / 'imgs'
+    imgs_dir.mkdir()
+    Image.new('RGB', (10, 10)).save(imgs_dir / 'img_in_table_box_1_2_3_4.png')
+
+    index = ImageIndex(str(imgs_dir))
+    assert index.lookup('table', [1, 2, 3, 4]) == str(imgs_dir / 'img_in_table_box_1_2_3_4.png')
+    assert index.lookup('image', [1, 2, 3, 4]) is None
+    assert index.lookup('text', [1, 2, 3, 4]) is None
+
+
+def test_bboxes_outside_the_page_are_clamped_or_skipped(tmp_path):
+    scan = make_scan(str(tmp_path / '1.png'))
+    imgs_dir = str(tmp_path / 'imgs')
+    data = page_data(('image', [-20, -20, 30, 40]), ('image', [400, 10, 500, 50]))
+
+    index = materialize_images(data, imgs_dir, scan)
+    with Image.open(index.lookup('image', [-20, -20, 30, 40])) as img:
+        assert img.size == (30, 40)
+    assert index.lookup('image', [400, 10, 500, 50]) is None
+
+
+def test_find_source_image(tmp_path):
+    input_folder = tmp_path / 'input'
+    input_folder.mkdir()
+    elsewhere = make_scan(str(tmp_path / 'scan.png'))
+    assert find_source_image('1', {'input_path': elsewhere}, str(input_folder)) == elsewhere
+
+    in_input = make_scan(str(input_folder / '1.png'))
+    assert find_source_image('1', {'input_path': elsewhere}, str(input_folder)) == in_input
+    assert find_source_image('2', {}, str(input_folder)) is None
+
+
+def test_bbox_key_rounds_coordinates():
+    assert bbox_key([10.4, 20.6, 30, 40.2]) == '10_21_30_40'
@@ -0,0 +1,100 @@
+"""
+Page decoding and preprocessing (image_preprocess.py): downscale, border trim, and mapping bboxes back
+to the source scan, so crops cut later from the file match the ones cut from the decoded array.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_materializer import materialize_images
+from image_preprocess import border_box, preprocess_image, record_transform, to_grayscale, to_source_bbox
+
+RED = (200, 30, 30)
+
+
+def make_scan(path):
+    """1000 x 800 page: grey scanner border, white content from (100, 80) to (900, 720), a red figure inside."""
+    pixels = np.full((800, 1000, 3), 190, dtype=np.uint8)
+    pixels[80:720, 100:900] = 255
+    pixels[200:400, 300:600] = RED
+    Image.fromarray(pixels).save(path)
+    return path
+
+
+def preprocess(path, **kwargs):
+    settings = dict(max_side=500, grayscale=False, trim_border=True, use_mmap=False)
+    settings.update(kwargs)
+    return preprocess_image(path, **settings)
+
+
+def test_page_is_downscaled_and_trimmed(tmp_path):
+    page = preprocess(make_scan(str(tmp_path / '1.png')))
+
+    # 1000 x 800 -> 500 x 400, then the border is cut (content from (50, 40) to (450, 360), 8 px margin)
+    assert page.source_size == (1000, 800)
+    assert page.scale == (2.0, 2.0)
+    assert page.offset == (42, 32)
+    assert page.image.shape == (336, 416, 3)
+    assert page.image.flags['C_CONTIGUOUS']
+    # BGR, as PPStructureV3 expects: the red figure has its large value in the last channel
+    b, g, r = page.image[100 - 32, 200 - 42]
+    assert r > 150 and b < 80
+
+
+def test_grayscale_through_a_memory_map_keeps_three_channels(tmp_path):
+    page = preprocess(make_scan(str(tmp_path / '1.png')), grayscale=True, trim_border=False, use_mmap=True)
+    assert page.image.shape == (400, 500, 3)
+    assert (page.image[..., 0] == page.image[..., 2]).all()
+    assert page.offset == (0, 0)
+
+
+def test_border_box_of_a_blank_page_is_the_whole_page():
+    assert border_box(np.full((40, 60), 255, dtype=np.uint8)) == (0, 0, 60, 40)
+    assert to_grayscale(np.array([[[255, 255, 255], [0, 0, 0]]], dtype=np.uint8)).tolist() == [[255, 0]]
+
+
+def test_to_source_bbox():
+    transform = {'source_size': [1000, 800], 'scale': [2.0, 2.0], 'offset': [42, 32]}
+    assert to_source_bbox([108, 68, 258, 168], transform) == [300, 200, 600, 400]
+    assert to_source_bbox([1, 2, 3, 4], None) == [1, 2, 3, 4]
+
+
+def test_transform_is_recorded_in_the_page_result(tmp_path):
+    scan = make_scan(str(tmp_path / '1.png'))
+    res_json = str(tmp_path / '1_res.json')
+    with open(res_json, 'w', encoding='utf-8') as f:
+        json.dump({'parsing_res_list': []}, f)
+
+    record_transform(res_json, preprocess(scan))
+    with open(res_json, encoding='utf-8') as f:
+        data = json.load(f)
+    assert data['input_path'] == scan
+    assert data['preprocess'] == {'source_size': [1000, 800], 'scale': [2.0, 2.0], 'offset': [42, 32]}
+
+
+def test_crop_from_the_file_matches_the_crop_from_the_array(tmp_path):
+    scan = make_scan(str(tmp_path / '1.png'))
+    page = preprocess(scan)
+    # The red figure, in preprocessed-array coordinates
+    bbox = [300 / 2 - 42, 200 / 2 - 32, 600 / 2 - 42, 400 / 2 - 32]
+    data = {'parsing_res_list': [{'block_label': 'image', 'block_bbox': bbox}], 'preprocess': page.transform()}
+
+    from_array = materialize_images(data, str(tmp_path / 'from_array'), None, source_page=page)
+    from_file = materialize_images(data, str(tmp_path / 'from_file'), scan)
+
+    with Image.open(from_array.lookup('image', bbox)) as small, Image.open(from_file.lookup('image', bbox)) as full:
+        assert small.size == (150, 100)
+        # Same region of the scan, at source resolution
+        assert full.size == (300, 200)
+        for img in (small, full):
+            color = np.asarray(img.convert('RGB')).reshape(-1, 3).mean(axis=0)
+            assert all(abs(a - b) < 8 for a, b in zip(color, RED))
@@ -0,0 +1,167 @@
+"""
+Multi-process OCR (ocr_worker_pool.py): thread split, retries, and restarting workers after a timeout,
+a crash or the page limit.
+
+The workers are real spawned processes. They import `paddleocr` on their own, so the test puts a small
+stand-in package on sys.path (inherited by spawned processes). What it does with a page depends on the
+page's gray level:
+    GRAY_OK    -> one text block with the worker's pid
+    GRAY_FAIL  -> raises
+    GRAY_FLAKY -> raises on the first attempt only
+    GRAY_HANG  -> sleeps past the page timeout
+    GRAY_CRASH -> exits the worker process
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+import textwrap
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocr_worker_pool import OCRWorkerPool, split_cpu_threads
+from output_folder import OutputPageFolder
+from result_store import load_page_result
+
+GRAY_OK, GRAY_FAIL, GRAY_FLAKY, GRAY_HANG, GRAY_CRASH = 200, 50, 80, 110, 140
+
+FAKE_PADDLEOCR = textwrap.dedent('''
+    import os
+    import sys
+    import time
+
+    import numpy as np
+    from PIL import Image
+
+    from ocr_backends import PageResult
+
+
+    class PPStructureV3:
+        def __init__(self, **kwargs):
+            self.kwargs = kwargs
+
+        def predict(self, input):
+            if isinstance(input, str):
+                with Image.open(input) as img:
+                    input = np.asarray(img.convert('RGB'))
+            gray = int(input[0, 0, 0])
+            if abs(gray - {fail}) < 10:
+                raise ValueError('unreadable page')
+            if abs(gray - {flaky}) < 10:
+                marker = os.path.join(os.path.dirname(__file__), 'flaky_seen')
+                if not os.path.exists(marker):
+                    open(marker, 'w').close()
+                    raise ValueError('first attempt')
+            if abs(gray - {hang}) < 10:
+                time.sleep(60)
+            if abs(gray - {crash}) < 10:
+                sys.stdout.flush()
+                os._exit(3)
+            block = {{'block_label': 'text', 'block_content': str(os.getpid()), 'block_bbox': [0, 0, 10, 10]}}
+            return [PageResult.from_blocks([block])]
+''').format(fail=GRAY_FAIL, flaky=GRAY_FLAKY, hang=GRAY_HANG, crash=GRAY_CRASH)
+
+
+@pytest.fixture
+def fake_paddleocr(tmp_path, monkeypatch):
+    package = tmp_path / 'fake_modules' / 'paddleocr'
+    package.mkdir(parents=True)
+    (package / '__init__.py').write_text(FAKE_PADDLEOCR, encoding='utf-8')
+    monkeypatch.syspath_prepend(str(tmp_path / 'fake_modules'))
+    return package
+
+
+def make_tasks(tmp_path, grays):
+    input_folder = tmp_path / 'input'
+    input_folder.mkdir(exist_ok=True)
+    tasks = []
+    for i, gray in enumerate(grays, start=1):
+        path = str(input_folder / f'{i}.png')
+        Image.fromarray(np.full((40, 60, 3), gray, dtype=np.uint8)).save(path)
+        tasks.append((str(i), path, str(tmp_path / 'output'), None))
+    return tasks
+
+
+def worker_pid(tmp_path, page_number):
+    res_json_path = OutputPageFolder(str(tmp_path / 'output'), page_number).res_json_path
+    return load_page_result(res_json_path)['parsing_res_list'][0]['block_content']
+
+
+def make_pool(**kwargs):
+    settings = dict(num_workers=1, pipeline_config={'device': 'cpu'}, backend='paddle', total_cpu_threads=1,
+                    timeout=None, max_retries=1, retry_backoff=0, max_pages=None, max_rss_mb=None)
+    settings.update(kwargs)
+    return OCRWorkerPool(**settings)
+
+
+def run(pool, tasks):
+    with pool:
+        return {page: error for page, error, _ in pool.map(tasks)}
+
+
+def test_split_cpu_threads():
+    assert split_cpu_threads(3, 8) == [3, 3, 2]
+    assert split_cpu_threads(4, 2) == [1, 1, 1, 1]
+
+
+def test_failed_page_is_retried_then_reported(tmp_path, fake_paddleocr):
+    tasks = make_tasks(tmp_path, [GRAY_OK, GRAY_FLAKY, GRAY_FAIL])
+    pool = make_pool(num_workers=2)
+    results = run(pool, tasks)
+
+    assert results['1'] is None
+    # Succeeded on its retry: not a failure
+    assert results['2'] is None and '2' not in pool.failures
+    assert results['3'] == 'ValueError: unreadable page'
+    assert pool.failures['3']['attempts'] == 2
+    assert 'unreadable page' in pool.failures['3']['traceback']
+    assert worker_pid(tmp_path, '1').isdigit()
+    assert pool.restarts == {'timeout': 0, 'crash': 0, 'pages': 0, 'rss': 0}
+
+
+def test_hanging_page_gets_its_worker_killed(tmp_path, fake_paddleocr):
+    tasks = make_tasks(tmp_path, [GRAY_HANG, GRAY_OK])
+    pool = make_pool(timeout=1, max_retries=0)
+    results = run(pool, tasks)
+
+    assert results['1'].startswith('PageTimeout')
+    # The replacement worker carries on with the next page
+    assert results['2'] is None
+    assert pool.restarts['timeout'] == 1
+
+
+def test_crashed_worker_is_restarted(tmp_path, fake_paddleocr):
+    tasks = make_tasks(tmp_path, [GRAY_CRASH, GRAY_OK])
+    pool = make_pool(max_retries=0)
+    results = run(pool, tasks)
+
+    assert results['1'] == 'WorkerCrash: OCR worker exited with code 3'
+    assert results['2'] is None
+    assert pool.restarts['crash'] == 1
+
+
+def test_worker_is_recycled_at_the_page_limit(tmp_path, fake_paddleocr):
+    tasks = make_tasks(tmp_path, [GRAY_OK] * 3)
+    pool = make_pool(max_pages=2)
+    results = run(pool, tasks)
+
+    assert results == {'1': None, '2': None, '3': None}
+    assert pool.restarts['pages'] == 1
+    assert worker_pid(tmp_path, '1') == worker_pid(tmp_path, '2') != worker_pid(tmp_path, '3')
+
+
+def test_pool_gives_up_when_no_worker_can_start(tmp_path, monkeypatch):
+    # paddleocr does not import: every worker fails to load its engine
+    package = tmp_path / 'broken_modules' / 'paddleocr'
+    package.mkdir(parents=True)
+    (package / '__init__.py').write_text("raise ImportError('no paddle here')\n", encoding='utf-8')
+    monkeypatch.syspath_prepend(str(tmp_path / 'broken_modules'))
+
+    with pytest.raises(RuntimeError, match='failed to start'):
+        run(make_pool(), make_tasks(tmp_path, [GRAY_OK]))
@@ -0,0 +1,90 @@
+"""
+Page index (--dedup): a duplicate page is cloned from the page it matches, and an entry never outlives the content
+of the page it points to.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from output_folder import OutputPageFolder
+from page_index import PageIndex
+from result_store import load_page_result
+
+
+class FakeEngine:
+    """Writes the text drawn on the page as its OCR result."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict_page(self, input_path, output_folder, page=None):
+        self.calls += 1
+        with open(input_path + '.txt', encoding='utf-8') as f:
+            text = f.read()
+        with open(output_folder.res_json_path, 'w', encoding='utf-8') as f:
+            json.dump({'input_path': input_path, 'text': text}, f)
+
+
+def make_page(path, text):
+    path = str(path)
+    image = Image.new('RGB', (300, 120), 'white')
+    ImageDraw.Draw(image).text((10, 10), text, fill='black')
+    image.save(path)
+    with open(path + '.txt', 'w', encoding='utf-8') as f:
+        f.write(text)
+    return path
+
+
+def predict(index, engine, tmp_path, input_path, page):
+    output_folder = OutputPageFolder(str(tmp_path / 'output'), page)
+    cloned = index.predict(engine, input_path, output_folder)
+    return cloned, load_page_result(output_folder.res_json_path)['text']
+
+
+def test_byte_identical_page_is_cloned(tmp_path):
+    index, engine = PageIndex(str(tmp_path / 'index.json')), FakeEngine()
+    predict(index, engine, tmp_path, make_page(tmp_path / '1.png', 'Điều 1'), '1')
+
+    cloned, text = predict(index, engine, tmp_path, make_page(tmp_path / '2.png', 'Điều 1'), '2')
+    assert cloned and text == 'Điều 1'
+    assert engine.calls == 1
+
+
+def test_entry_of_a_re_ocrd_page_is_not_reused(tmp_path):
+    index, engine = PageIndex(str(tmp_path / 'index.json')), FakeEngine()
+    first = make_page(tmp_path / '5.png', 'Điều 1')
+    predict(index, engine, tmp_path, first, '5')
+
+    # Page 5 is replaced with another scan and OCR'd again
+    make_page(tmp_path / '5.png', 'Điều 2')
+    os.utime(first, None)
+    predict(index, engine, tmp_path, first, '5')
+
+    # A page with the old content of page 5 must not get the new OCR of page 5
+    cloned, text = predict(index, engine, tmp_path, make_page(tmp_path / '7.png', 'Điều 1'), '7')
+    assert not cloned and text == 'Điều 1'
+    cloned, text = predict(index, engine, tmp_path, make_page(tmp_path / '8.png', 'Điều 2'), '8')
+    assert cloned and text == 'Điều 2'
+
+
+def test_entry_is_ignored_once_its_page_result_changes(tmp_path):
+    index, engine = PageIndex(str(tmp_path / 'index.json')), FakeEngine()
+    predict(index, engine, tmp_path, make_page(tmp_path / '1.png', 'Điều 1'), '1')
+
+    # Page 1 OCR'd again without the index (no --dedup): the entry can't be trusted anymore
+    res_path = OutputPageFolder(str(tmp_path / 'output'), '1').res_json_path
+    with open(res_path, 'w', encoding='utf-8') as f:
+        json.dump({'text': 'other content'}, f)
+    stat = os.stat(res_path)
+    os.utime(res_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    cloned, text = predict(index, engine, tmp_path, make_page(tmp_path / '2.png', 'Điều 1'), '2')
+    assert not cloned and text == 'Điều 1'
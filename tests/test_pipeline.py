@@ -0,0 +1,79 @@
+"""
+Staged pipeline (pipelined --mass_convert): items go through every stage in order, a failing stage only fails
+its item, and run() always returns, whatever the stage functions, the callback or the input raise.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pipeline import StagedPipeline
+
+
+def run_with_timeout(fn, timeout=10.0):
+    """Run fn in a thread; fail instead of hanging the test run if it deadlocks."""
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = fn()
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "pipeline did not return"
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+
+def make_pipeline(queue_size=1):
+    pipeline = StagedPipeline(queue_size=queue_size)
+    pipeline.add_stage('double', lambda x: x * 2)
+    pipeline.add_stage('check', lambda x: 1 / (x - 6))  # fails for the item 3
+    pipeline.add_stage('negate', lambda x: -x)
+    return pipeline
+
+
+def test_items_go_through_every_stage():
+    pipeline = make_pipeline()
+    results = run_with_timeout(lambda: pipeline.run((str(i), i) for i in range(1, 6)))
+
+    assert [item.key for item in results] == ['1', '2', '3', '4', '5']
+    failed = [item for item in results if item.error is not None]
+    assert [(item.key, item.failed_stage) for item in failed] == [('3', 'check')]
+    assert isinstance(failed[0].exception, ZeroDivisionError)
+    assert results[0].payload == -1 / (2 - 6)
+    assert [stats.errors for stats in pipeline.stats] == [0, 1, 0]
+    # The stages after the failed one skip the item
+    assert [stats.items for stats in pipeline.stats] == [5, 5, 4]
+
+
+def test_failing_callback_does_not_deadlock():
+    def on_item_done(stage, item):
+        raise RuntimeError("progress bar is gone")
+
+    pipeline = make_pipeline()
+    results = run_with_timeout(lambda: pipeline.run(((str(i), i) for i in range(20)), on_item_done=on_item_done))
+    assert len(results) == 20
+
+
+def test_failing_input_generator_stops_the_stages():
+    def items():
+        for i in range(5):
+            yield str(i), i
+        raise OSError("input folder unreadable")
+
+    pipeline = make_pipeline()
+    with pytest.raises(OSError):
+        run_with_timeout(lambda: pipeline.run(items()))
+    assert all(stats.end_time is not None for stats in pipeline.stats)
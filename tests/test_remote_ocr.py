@@ -0,0 +1,150 @@
+"""
+Remote OCR backend (remote_ocr.py) against the local mock server (benchmarks/mock_llm_server.py) on an ephemeral
+port: retries, rate limiting, per-page fallback of a mismatched batch and malformed answers.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from mock_llm_server import MockLLMServer
+from remote_ocr import GeminiBackend, RemoteOCRError, RemoteOCRPool, TokenBucket
+from result_store import page_result_exists
+from synthetic_pages import make_pages
+from output_folder import OutputPageFolder
+
+MALFORMED_ANSWERS = [
+    '{"blocks": ["text"]}',
+    '{"blocks": null}',
+    '{"pages": ["text"]}',
+    '{"pages": [{"blocks": [{"label": "text"}, 3]}]}',
+    'not json',
+]
+
+
+@pytest.fixture(scope='module')
+def pages(tmp_path_factory):
+    return make_pages(str(tmp_path_factory.mktemp('input')), 4, size=(400, 560))
+
+
+@pytest.fixture(scope='module')
+def mock_server():
+    with MockLLMServer(port=0, latency=0.0) as server:
+        yield server
+
+
+@pytest.fixture
+def server(mock_server):
+    mock_server.scripted = []
+    yield mock_server
+    mock_server.scripted = []
+
+
+def make_backend(server, **kwargs) -> GeminiBackend:
+    settings = dict(api_key='mock', endpoint=server.endpoint, max_in_flight=4, requests_per_minute=None,
+                    retry_backoff=0.01, max_retries=3, timeout=10)
+    settings.update(kwargs)
+    return GeminiBackend(**settings)
+
+
+def test_page_is_ocrd(server, pages):
+    backend = make_backend(server)
+    [result] = backend.predict(pages[0])
+    assert result['parsing_res_list']
+    assert backend.requests == 1 and backend.retries == 0
+
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_retryable_status_is_retried(server, pages, status):
+    server.scripted = [status, status]
+    backend = make_backend(server)
+    [result] = backend.predict(pages[0])
+    assert result['parsing_res_list']
+    assert backend.requests == 3 and backend.retries == 2
+
+
+def test_client_error_is_not_retried(server, pages):
+    server.scripted = [400]
+    backend = make_backend(server)
+    with pytest.raises(RemoteOCRError) as error:
+        backend.predict(pages[0])
+    assert error.value.status == 400 and not error.value.retryable
+    assert backend.requests == 1
+
+
+def test_retries_give_up_after_max_retries(server, pages):
+    server.scripted = [503] * 10
+    backend = make_backend(server, max_retries=2)
+    with pytest.raises(RemoteOCRError) as error:
+        backend.predict(pages[0])
+    assert error.value.status == 503 and error.value.attempts == 3
+    assert backend.requests == 3
+
+
+def test_token_bucket_paces_requests(server, pages):
+    # 10 requests per second, no burst: 4 pages take at least 0.3s
+    backend = make_backend(server, requests_per_minute=600, burst=1)
+    start = time.perf_counter()
+    backend.predict(pages[0])
+    for path in pages[1:]:
+        backend.predict(path)
+    assert time.perf_counter() - start >= 0.28
+    assert backend.bucket.waited > 0
+
+
+def test_token_bucket_reserve():
+    bucket = TokenBucket(rate=2.0, capacity=2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.05)
+    assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+    assert TokenBucket(rate=None, capacity=1).reserve() == 0.0
+
+
+def test_mismatched_batch_falls_back_to_single_pages(server, pages, tmp_path):
+    server.scripted = ['{"pages": [{"blocks": []}]}']  # one page for a batch of two
+    backend = make_backend(server, batch_size=2)
+    output_dir = str(tmp_path / 'output')
+    tasks = [(str(i + 1), path, output_dir, None) for i, path in enumerate(pages[:2])]
+    with RemoteOCRPool(backend=backend) as pool:
+        outcomes = list(pool.map(tasks))
+    assert sorted(page for page, error, _ in outcomes if error is None) == ['1', '2']
+    assert backend.requests == 3  # the batch, then each page on its own
+
+
+@pytest.mark.parametrize('answer', MALFORMED_ANSWERS)
+def test_malformed_answer_is_retried(server, pages, answer):
+    server.scripted = [answer]
+    backend = make_backend(server)
+    [result] = backend.predict(pages[0])
+    assert result['parsing_res_list']
+    assert backend.requests == 2 and backend.retries == 1
+
+
+@pytest.mark.parametrize('answer', MALFORMED_ANSWERS)
+def test_malformed_answer_fails_only_its_page(server, pages, tmp_path, answer):
+    # One request in flight, so the first page gets the malformed answer
+    server.scripted = [answer]
+    backend = make_backend(server, max_in_flight=1, max_retries=0)
+    output_dir = str(tmp_path / 'output')
+    tasks = [(str(i + 1), path, output_dir, None) for i, path in enumerate(pages)]
+    with RemoteOCRPool(backend=backend) as pool:
+        outcomes = {page: error for page, error, _ in pool.map(tasks)}
+        failures = dict(pool.failures)
+
+    assert len(outcomes) == len(pages)
+    failed = [page for page, error in outcomes.items() if error is not None]
+    assert len(failed) == 1 and 'RemoteOCRError' in outcomes[failed[0]]
+    assert set(failures) == set(failed)
+    for page, error in outcomes.items():
+        if error is None:
+            assert page_result_exists(OutputPageFolder(output_dir, page).res_json_path)
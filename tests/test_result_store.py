@@ -0,0 +1,63 @@
+"""
+Round trip of page results through the binary result store: what is read back must equal what was written,
+with the same Python types.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_store import read_result, write_result
+
+
+def round_trip(tmp_path, data: dict) -> dict:
+    path = str(tmp_path / "page_res.ocrb")
+    write_result(path, data)
+    return read_result(path)
+
+
+def assert_same(actual, expected):
+    assert actual == expected
+    assert type(actual) is type(expected)
+    if isinstance(expected, dict):
+        for key in expected:
+            assert_same(actual[key], expected[key])
+    elif isinstance(expected, list):
+        for actual_item, expected_item in zip(actual, expected):
+            assert_same(actual_item, expected_item)
+
+
+def test_mixed_int_float_lists_keep_their_types(tmp_path):
+    data = {
+        'scores': [1, 2, 3.5, 4],
+        'boxes': [[1, 2, 3, 4], [5, 6, 7.5, 8], [9, 10, 11, 12], [13, 14, 15, 16]],
+    }
+    assert_same(round_trip(tmp_path, data), data)
+
+
+def test_block_table_column_with_mixed_types(tmp_path):
+    data = {'parsing_res_list': [{'x': 1}, {'x': 2}, {'x': 3}, {'x': 2.0}]}
+    assert_same(round_trip(tmp_path, data), data)
+
+
+def test_ints_beyond_int64(tmp_path):
+    data = {'ids': [2 ** 63, 1, 2, 3], 'negative': [-2 ** 63 - 1, 0, 1, 2]}
+    assert_same(round_trip(tmp_path, data), data)
+
+
+def test_uniform_lists_still_round_trip(tmp_path):
+    data = {
+        'rec_boxes': [[10, 20, 30, 40]] * 5,
+        'rec_scores': [0.5, 0.25, 0.9876543210123, 1.0],
+        'big': [2 ** 40, 1, 2, 3],
+        'rec_texts': ["một", "hai", "ba", "bốn"],
+        'parsing_res_list': [
+            {'block_label': 'text', 'block_content': f"đoạn {i}", 'block_bbox': [i, i + 1, i + 2, i + 3]}
+            for i in range(4)
+        ],
+    }
+    assert_same(round_trip(tmp_path, data), data)
@@ -0,0 +1,167 @@
+"""
+Page supervision (supervisor.py): retries, timeouts, the dead-letter list and model-reload decisions.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import supervisor
+from supervisor import DeadLetterList, PageSupervisor, StageError
+
+
+def make_supervisor(tmp_path, **kwargs):
+    settings = dict(max_retries=2, timeout=None, retry_backoff=0, max_pages=None, max_rss_mb=None,
+                    dead_letter=DeadLetterList(str(tmp_path / 'dead_letter.json')))
+    settings.update(kwargs)
+    return PageSupervisor(**settings)
+
+
+def failing(times, error=ValueError('bad page')):
+    """Callable that raises `error` on its first `times` calls, then returns 'ok'."""
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= times:
+            raise error
+        return 'ok'
+    fn.calls = calls
+    return fn
+
+
+def test_page_is_retried_until_it_succeeds(tmp_path):
+    sup = make_supervisor(tmp_path)
+    fn = failing(2)
+    assert sup.run('1', fn)
+    assert len(fn.calls) == 3
+    assert (sup.succeeded, sup.failed, sup.retries) == (1, 0, 2)
+    assert '1' not in sup.dead_letter
+
+
+def test_retries_back_off(tmp_path, monkeypatch):
+    pauses = []
+    monkeypatch.setattr(supervisor.time, 'sleep', pauses.append)
+    sup = make_supervisor(tmp_path, max_retries=3, retry_backoff=0.5)
+    assert not sup.run('1', failing(10))
+    assert pauses == [0.5, 1.0, 2.0]
+
+
+def test_page_failing_every_attempt_goes_to_the_dead_letter_list(tmp_path):
+    sup = make_supervisor(tmp_path)
+    fn = failing(10)
+    assert not sup.run('7', fn, input_path='input/7.jpg')
+    assert len(fn.calls) == 3
+    assert (sup.succeeded, sup.failed) == (0, 1)
+
+    # Saved at once, and read back by the next run
+    entry = DeadLetterList(sup.dead_letter.path).entries['7']
+    assert entry['attempts'] == 3
+    assert entry['error'] == 'ValueError: bad page'
+    assert entry['input_path'] == 'input/7.jpg'
+    assert entry['stage'] is None
+    assert 'ValueError: bad page' in entry['traceback']
+    assert "page 7 failed" in sup.summary()
+
+
+def test_page_succeeding_in_a_later_run_leaves_the_dead_letter_list(tmp_path):
+    make_supervisor(tmp_path, max_retries=0).run('7', failing(10))
+    sup = make_supervisor(tmp_path)
+    assert '7' in sup.dead_letter
+
+    assert sup.run('7', failing(0))
+    assert '7' not in sup.dead_letter
+    assert len(DeadLetterList(sup.dead_letter.path)) == 0
+
+
+def test_stage_errors_keep_their_stage(tmp_path):
+    sup = make_supervisor(tmp_path, max_retries=1)
+
+    def convert():
+        # e.g. a pipelined page: the stage is attempted (and fails) under the page
+        return sup.attempt(failing(10, KeyError('block_bbox')), '3', stage='docx')
+
+    with pytest.raises(StageError) as info:
+        sup.attempt(convert, '3')
+    assert info.value.stage == 'docx'
+    assert isinstance(info.value.error, KeyError)
+    assert info.value.attempts == 2
+
+
+def test_failure_reported_by_a_worker(tmp_path):
+    sup = make_supervisor(tmp_path)
+    sup.record_failure('4', 'ocr', 'worker crashed (exit code -9)', attempts=3, input_path='input/4.jpg')
+    assert sup.failed == 1
+    assert sup.dead_letter.entries['4']['stage'] == 'ocr'
+    assert sup.dead_letter.entries['4']['attempts'] == 3
+
+
+def test_corrupt_dead_letter_file_starts_empty(tmp_path):
+    path = tmp_path / 'dead_letter.json'
+    path.write_text('{not json', encoding='utf-8')
+    assert len(DeadLetterList(str(path))) == 0
+
+
+def test_timed_out_attempt_is_retried_and_asks_for_a_reload(tmp_path):
+    sup = make_supervisor(tmp_path, max_retries=1, timeout=0.05)
+    calls = []
+
+    def slow_first_time():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(5)
+        return 'ok'
+
+    start = time.monotonic()
+    assert sup.run('1', slow_first_time)
+    assert time.monotonic() - start < 2
+    assert (sup.timeouts, sup.retries) == (1, 1)
+    assert sup.recycle_due()
+
+    sup.recycled()
+    assert not sup.recycle_due()
+    assert sup.recycles == 1
+
+
+def test_timeout_on_every_attempt(tmp_path):
+    sup = make_supervisor(tmp_path, max_retries=0, timeout=0.05)
+    assert not sup.run('1', lambda: time.sleep(5))
+    assert sup.dead_letter.entries['1']['error'].startswith('PageTimeout')
+
+
+def test_reload_after_max_pages(tmp_path):
+    sup = make_supervisor(tmp_path, max_pages=2)
+    sup.run('1', failing(0))
+    assert not sup.recycle_due()
+    sup.run('2', failing(10))
+    assert sup.recycle_due()
+    sup.recycled()
+    assert sup.pages_since_recycle == 0 and not sup.recycle_due()
+
+
+def test_rss_reload_needs_growth_and_stops_when_it_frees_nothing(tmp_path, monkeypatch):
+    rss = [1000.0]
+    monkeypatch.setattr(supervisor, 'rss_mb', lambda: rss[0])
+    sup = make_supervisor(tmp_path, max_rss_mb=800, rss_growth_mb=200)
+
+    # Over the limit right after loading the models: that is the models, not a leak
+    sup.run('1', failing(0))
+    assert not sup.recycle_due()
+
+    rss[0] = 1300.0
+    assert sup.recycle_due()
+    sup.recycled()
+
+    # The reload gave nothing back: no more RSS reloads in this run
+    rss[0] = 1250.0
+    sup.run('2', failing(0))
+    assert sup.max_rss_mb is None
+    rss[0] = 5000.0
+    assert not sup.recycle_due()
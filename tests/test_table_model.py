@@ -0,0 +1,64 @@
+"""
+Table cell grid (table_model.py): parsing PPStructureV3 table HTML and writing it back.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from table_model import TableCell, TableModel
+
+SPANNED_HTML = (
+    '<html><body><table>'
+    '<tr><th rowspan="2">STT</th><th colspan="2">Hàm lượng</th></tr>'
+    '<tr><td>48g</td><td>5 &amp; 6</td></tr>'
+    '<tr><td>1</td><td colspan="2">Ghi chú<br/>dòng 2</td></tr>'
+    '</table></body></html>'
+)
+
+
+def shape(model):
+    return [[(cell.text, cell.rowspan, cell.colspan, cell.header) for cell in row] for row in model.rows]
+
+
+def test_spans_and_header_cells_are_parsed():
+    model = TableModel.from_html(SPANNED_HTML)
+    assert shape(model) == [
+        [('STT', 2, 1, True), ('Hàm lượng', 1, 2, True)],
+        [('48g', 1, 1, False), ('5 & 6', 1, 1, False)],
+        [('1', 1, 1, False), ('Ghi chú\ndòng 2', 1, 2, False)],
+    ]
+    assert (model.num_rows, model.num_cols) == (3, 3)
+
+
+def test_html_round_trip_keeps_the_grid():
+    model = TableModel.from_html(SPANNED_HTML)
+    html = model.to_html()
+    assert html.startswith('<html><body><table>') and html.endswith('</table></body></html>')
+    assert '<th rowspan="2">STT</th>' in html and '<td colspan="2">' in html
+    assert '5 &amp; 6' in html
+    assert shape(TableModel.from_html(html)) == shape(model)
+
+
+def test_dict_round_trip_keeps_the_grid():
+    model = TableModel.from_html(SPANNED_HTML)
+    assert shape(TableModel.from_dict(model.to_dict())) == shape(model)
+
+
+def test_saved_grid_takes_precedence_over_the_html():
+    model = TableModel([[TableCell('đã sửa', colspan=2)]])
+    block = {'block_content': SPANNED_HTML, 'block_table': model.to_dict()}
+    assert shape(TableModel.from_block(block)) == [[('đã sửa', 1, 2, False)]]
+    assert shape(TableModel.from_block({'block_content': SPANNED_HTML})) == shape(TableModel.from_html(SPANNED_HTML))
+
+
+def test_nested_tables_and_bad_spans():
+    html = ('<table><tr><td rowspan="x">a<table><tr><td>inner</td></tr></table></td>'
+            '<td colspan="0">b</td></tr></table><table><tr><td>second table</td></tr></table>')
+    model = TableModel.from_html(html)
+    # Only the first table's own cells; invalid spans fall back to 1
+    assert shape(model) == [[('a', 1, 1, False), ('b', 1, 1, False)]]
@@ -0,0 +1,67 @@
+"""
+Chunking of blocks longer than the correction model's token limit: every chunk fits the limit and joining the
+chunks with their separators gives back the original text.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_chunker import join_chunks, split_into_chunks
+
+
+def count_words(texts):
+    """One token per word."""
+    return [len(text.split()) for text in texts]
+
+
+def assert_round_trip(text, max_tokens):
+    chunks = split_into_chunks(text, count_words, max_tokens)
+    assert ''.join(chunk + separator for chunk, separator in chunks) == text
+    assert join_chunks(chunks, [chunk for chunk, _ in chunks]) == text
+    for chunk, _ in chunks:
+        assert count_words([chunk])[0] <= max_tokens
+    return chunks
+
+
+@pytest.mark.parametrize('text', [
+    '\nleading newline a b c d e f g',
+    '\n\n  leading newlines and spaces a b c d e f g',
+    '  leading spaces a b c d e f g',
+    'trailing newline a b c d e f g\n',
+    'trailing spaces a b c d e f g   ',
+    'repeated\n\n\nnewlines a b c\n\nd e f g',
+    'repeated   spaces  a  b   c d e f g',
+    'line one a b c d\n    indented line e f g h\n\tand a tab i j k',
+    'Sentence one a b. Sentence two c d!  Sentence three e f? g h; i j: k l… m n',
+])
+def test_round_trip(text):
+    assert_round_trip(text, 3)
+
+
+def test_leading_separator_is_an_empty_chunk():
+    chunks = assert_round_trip('\nleading newline a b c d e f g', 3)
+    assert chunks[0] == ('', '\n')
+    assert all(chunk for chunk, _ in chunks[1:])
+
+
+def test_short_text_is_one_chunk():
+    assert split_into_chunks('  a b c\n', count_words, 10) == [('  a b c\n', '')]
+
+
+def test_chunks_never_span_a_line_break():
+    chunks = assert_round_trip('a b\nc d e f', 10)
+    assert [chunk for chunk, _ in chunks] == ['a b\nc d e f']
+    chunks = assert_round_trip('a b c\nd e f g', 5)
+    assert [chunk for chunk, _ in chunks] == ['a b c', 'd e f g']
+
+
+def test_long_word_stays_whole():
+    chunks = assert_round_trip('a ' + 'x' * 50 + ' b', 1)
+    assert 'x' * 50 in [chunk for chunk, _ in chunks]
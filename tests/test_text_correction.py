@@ -0,0 +1,138 @@
+"""
+Text correction around the model: how corrections are applied back to the page (confidence gating, spans, tables).
+The model is replaced by upper-casing, so these run without Torch (stand-ins from benchmarks/stub_models.py
+are registered when it is not installed).
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+try:
+    import torch  # noqa: F401
+    import transformers  # noqa: F401
+except ImportError:
+    import stub_models
+    stub_models.install()
+
+from correction_cache import normalize_segment
+from text_correction import TextCorrector, keep_edge_whitespace, pack_micro_batches
+
+
+class UpperCaseCorrector(TextCorrector):
+    """TextCorrector whose 'model' upper-cases the normalized segments."""
+
+    def __init__(self, confidence_gating=True, confidence_threshold=0.9):
+        self.confidence_gating = confidence_gating
+        self.confidence_threshold = confidence_threshold
+        self.gating_counts = {'skipped': 0, 'block': 0, 'spans': 0, 'cells_skipped': 0, 'cells_corrected': 0}
+        self.sent = []
+
+    def correct_texts_batch(self, texts):
+        self.sent.extend(texts)
+        return [normalize_segment(text).upper() for text in texts]
+
+
+def line(text, score, box):
+    return text, score, box
+
+
+def make_result(blocks, lines):
+    return {
+        'parsing_res_list': blocks,
+        'overall_ocr_res': {
+            'rec_texts': [text for text, _, _ in lines],
+            'rec_scores': [score for _, score, _ in lines],
+            'rec_boxes': [box for _, _, box in lines],
+        },
+    }
+
+
+def improve(tmp_path, data, corrector):
+    input_json, output_json = str(tmp_path / '1_res.json'), str(tmp_path / '1_improved.json')
+    with open(input_json, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    corrector.improve_json(input_json=input_json, output_json=output_json)
+    with open(output_json, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_micro_batches_group_similar_lengths_within_the_budget():
+    lengths = [30, 5, 12, 6, 29, 11]
+    batches = pack_micro_batches(lengths, token_budget=36, max_batch_size=8)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    # Shortest first, each batch padded to its longest text
+    assert batches == [[1, 3, 5], [2], [4], [0]]
+    for batch in batches:
+        assert len(batch) * max(lengths[i] for i in batch) <= 36
+
+
+def test_micro_batches_respect_the_batch_size():
+    batches = pack_micro_batches([4] * 10, token_budget=1000, max_batch_size=4)
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+
+
+def test_text_longer_than_the_budget_gets_its_own_batch():
+    assert pack_micro_batches([3, 500, 2], token_budget=100, max_batch_size=8) == [[2, 0], [1]]
+    assert pack_micro_batches([], token_budget=100, max_batch_size=8) == []
+
+
+def test_keep_edge_whitespace():
+    assert keep_edge_whitespace(' đoạn văn\n', 'ĐOẠN VĂN') == ' ĐOẠN VĂN\n'
+    assert keep_edge_whitespace('đoạn', ' ĐOẠN ') == 'ĐOẠN'
+    assert keep_edge_whitespace('  ', 'x') == '  '
+
+
+def test_corrected_span_keeps_its_surrounding_whitespace(tmp_path):
+    block = {'block_label': 'text', 'block_bbox': [0, 0, 300, 20], 'block_content': 'một hai ba bốn'}
+    data = make_result([block], [
+        line('một ', 0.99, [0, 0, 50, 20]),
+        line('hai ba ', 0.5, [60, 0, 150, 20]),
+        line('bốn', 0.99, [160, 0, 200, 20]),
+    ])
+    corrector = UpperCaseCorrector()
+    result = improve(tmp_path, data, corrector)
+
+    assert corrector.sent == ['hai ba ']
+    assert result['parsing_res_list'][0]['block_content'] == 'một HAI BA bốn'
+    assert result['parsing_res_list'][0]['correction']['mode'] == 'spans'
+
+
+def test_spans_across_lines_keep_the_newlines(tmp_path):
+    block = {'block_label': 'text', 'block_bbox': [0, 0, 300, 60], 'block_content': 'dòng một\ndòng hai\ndòng ba'}
+    data = make_result([block], [
+        line('dòng một', 0.4, [0, 0, 200, 20]),
+        line('dòng hai', 0.99, [0, 20, 200, 40]),
+        line('dòng ba', 0.4, [0, 40, 200, 60]),
+    ])
+    result = improve(tmp_path, data, UpperCaseCorrector())
+    assert result['parsing_res_list'][0]['block_content'] == 'DÒNG MỘT\ndòng hai\nDÒNG BA'
+
+
+def test_cell_counts_are_per_table(tmp_path):
+    tables = [
+        {'block_label': 'table', 'block_bbox': [0, 0, 300, 100],
+         'block_content': '<table><tr><td>a</td><td>b</td></tr><tr><td>c</td><td></td></tr></table>'},
+        {'block_label': 'table', 'block_bbox': [0, 200, 300, 300],
+         'block_content': '<table><tr><td>d</td><td>e</td></tr></table>'},
+    ]
+    # 'b' is a high-confidence line: its cell skips the model
+    data = make_result(tables, [line('b', 0.99, [150, 0, 200, 40])])
+    corrector = UpperCaseCorrector()
+    result = improve(tmp_path, data, corrector)
+
+    first, second = (block['correction'] for block in result['parsing_res_list'])
+    assert (first['corrected_cells'], first['skipped_cells']) == (2, 1)
+    assert (second['corrected_cells'], second['skipped_cells']) == (2, 0)
+    assert corrector.gating_counts['cells_corrected'] == 4
+    assert corrector.gating_counts['cells_skipped'] == 1
+    assert '>A<' in result['parsing_res_list'][0]['block_content']
+    assert '>b<' in result['parsing_res_list'][0]['block_content']
@@ -0,0 +1,113 @@
+"""
+Watch-folder scanning (--watch): debounce, forgetting deleted files, and skipping pages by their build manifest.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from build_manifest import BuildPlanner
+from output_folder import OutputPageFolder
+from watcher import FolderWatcher
+
+
+def write_page(folder, name, data=b'scan'):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def build_page(planner, output_base, page_number, input_path):
+    """Write the outputs of every stage and record them in the page's manifest."""
+    output_folder = OutputPageFolder(output_base, page_number)
+    manifest = planner.manifest(output_folder, input_path)
+    with open(output_folder.res_json_path, 'w', encoding='utf-8') as f:
+        json.dump({'parsing_res_list': []}, f)
+    planner.done(manifest, 'ocr')
+    with open(output_folder.improved_json_path, 'w', encoding='utf-8') as f:
+        json.dump({'parsing_res_list': []}, f)
+    planner.done(manifest, 'correction')
+    with open(output_folder.docx_path, 'wb') as f:
+        f.write(b'docx')
+    planner.done(manifest, 'docx')
+
+
+def make_watcher(tmp_path, planner=None):
+    input_folder = tmp_path / 'input'
+    input_folder.mkdir(exist_ok=True)
+    return FolderWatcher(str(input_folder), str(tmp_path / 'output'), debounce_seconds=0, planner=planner)
+
+
+def test_file_is_ready_once_unchanged_between_two_scans(tmp_path):
+    watcher = make_watcher(tmp_path)
+    path = write_page(watcher.input_folder, '1.jpg')
+    write_page(watcher.input_folder, 'notes.txt')
+
+    assert watcher.poll() == []
+    [(page_number, input_path, _, manifest)] = watcher.poll()
+    assert (page_number, input_path) == ('1', path)
+    assert manifest is not None
+    # Picked up once only
+    assert watcher.poll() == []
+
+
+def test_deleted_files_are_forgotten(tmp_path):
+    watcher = make_watcher(tmp_path)
+    paths = [write_page(watcher.input_folder, f'{i}.jpg') for i in range(5)]
+    watcher.poll()
+    watcher.poll()
+    assert set(watcher.files) == set(paths)
+
+    for path in paths[:4]:
+        os.remove(path)
+    watcher.poll()
+    assert set(watcher.files) == {paths[4]}
+
+
+def test_up_to_date_pages_are_skipped(tmp_path):
+    planner = BuildPlanner(enabled=True)
+    watcher = make_watcher(tmp_path, planner)
+    path = write_page(watcher.input_folder, '1.jpg')
+    build_page(planner, watcher.output_base_folder, '1', path)
+
+    watcher.poll()
+    assert watcher.poll() == []
+    assert watcher.skipped_current == 1
+
+
+def test_changed_stage_version_is_picked_up(tmp_path):
+    planner = BuildPlanner(enabled=True)
+    (tmp_path / 'input').mkdir()
+    path = write_page(str(tmp_path / 'input'), '1.jpg')
+    build_page(planner, str(tmp_path / 'output'), '1', path)
+
+    # e.g. docx_builder.py changed since the page was built
+    new_planner = BuildPlanner(enabled=True)
+    new_planner.versions['docx'] = 'new docx code'
+    watcher = make_watcher(tmp_path, new_planner)
+    watcher.poll()
+    [(page_number, _, _, manifest)] = watcher.poll()
+    assert page_number == '1'
+    assert not new_planner.needs(manifest, 'ocr')
+    assert not new_planner.needs(manifest, 'correction')
+    assert new_planner.needs(manifest, 'docx')
+
+
+def test_rewritten_image_is_picked_up_again(tmp_path):
+    planner = BuildPlanner(enabled=True)
+    watcher = make_watcher(tmp_path, planner)
+    path = write_page(watcher.input_folder, '1.jpg')
+    build_page(planner, watcher.output_base_folder, '1', path)
+    watcher.poll()
+    watcher.poll()
+
+    write_page(watcher.input_folder, '1.jpg', b'another scan')
+    watcher.poll()
+    [(page_number, _, _, manifest)] = watcher.poll()
+    assert page_number == '1' and planner.needs(manifest, 'ocr')
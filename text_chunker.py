@@ -0,0 +1,95 @@
+"""
+Text Chunker Module
+
+Split text blocks longer than the correction model's token limit into token-bounded chunks,
+so long blocks (e.g. multi-paragraph recipe blocks) are corrected in full instead of being truncated.
+
+Splitting goes from coarse to fine, only where a piece is still too long:
+1. line breaks
+2. sentence boundaries (. ! ? ; : …)
+3. whitespace between words
+Adjacent pieces are then merged back greedily up to the token limit, never across a line break,
+so joining the corrected chunks with their separators keeps the original newlines.
+"""
+
+import re
+from typing import Callable, List, Tuple
+
+_SPLIT_LEVELS = [
+    re.compile(r'\n+'),
+    re.compile(r'(?<=[.!?;:…])\s+'),
+    re.compile(r'\s+'),
+]
+
+# (chunk text, separator that followed it in the original text)
+Chunk = Tuple[str, str]
+
+
+def _split_on(text: str, pattern: re.Pattern) -> List[Chunk]:
+    parts = []
+    last = 0
+    for match in pattern.finditer(text):
+        if match.start() > last:
+            parts.append((text[last:match.start()], match.group()))
+        elif parts:
+            # Separator right after another separator: attach it to the previous piece
+            parts[-1] = (parts[-1][0], parts[-1][1] + match.group())
+        else:
+            # Separator at the start of the text: keep it behind an empty piece
+            parts.append(('', match.group()))
+        last = match.end()
+    if last < len(text):
+        parts.append((text[last:], ''))
+    return parts or [(text, '')]
+
+
+def split_into_chunks(text: str, count_tokens: Callable[[List[str]], List[int]], max_tokens: int) -> List[Chunk]:
+    """
+    Split text into chunks of at most max_tokens tokens (a single word longer than that stays whole).
+
+    :param text: Text to split.
+    :param count_tokens: Callable returning the token count of each string in a list (without special tokens).
+    :param max_tokens: Max tokens per chunk.
+    :return: List of (chunk, separator); ''.join(chunk + separator) gives back the original text.
+             A chunk is empty only when the text starts with a separator.
+    """
+    units = [(text, '')]
+    lengths = count_tokens([text])
+    if lengths[0] <= max_tokens:
+        return units
+
+    for pattern in _SPLIT_LEVELS:
+        if max(lengths) <= max_tokens:
+            break
+        refined = []
+        for (unit, separator), length in zip(units, lengths):
+            if length <= max_tokens:
+                refined.append((unit, separator))
+                continue
+            pieces = _split_on(unit, pattern)
+            pieces[-1] = (pieces[-1][0], pieces[-1][1] + separator)
+            refined.extend(pieces)
+        units = refined
+        lengths = count_tokens([unit for unit, _ in units])
+
+    # Merge neighbours back up to the limit; line breaks always end a chunk
+    chunks = []
+    current, current_separator, current_length = None, '', 0
+    for (unit, separator), length in zip(units, lengths):
+        if current is not None and '\n' not in current_separator and current_length + length <= max_tokens:
+            current = current + current_separator + unit
+            current_separator = separator
+            current_length += length
+        else:
+            if current is not None:
+                chunks.append((current, current_separator))
+            current, current_separator, current_length = unit, separator, length
+    chunks.append((current, current_separator))
+    return chunks
+
+
+def join_chunks(chunks: List[Chunk], corrected: List[str]) -> str:
+    """
+    Join corrected chunks back together with their original separators.
+    """
+    return ''.join(text + separator for text, (_, separator) in zip(corrected, chunks))
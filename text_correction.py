@@ -4,36 +4,123 @@ import os
 import json
 from typing import List, Dict, Any, Optional, Tuple, Union
 import torch
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from transformers import AutoTokenizer
 
 # Custom packages
 from config import Config
 from utils.timer import Timer, Time
+from utils.tracing import span
+from correction_cache import CorrectionCache, normalize_segment
+from text_chunker import split_into_chunks, join_chunks
+from confidence_gating import assign_lines_to_blocks, plan_block, high_confidence_texts
+from correction_backends import load_correction_model
+from table_model import TableModel
+from profiles import correction_settings
+from result_store import load_page_result, save_page_result
 
-# ProtonX
-from protonx import ProtonX
 #os.environ["PROTONX_API_KEY"] = Config.PROTONX_USER_TOKEN
 
+def keep_edge_whitespace(original: str, corrected: str) -> str:
+    """
+    Put the leading / trailing whitespace of `original` back around `corrected`
+    (corrections are made on normalized, stripped text; a span spliced back into its block needs its edges).
+    """
+    stripped = original.strip()
+    if not stripped:
+        return original
+    leading = original[:len(original) - len(original.lstrip())]
+    trailing = original[len(original.rstrip()):]
+    return leading + corrected.strip() + trailing
+
+
+def pack_micro_batches(lengths: List[int], token_budget: int, max_batch_size: int) -> List[List[int]]:
+    """
+    Group text indices into micro-batches of similar length.
+    Indices are sorted by token length, then packed greedily while
+    (batch size * longest text in batch) stays within the token budget.
+    A single text longer than the budget still gets its own batch.
+
+    :param lengths: Token length of each text.
+    :param token_budget: Max padded tokens per micro-batch.
+    :param max_batch_size: Max texts per micro-batch.
+    :return: List of micro-batches, each a list of indices into `lengths`.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+
+    batches = []
+    current = []
+    for i in order:
+        # Sorted ascending, so the new text is the longest in the batch
+        if current and ((len(current) + 1) * lengths[i] > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
 class TextCorrector:
     def __init__(self,
                  model_path: Optional[str] = Config.PROTONX_CORRECTION_MODEL,
-                 max_tokens: Optional[int] = Config.PROTONX_CORRECTION_MAX_TOKENS):
+                 max_tokens: Optional[int] = Config.PROTONX_CORRECTION_MAX_TOKENS,
+                 use_cache: bool = Config.USE_CORRECTION_CACHE,
+                 token_budget: int = Config.PROTONX_CORRECTION_TOKEN_BUDGET,
+                 max_batch_size: int = Config.PROTONX_CORRECTION_MAX_BATCH_SIZE,
+                 confidence_gating: bool = Config.CORRECTION_CONFIDENCE_GATING,
+                 confidence_threshold: float = Config.CORRECTION_CONFIDENCE_THRESHOLD,
+                 backend: str = Config.PROTONX_CORRECTION_BACKEND,
+                 profile: Optional[str] = None):
         self.model_path = model_path
+        self.backend = backend
         self.max_tokens = max_tokens
+        self.token_budget = token_budget
+        self.max_batch_size = max_batch_size
+        self.confidence_gating = confidence_gating
+        self.confidence_threshold = confidence_threshold
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
+        # Generation settings shared by correct_text and correct_texts_batch (also part of the cache key)
+        self.generation_settings = {
+            'num_beams': 3,
+            'num_return_sequences': 1,
+            'max_new_tokens': self.max_tokens,
+            'early_stopping': True,
+        }
+        # Beam settings of the speed / accuracy profile (Config.PROFILE if None)
+        self.generation_settings.update(correction_settings(profile))
+
         self.tokenizer = None
         self.model = None
 
         self._load_model()
+
+        # Chunk size for long segments: max_tokens minus the special tokens the tokenizer adds (e.g. </s>)
+        self.chunk_tokens = self.max_tokens
+        if self.tokenizer is not None:
+            self.chunk_tokens = max(1, self.max_tokens - self.tokenizer.num_special_tokens_to_add())
+
+        # Segment-level memoization across pages and runs
+        self.cache = None
+        if use_cache:
+            self.cache = CorrectionCache(
+                namespace=CorrectionCache.make_namespace(f"{self.model_path}|{self.backend}|max_tokens={self.max_tokens}", self.generation_settings)
+            )
+
+        # Run statistics
+        self.segments_seen = 0
+        self.segments_generated = 0
+        self.chunked_segments = 0         # segments longer than max_tokens, split into chunks
+        self.micro_batches = 0
+        self.real_tokens = 0              # non-padding input tokens
+        self.padded_tokens = 0            # input tokens including padding, over all micro-batches
+        self.unbatched_padded_tokens = 0  # what one padded batch per call would have cost
+        self.gating_counts = {'skipped': 0, 'block': 0, 'spans': 0, 'cells_skipped': 0, 'cells_corrected': 0}
         
     def _load_model(self):
         try:
             self.tokenizer = AutoTokenizer.from_pretrained(self.model_path)
-            self.model = AutoModelForSeq2SeqLM.from_pretrained(self.model_path)
-
-            self.model.to(self.device)
-            self.model.eval()
+            # Model for the selected backend; int8 / ONNX backends run on CPU
+            self.model, self.device = load_correction_model(self.model_path, self.backend, self.device)
 
         except Exception as e:
             print(f"Error loading Text Correction model: {e}")
@@ -54,10 +141,7 @@ class TextCorrector:
         with torch.no_grad():
             outputs = self.model.generate(
                 **inputs,
-                num_beams=3,
-                num_return_sequences=1,
-                max_new_tokens=self.max_tokens,
-                early_stopping=True,
+                **self.generation_settings,
                 return_dict_in_generate=True,
                 output_scores=True
             )
@@ -71,104 +155,243 @@ class TextCorrector:
         return decoded
 
     def correct_texts_batch(self, texts: List[str]) -> List[str]:
-        """Correct multiple texts in a single batch for better performance."""
+        """
+        Correct multiple texts in a single batch for better performance.
+        Segments are normalized and deduplicated first. Segments longer than max_tokens are split into
+        token-bounded chunks, and chunks from all segments are corrected together, then joined back.
+        Only chunks missing from the cache reach the model.
+        """
         if self.tokenizer is None or self.model is None:
             raise ValueError("Model or tokenizer not loaded properly.")
         
         if not texts:
             return []
-        
-        # Tokenize all texts at once
-        inputs = self.tokenizer(
-            texts,
-            return_tensors="pt",
-            truncation=True,
-            max_length=self.max_tokens,
-            padding=True
-        ).to(self.device)
-        
-        with torch.no_grad():
-            outputs = self.model.generate(
-                **inputs,
-                num_beams=3,
-                num_return_sequences=1,
-                max_new_tokens=self.max_tokens,
-                early_stopping=True
-            )
-        
-        # Decode all outputs
-        decoded_texts = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+        with span("correction.batch", segments=len(texts)) as batch_span:
+            normalized = [normalize_segment(text) for text in texts]
+            unique_texts = list(dict.fromkeys(normalized))
+
+            # Split long segments instead of letting the tokenizer truncate them
+            with span("correction.chunk"):
+                chunked = {text: split_into_chunks(text, self._count_tokens, self.chunk_tokens) for text in unique_texts}
+            unique_chunks = list(dict.fromkeys(chunk for chunks in chunked.values() for chunk, _ in chunks if chunk))
+            self.chunked_segments += sum(1 for chunks in chunked.values() if len(chunks) > 1)
+
+            with span("correction.cache_lookup"):
+                corrections = self.cache.get_many(unique_chunks) if self.cache is not None else {}
+            missing = [chunk for chunk in unique_chunks if chunk not in corrections]
+            batch_span.set(chunks=len(unique_chunks), generated=len(missing))
+
+            if missing:
+                generated = dict(zip(missing, self._generate_batch(missing)))
+                if self.cache is not None:
+                    self.cache.put_many(generated)
+                corrections.update(generated)
+
+        self.segments_seen += len(texts)
+        self.segments_generated += len(missing)
+
+        corrected_texts = {
+            text: join_chunks(chunks, [corrections[chunk] if chunk else '' for chunk, _ in chunks])
+            for text, chunks in chunked.items()
+        }
+        return [corrected_texts[text] for text in normalized]
+
+    def _count_tokens(self, texts: List[str]) -> List[int]:
+        """Token count of each text, without special tokens."""
+        return [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)['input_ids']]
+
+    def _generate_batch(self, texts: List[str]) -> List[str]:
+        """
+        Run the seq2seq model on a list of texts.
+        Texts are sorted by token length and packed into micro-batches capped by the token budget,
+        so a table-heavy page never becomes one huge, mostly-padding tensor.
+        Outputs are returned in the original order.
+        """
+        # Tokenize without padding first, only to know each text's length
+        with span("correction.tokenize", segments=len(texts)) as tokenize_span:
+            input_ids = self.tokenizer(
+                texts,
+                truncation=True,
+                max_length=self.max_tokens
+            )['input_ids']
+            lengths = [len(ids) for ids in input_ids]
+            tokenize_span.set(tokens=sum(lengths))
+
+        decoded_texts = [None] * len(texts)
+        for batch in pack_micro_batches(lengths, self.token_budget, self.max_batch_size):
+            real_tokens = sum(lengths[i] for i in batch)
+            padded_tokens = len(batch) * max(lengths[i] for i in batch)
+
+            with span("correction.pad"):
+                inputs = self.tokenizer.pad(
+                    [{'input_ids': input_ids[i]} for i in batch],
+                    return_tensors="pt"
+                ).to(self.device)
+
+            with span("correction.generate", segments=len(batch), tokens=real_tokens, padded_tokens=padded_tokens,
+                      num_beams=self.generation_settings.get('num_beams')):
+                with torch.no_grad():
+                    outputs = self.model.generate(
+                        **inputs,
+                        **self.generation_settings
+                    )
+
+            # Decode this micro-batch and put outputs back in place
+            with span("correction.decode", segments=len(batch)):
+                for i, decoded in zip(batch, self.tokenizer.batch_decode(outputs, skip_special_tokens=True)):
+                    decoded_texts[i] = decoded
+
+            self.micro_batches += 1
+            self.real_tokens += real_tokens
+            self.padded_tokens += padded_tokens
+
+        # Padding a single batch would have cost len(texts) * longest text
+        self.unbatched_padded_tokens += len(texts) * max(lengths)
         return decoded_texts
 
-    def improve_json(self, input_json: str, output_json: str):
-        try:
-            with open(input_json, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            timer = Timer()
-            timer.start()
-
-            # Collect all texts to correct in batches
-            texts_to_correct = []
-            block_indices = []  # Track which block each text belongs to
-            table_cell_info = []  # Track table cell positions for reconstruction
-
-            for idx, block in enumerate(data.get('parsing_res_list', [])):
-                original_text = block.get('block_content', '')
-
-                if block.get('block_label') == 'table':
-                    # Extract all table cell texts for batch processing
-                    from bs4 import BeautifulSoup
-                    soup = BeautifulSoup(original_text, 'html.parser')
-                    td_tags = soup.find_all('td')
-                    
-                    for td in td_tags:
-                        cell_text = td.get_text()
-                        if cell_text.strip():  # Only process non-empty cells
-                            texts_to_correct.append(cell_text)
-                            table_cell_info.append((idx, td))
+    def padding_waste(self) -> float:
+        """Fraction of input tokens fed to the model that were padding."""
+        return 1 - self.real_tokens / self.padded_tokens if self.padded_tokens else 0.0
+
+    def summary(self) -> str:
+        """Run summary: segments seen vs. sent to the model, plus cache hit/miss counts."""
+        lines = [f"Text correction: {self.segments_seen} segments ({self.chunked_segments} split into chunks), "
+                 f"{self.segments_generated} chunks sent to the model"]
+        if self.micro_batches:
+            single_batch_waste = 1 - self.real_tokens / self.unbatched_padded_tokens
+            lines.append(f"Micro-batching: {self.micro_batches} batches, padding waste {self.padding_waste() * 100:.1f}% "
+                         f"(single batch: {single_batch_waste * 100:.1f}%)")
+        if self.confidence_gating:
+            counts = self.gating_counts
+            lines.append(f"Confidence gating: {counts['skipped']} blocks skipped, {counts['spans']} partially corrected, "
+                         f"{counts['block']} fully corrected; {counts['cells_skipped']}/{counts['cells_skipped'] + counts['cells_corrected']} table cells skipped")
+        if self.cache is not None:
+            lines.append(self.cache.summary())
+        return "\n".join(lines)
+
+    def improve_json(self, input_json: str, output_json: str, confidence_gating: Optional[bool] = None):
+        """
+        Correct the text of a `_res.json` and save it as `_improved.json`
+        (either may be stored in the binary format, see result_store).
+
+        :param confidence_gating: Only send low-confidence blocks / lines to the model
+                                  (defaults to the corrector's setting). The decision for each block
+                                  is recorded under block['correction'].
+        """
+        if confidence_gating is None:
+            confidence_gating = self.confidence_gating
+
+        with span("correction.load"):
+            data = load_page_result(input_json)
+
+        timer = Timer(name="correction.improve_json")
+        timer.start()
+
+        threshold = self.confidence_threshold
+        lines_by_block = assign_lines_to_blocks(data) if confidence_gating else {}
+
+        # Collect all texts to correct in batches
+        texts_to_correct = []
+        # What each text corrects: ('cell', block_idx, cell) | ('block', block_idx) | ('span', block_idx, start, end)
+        targets = []
+        # Table blocks are parsed once into a cell grid; corrections edit the grid directly
+        table_models = {}
+
+        for idx, block in enumerate(data.get('parsing_res_list', [])):
+            original_text = block.get('block_content', '')
+            lines = lines_by_block.get(idx, [])
+
+            if block.get('block_label') == 'table':
+                # Extract all table cell texts for batch processing
+                with span("correction.html_parse"):
+                    table_model = TableModel.from_block(block)
+                table_models[idx] = table_model
+
+                # Cells whose text is a high-confidence OCR line skip the model
+                skip_texts = high_confidence_texts(lines, threshold) if confidence_gating else set()
+                skipped_cells = 0
+                corrected_cells = 0
+
+                for cell in table_model.cells():
+                    cell_text = cell.text
+                    if not cell_text.strip():  # Only process non-empty cells
+                        continue
+                    if cell_text.strip() in skip_texts:
+                        skipped_cells += 1
+                        continue
+                    texts_to_correct.append(cell_text)
+                    targets.append(('cell', idx, cell))
+                    corrected_cells += 1
+
+                if confidence_gating:
+                    block['correction'] = {'mode': 'cells', 'threshold': threshold,
+                                           'corrected_cells': corrected_cells, 'skipped_cells': skipped_cells}
+                    self.gating_counts['cells_skipped'] += skipped_cells
+                    self.gating_counts['cells_corrected'] += corrected_cells
+                continue
+
+            if not original_text.strip():  # Only process non-empty content
+                continue
+
+            if not confidence_gating:
+                texts_to_correct.append(original_text)
+                targets.append(('block', idx))
+                continue
+
+            plan = plan_block(original_text, lines, threshold)
+            self.gating_counts[plan['mode']] += 1
+            if plan['mode'] == 'block':
+                texts_to_correct.append(original_text)
+                targets.append(('block', idx))
+            elif plan['mode'] == 'spans':
+                for start, end, _ in plan['spans']:
+                    texts_to_correct.append(original_text[start:end])
+                    targets.append(('span', idx, start, end))
+
+            block['correction'] = {
+                'mode': plan['mode'],
+                'threshold': threshold,
+                'min_score': plan['min_score'],
+                'lines': [{'text': line['text'], 'score': line['score'],
+                           'corrected': plan['mode'] == 'block' or (plan['mode'] == 'spans' and line['score'] < threshold)}
+                          for line in lines],
+            }
+
+        # Batch process all texts
+        if texts_to_correct:
+            print(f"Correcting {len(texts_to_correct)} text segments in batch...")
+            corrected_texts = self.correct_texts_batch(texts_to_correct)
+
+            # Apply corrections back to blocks
+            span_edits = {}
+            for target, corrected_text in zip(targets, corrected_texts):
+                if target[0] == 'cell':
+                    target[2].text = corrected_text
+                elif target[0] == 'block':
+                    data['parsing_res_list'][target[1]]['block_content'] = corrected_text
                 else:
-                    if original_text.strip():  # Only process non-empty content
-                        texts_to_correct.append(original_text)
-                        block_indices.append(idx)
-
-            # Batch process all texts
-            if texts_to_correct:
-                print(f"Correcting {len(texts_to_correct)} text segments in batch...")
-                corrected_texts = self.correct_texts_batch(texts_to_correct)
-
-                # Apply corrections back to blocks
-                correction_idx = 0
-                
-                # Handle table cells
-                for block_idx, td in table_cell_info:
-                    td.string = corrected_texts[correction_idx]
-                    correction_idx += 1
-                
-                # Reconstruct tables
-                table_blocks = {}
-                for block_idx, td in table_cell_info:
-                    if block_idx not in table_blocks:
-                        block = data['parsing_res_list'][block_idx]
-                        original_text = block.get('block_content', '')
-                        from bs4 import BeautifulSoup
-                        soup = BeautifulSoup(original_text, 'html.parser')
-                        table_blocks[block_idx] = soup
-                
-                for block_idx, soup in table_blocks.items():
-                    data['parsing_res_list'][block_idx]['block_content'] = str(soup)
-                
-                # Handle regular text blocks
-                for idx in block_indices:
-                    data['parsing_res_list'][idx]['block_content'] = corrected_texts[correction_idx]
-                    correction_idx += 1
-
-            timer.stop()
-            print(f"Total correction time: {timer.elapsed():.2f}s")
-
-            with open(output_json, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+                    _, block_idx, start, end = target
+                    span_edits.setdefault(block_idx, []).append((start, end, corrected_text))
+            
 
-        except Exception as e:
-            print(f"Error improving JSON: {e}")
+            # Handle low-confidence spans: replace from the end so earlier offsets stay valid;
+            # the whitespace around each span stays, so it is not glued to its neighbours
+            for block_idx, edits in span_edits.items():
+                content = data['parsing_res_list'][block_idx]['block_content']
+                for start, end, corrected_text in sorted(edits, reverse=True):
+                    content = content[:start] + keep_edge_whitespace(content[start:end], corrected_text) + content[end:]
+                data['parsing_res_list'][block_idx]['block_content'] = content
+
+        # Save each table grid next to its HTML (HTML regenerated so both carry the corrections)
+        for block_idx, table_model in table_models.items():
+            block = data['parsing_res_list'][block_idx]
+            block['block_table'] = table_model.to_dict()
+            block['block_content'] = table_model.to_html()
+
+        timer.stop()
+        print(f"Total correction time: {timer.elapsed():.2f}s")
+
+        with span("correction.save"):
+            save_page_result(output_json, data)
 
@@ -0,0 +1,199 @@
+"""
+Staged pipeline helper
+
+Each stage runs in its own worker thread and hands items to the next stage
+through a bounded queue, so page N+1 can be OCR'd while page N is corrected
+and page N-1 is written to DOCX.
+The heavy work (Paddle / Torch inference, DOCX writing) releases the GIL most of the time,
+so threads are enough to overlap the stages.
+
+Usage:
+    pipeline = StagedPipeline(queue_size=2)
+    pipeline.add_stage("ocr", ocr_fn)
+    pipeline.add_stage("correction", correct_fn)
+    pipeline.add_stage("docx", docx_fn)
+    results = pipeline.run(items)
+    pipeline.print_report()
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, List, Optional
+
+from utils.tracing import span
+
+# Sentinel pushed through the queues to tell the next stage that no more items are coming
+_STOP = object()
+
+
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.errors = 0
+        self.busy_time = 0.0   # time spent inside the stage function
+        self.wait_time = 0.0   # time spent waiting for an input item
+        self.start_time = None
+        self.end_time = None
+
+    def wall_time(self) -> float:
+        if self.start_time is None or self.end_time is None:
+            return 0.0
+        return self.end_time - self.start_time
+
+    def occupancy(self) -> float:
+        """
+        Fraction of the stage's lifetime spent doing work (0 -> always idle, 1 -> always busy).
+        The stage with the highest occupancy is the bottleneck.
+        """
+        wall = self.wall_time()
+        return self.busy_time / wall if wall > 0 else 0.0
+
+    def __str__(self):
+        return (f"{self.name:<12} items={self.items:<5} errors={self.errors:<3} "
+                f"busy={self.busy_time:8.2f}s wait={self.wait_time:8.2f}s "
+                f"occupancy={self.occupancy() * 100:5.1f}%")
+
+
+class PipelineItem:
+    """
+    Item flowing through the pipeline.
+    `payload` is whatever the stage functions pass along; `error` is set when a stage failed
+    (`exception` keeps the exception itself), in which case the remaining stages are skipped for this item.
+    """
+    def __init__(self, key: str, payload: Any):
+        self.key = key
+        self.payload = payload
+        self.error: Optional[str] = None
+        self.exception: Optional[BaseException] = None
+        self.failed_stage: Optional[str] = None
+
+
+class StagedPipeline:
+    def __init__(self, queue_size: int = 2):
+        """
+        :param queue_size: Max number of items waiting between two stages.
+                           Keeps memory bounded when one stage is much faster than the next.
+        """
+        self.queue_size = queue_size
+        self.stages: List[tuple] = []
+        self.stats: List[StageStats] = []
+        self.wall_time = 0.0
+
+    def add_stage(self, name: str, fn: Callable[[Any], Any]):
+        """
+        Add a stage. `fn` receives the payload produced by the previous stage
+        (or the input item for the first stage) and returns the payload for the next one.
+        """
+        self.stages.append((name, fn))
+        self.stats.append(StageStats(name))
+
+    def _worker(self, stage_index: int, in_queue: queue.Queue, out_queue: queue.Queue,
+                on_item_done: Optional[Callable[[str, PipelineItem], None]]):
+        name, fn = self.stages[stage_index]
+        stats = self.stats[stage_index]
+        stats.start_time = time.perf_counter()
+
+        while True:
+            wait_start = time.perf_counter()
+            item = in_queue.get()
+            stats.wait_time += time.perf_counter() - wait_start
+
+            if item is _STOP:
+                out_queue.put(_STOP)
+                break
+
+            if item.error is None:
+                busy_start = time.perf_counter()
+                try:
+                    # One trace span per stage and page (each stage thread is its own lane in the trace)
+                    with span(name, page=item.key):
+                        item.payload = fn(item.payload)
+                except Exception as e:
+                    item.error = str(e)
+                    item.exception = e
+                    item.failed_stage = name
+                    stats.errors += 1
+                stats.busy_time += time.perf_counter() - busy_start
+                stats.items += 1
+
+            if on_item_done is not None:
+                # A failing callback (progress bar, tracing) must not kill the stage: the stages upstream
+                # would block on the full queue and run() would never return
+                try:
+                    on_item_done(name, item)
+                except Exception as e:
+                    print(f"Warning: on_item_done failed after stage '{name}' for item {item.key}: {e}")
+            out_queue.put(item)
+
+        stats.end_time = time.perf_counter()
+
+    def run(self, items: Iterable[tuple],
+            on_item_done: Optional[Callable[[str, PipelineItem], None]] = None,
+            collect_results: bool = True) -> List[PipelineItem]:
+        """
+        Push items through all stages.
+
+        :param items: Iterable of (key, payload) tuples. May be an endless generator (e.g. a watch-folder queue).
+        :param on_item_done: Optional callback(stage_name, item) called after each stage finishes an item
+                             (from the stage's thread), e.g. to update a progress bar.
+        :param collect_results: Keep finished items and return them. Turn off for long-running inputs
+                                so memory doesn't grow with the number of items.
+        :return: List of PipelineItem in completion order (empty if collect_results is False).
+        """
+        if not self.stages:
+            raise ValueError("Pipeline has no stages.")
+
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = []
+        for i, (name, _) in enumerate(self.stages):
+            t = threading.Thread(target=self._worker, args=(i, queues[i], queues[i + 1], on_item_done),
+                                 name=f"stage-{name}", daemon=True)
+            threads.append(t)
+
+        results = []
+
+        # Drain the last queue in its own thread so the final stage never blocks on a full queue
+        def _collect():
+            while True:
+                item = queues[-1].get()
+                if item is _STOP:
+                    break
+                if collect_results:
+                    results.append(item)
+
+        collector = threading.Thread(target=_collect, name="stage-collector", daemon=True)
+
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        collector.start()
+
+        # The stages are always stopped, even if `items` raises (the error is re-raised once they are done)
+        try:
+            for key, payload in items:
+                queues[0].put(PipelineItem(key, payload))
+        finally:
+            queues[0].put(_STOP)
+            for t in threads:
+                t.join()
+            collector.join()
+            self.wall_time = time.perf_counter() - start
+
+        return results
+
+    def bottleneck(self) -> Optional[StageStats]:
+        if not self.stats:
+            return None
+        return max(self.stats, key=lambda s: s.occupancy())
+
+    def print_report(self):
+        print(f"\n{'-'*100}")
+        print(f"Pipeline stage occupancy (wall time: {self.wall_time:.2f}s)")
+        for stats in self.stats:
+            print(f"  {stats}")
+        bottleneck = self.bottleneck()
+        if bottleneck is not None:
+            print(f"  Bottleneck stage: {bottleneck.name}")
+        print(f"{'-'*100}")
@@ -1,44 +1,55 @@
 import time
 
+from utils.tracing import span
+
 class Time:
     def __init__(self, minutes=0, seconds=0):
         self.minutes = minutes
         self.seconds = seconds
 
     def __str__(self):
-        return f"{self.minutes} minutes and {self.seconds} seconds"
-    
+        return f"{self.minutes} minutes and {self.seconds:.2f} seconds"
+
     def print(self):
-        print(f"Elapsed time: {self.minutes} minutes and {self.seconds} seconds")
+        print(f"Elapsed time: {self}")
 
 class Timer:
+    """
+    Stopwatch on the monotonic nanosecond clock.
+    While tracing is on (utils.tracing), start() / stop() also open / close a span named after the timer.
+    """
     def __init__(self, name: str = "Timer", runtime: Time = None):
         self.name = name
         self.runtime = runtime
 
         self.start_time = None
         self.end_time = None
+        self._span = None
 
     def start(self):
-        self.start_time = time.time()
+        self._span = span(self.name).__enter__()
+        self.start_time = time.perf_counter_ns()
 
     def stop(self):
-        self.end_time = time.time()
+        self.end_time = time.perf_counter_ns()
+        if self._span is not None:
+            self._span.__exit__(None, None, None)
+            self._span = None
         self.runtime_adjust()
 
     def elapsed(self):
+        """Elapsed seconds (float, nanosecond resolution)."""
         if self.start_time is None or self.end_time is None:
             raise ValueError("Timer has not been started and stopped properly.")
-        return self.end_time - self.start_time
-    
+        return (self.end_time - self.start_time) / 1e9
+
     # Runtime
     def runtime_adjust(self):
         elapsed_time = self.elapsed()
         minutes = int(elapsed_time // 60)
-        seconds = int(elapsed_time % 60)
+        seconds = elapsed_time % 60
         self.runtime = Time(minutes, seconds)
-    
+
     # __str__: method to print Timer info
     def __str__(self):
         return f"{self.name} - {self.runtime}"
-    
\ No newline at end of file
@@ -0,0 +1,283 @@
+"""
+Span tracing
+
+Nested timing spans (page -> stage -> step) measured with the monotonic nanosecond clock
+(time.perf_counter_ns). Spans nest per thread, so each pipelined stage thread gets its own tree.
+A span can carry attributes (segment counts, token totals, ...); numeric attributes are also summed per span name.
+
+Exports:
++ Chrome trace JSON (chrome://tracing, https://ui.perfetto.dev): one complete event per span
++ Prometheus textfile (node_exporter textfile collector): per span name duration histogram,
+  count / sum, and the totals of numeric attributes
+
+Tracing is off by default (Config.TRACE_ENABLED, --trace); when off, span() returns a shared no-op span,
+so an instrumented call costs one attribute check and one function call.
+
+Usage:
+    from utils.tracing import span, tracer
+
+    tracer.enable()
+    with span("page", page="483"):
+        with span("ocr"):
+            ...
+        with span("correction") as s:
+            s.set(segments=42)
+    tracer.export_chrome_trace("output/.trace/trace.json")
+    tracer.export_prometheus("output/.trace/metrics.prom")
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List
+
+from config import Config
+
+# Histogram buckets of the span durations (seconds)
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Span:
+    __slots__ = ('tracer', 'name', 'attributes', 'start_ns', 'end_ns', 'thread_id', 'depth')
+
+    def __init__(self, tracer: 'Tracer', name: str, attributes: dict):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.thread_id = 0
+        self.depth = 0
+
+    def set(self, **attributes):
+        """Add or overwrite attributes of the span."""
+        self.attributes.update(attributes)
+        return self
+
+    def add(self, **counts):
+        """Add to numeric attributes of the span (e.g. tokens per micro-batch)."""
+        for key, value in counts.items():
+            self.attributes[key] = self.attributes.get(key, 0) + value
+        return self
+
+    @property
+    def seconds(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.depth = len(stack)
+        self.thread_id = threading.get_ident()
+        stack.append(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        elif self in stack:
+            # Closed out of order (e.g. a Timer never stopped after an error): drop it and what it left open
+            del stack[stack.index(self):]
+        self.tracer._record(self)
+        return False
+
+
+class _NullSpan:
+    """Returned by span() while tracing is off: does nothing."""
+    __slots__ = ()
+    seconds = 0.0
+
+    def set(self, **attributes):
+        return self
+
+    def add(self, **counts):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class SpanStats:
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.attribute_totals: Dict[str, float] = {}
+
+    def add(self, span: Span):
+        seconds = span.seconds
+        self.count += 1
+        self.total_seconds += seconds
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+        for key, value in span.attributes.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.attribute_totals[key] = self.attribute_totals.get(key, 0) + value
+
+
+class Tracer:
+    def __init__(self, enabled: bool = Config.TRACE_ENABLED, max_spans: int = Config.TRACE_MAX_SPANS):
+        """
+        :param enabled: Record spans.
+        :param max_spans: Max finished spans kept for the Chrome trace (aggregates keep counting past it),
+                          so week-long runs don't grow without bound.
+        """
+        self.enabled = enabled
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self.stats: Dict[str, SpanStats] = {}
+        self.origin_ns = time.perf_counter_ns()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.spans = []
+            self.dropped = 0
+            self.stats = {}
+            self.origin_ns = time.perf_counter_ns()
+
+    def span(self, name: str, **attributes):
+        """
+        Context manager timing a block as a child of the thread's current span.
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attributes)
+
+    def current(self):
+        """Innermost open span of this thread (the no-op span if none or tracing is off)."""
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1] if stack else NULL_SPAN
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, span: Span):
+        with self._lock:
+            stats = self.stats.get(span.name)
+            if stats is None:
+                stats = self.stats[span.name] = SpanStats()
+            stats.add(span)
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    def summary(self) -> str:
+        lines = [f"Trace: {sum(stats.count for stats in self.stats.values())} spans"
+                 + (f" ({self.dropped} not kept for the trace file)" if self.dropped else "")]
+        for name, stats in sorted(self.stats.items(), key=lambda item: -item[1].total_seconds):
+            lines.append(f"  {name:<28} count={stats.count:<6} total={stats.total_seconds:9.3f}s "
+                         f"mean={stats.total_seconds / stats.count * 1000:9.2f}ms")
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path: str):
+        """
+        Write the kept spans as Chrome trace events ("X" complete events, microseconds).
+        """
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        thread_ids = {}
+        events = []
+        for span in sorted(spans, key=lambda s: (s.start_ns, s.depth)):
+            tid = thread_ids.setdefault(span.thread_id, len(thread_ids) + 1)
+            events.append({
+                'name': span.name,
+                'ph': 'X',
+                'ts': (span.start_ns - self.origin_ns) / 1000,
+                'dur': (span.end_ns - span.start_ns) / 1000,
+                'pid': pid,
+                'tid': tid,
+                'args': {key: value if isinstance(value, (int, float, bool)) or value is None else str(value)
+                         for key, value in span.attributes.items()},
+            })
+        _write_atomic(path, json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}, ensure_ascii=False))
+
+    def export_prometheus(self, path: str, prefix: str = Config.TRACE_METRIC_PREFIX):
+        """
+        Write the aggregates in the Prometheus text format (for the node_exporter textfile collector).
+        """
+        with self._lock:
+            stats = {name: stats for name, stats in self.stats.items()}
+
+        duration = f"{prefix}_span_duration_seconds"
+        attribute = f"{prefix}_span_attribute_total"
+        lines = [f"# HELP {duration} Duration of traced spans.", f"# TYPE {duration} histogram"]
+        for name, span_stats in sorted(stats.items()):
+            label = _label(name)
+            for bound, count in zip(DURATION_BUCKETS, span_stats.buckets):
+                lines.append(f'{duration}_bucket{{span="{label}",le="{bound}"}} {count}')
+            lines.append(f'{duration}_bucket{{span="{label}",le="+Inf"}} {span_stats.count}')
+            lines.append(f'{duration}_sum{{span="{label}"}} {span_stats.total_seconds:.9f}')
+            lines.append(f'{duration}_count{{span="{label}"}} {span_stats.count}')
+
+        lines += [f"# HELP {attribute} Sum of the numeric attributes of traced spans.", f"# TYPE {attribute} counter"]
+        for name, span_stats in sorted(stats.items()):
+            for key, total in sorted(span_stats.attribute_totals.items()):
+                lines.append(f'{attribute}{{span="{_label(name)}",attribute="{_label(key)}"}} {total}')
+        _write_atomic(path, "\n".join(lines) + "\n")
+
+    def export(self, trace_dir: str = Config.TRACE_DIR):
+        """
+        Write trace.json and metrics.prom to trace_dir.
+
+        :return: (chrome trace path, prometheus textfile path)
+        """
+        os.makedirs(trace_dir, exist_ok=True)
+        trace_path = os.path.join(trace_dir, "trace.json")
+        metrics_path = os.path.join(trace_dir, "metrics.prom")
+        self.export_chrome_trace(trace_path)
+        self.export_prometheus(metrics_path)
+        return trace_path, metrics_path
+
+
+def _label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_atomic(path: str, text: str):
+    # The textfile collector may read at any time: never expose a half-written file
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# Process-wide tracer used by the pipeline modules
+tracer = Tracer()
+
+
+def span(name: str, **attributes):
+    """Span on the process-wide tracer (no-op span while tracing is off)."""
+    if not tracer.enabled:
+        return NULL_SPAN
+    return Span(tracer, name, attributes)
+
+
+def current_span():
+    return tracer.current()
@@ -0,0 +1,213 @@
+"""
+Watcher Module
+
+Watch-folder ingestion: scanners drop pages into the input folder all day; pick up new or modified
+images as soon as they are fully written and push them through OCR -> correction -> DOCX,
+with the models loaded once.
+
++ polling (no extra dependency); a file is considered fully written once its size and mtime
+  haven't changed for Config.WATCH_DEBOUNCE_SECONDS
++ pages and stages that are up to date in their build manifest (build_manifest.py) are skipped, as in the
+  other modes: a new correction model or DOCX code re-runs only the stages it affects
++ pages flow through the staged pipeline (utils.pipeline) so OCR / correction / DOCX overlap
++ queue depth (pages waiting or in flight) and end-to-end latency (first seen -> DOCX written) are reported;
+  the latency percentiles cover the last Config.WATCH_LATENCY_WINDOW pages, so memory stays bounded
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Iterable, List, Tuple
+
+from build_manifest import BuildPlanner
+from config import Config
+from output_folder import OutputPageFolder
+from utils.pipeline import StagedPipeline
+
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.tiff', '.bmp')
+
+
+def _percentile(values: Iterable[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class FolderWatcher:
+    def __init__(self, input_folder: str, output_base_folder: str,
+                 debounce_seconds: float = Config.WATCH_DEBOUNCE_SECONDS,
+                 planner: BuildPlanner = None):
+        """
+        :param input_folder: Folder the scanners write <page_number>.<ext> images to.
+        :param output_base_folder: Output folder (OutputPageFolder layout).
+        :param debounce_seconds: Time a file's size / mtime must stay unchanged before it is picked up.
+        :param planner: Build planner deciding which pages are up to date (default: a new BuildPlanner).
+        """
+        self.input_folder = input_folder
+        self.output_base_folder = output_base_folder
+        self.debounce_seconds = debounce_seconds
+        self.planner = planner if planner is not None else BuildPlanner()
+
+        # path -> {'signature': (size, mtime_ns), 'changed_at': ..., 'arrival': ..., 'queued': bool};
+        # only the files of the last scan are kept
+        self.files = {}
+        self.skipped_current = 0
+
+    def poll(self) -> List[Tuple[str, str, float, object]]:
+        """
+        Scan the folder once.
+
+        :return: Newly ready pages as (page_number, image_path, arrival_time, build manifest).
+        """
+        now = time.time()
+        ready = []
+        seen = set()
+        for entry in os.scandir(self.input_folder):
+            if not entry.is_file() or not entry.name.lower().endswith(IMAGE_EXTS):
+                continue
+            seen.add(entry.path)
+            stat = entry.stat()
+            signature = (stat.st_size, stat.st_mtime_ns)
+            state = self.files.get(entry.path)
+
+            if state is None or state['signature'] != signature:
+                # New file, or still being written / modified again
+                arrival = state['arrival'] if state is not None and not state['queued'] else now
+                self.files[entry.path] = {'signature': signature, 'changed_at': now, 'arrival': arrival, 'queued': False}
+                continue
+
+            if state['queued'] or now - state['changed_at'] < self.debounce_seconds or stat.st_size == 0:
+                continue
+
+            state['queued'] = True
+            page_number = os.path.splitext(entry.name)[0]
+            output_folder = OutputPageFolder(base_output_dir=self.output_base_folder, page_number=page_number)
+            manifest = self.planner.manifest(output_folder, entry.path)
+            if self.planner.is_complete(manifest):
+                self.skipped_current += 1
+                continue
+            ready.append((page_number, entry.path, state['arrival'], manifest))
+
+        # Forget deleted files (a file put back later is a new arrival)
+        for path in [path for path in self.files if path not in seen]:
+            del self.files[path]
+        return ready
+
+
+def watch_folder(input_folder: str, output_base_folder: str = "output",
+                 poll_interval: float = Config.WATCH_POLL_INTERVAL,
+                 debounce_seconds: float = Config.WATCH_DEBOUNCE_SECONDS,
+                 latency_window: int = Config.WATCH_LATENCY_WINDOW,
+                 force: bool = False):
+    """
+    Process pages as they arrive in input_folder until interrupted (Ctrl+C).
+
+    :param latency_window: Last pages the latency percentiles are computed over.
+    :param force: Run every stage of every page that arrives, even if up to date.
+    """
+    from components import LazyComponent
+    from docx_builder import build_docx_from_ocr_json
+
+    # Built on first use: a folder whose pages are all up to date loads no model
+    ocr_engine = LazyComponent('ocr_engine')
+    text_corrector = LazyComponent('text_corrector')
+
+    planner = BuildPlanner(force=force)
+    watcher = FolderWatcher(input_folder, output_base_folder, debounce_seconds=debounce_seconds, planner=planner)
+    work_queue = queue.Queue()
+    in_flight = 0
+    in_flight_lock = threading.Lock()
+    latencies = deque(maxlen=latency_window)
+    done = failed = 0
+    max_latency = 0.0
+
+    def run_stage(page, stage, fn):
+        if not planner.needs(page['manifest'], stage):
+            return None
+        start = time.perf_counter()
+        result = fn()
+        planner.done(page['manifest'], stage, time.perf_counter() - start)
+        return result
+
+    def ocr_stage(page):
+        page['decoded'] = run_stage(page, 'ocr', lambda: ocr_engine.predict_page(page['input_path'], page['output_folder']))
+        return page
+
+    def correction_stage(page):
+        output_folder = page['output_folder']
+        run_stage(page, 'correction', lambda: text_corrector.improve_json(
+            input_json=output_folder.res_json_path, output_json=output_folder.improved_json_path))
+        return page
+
+    def docx_stage(page):
+        output_folder = page['output_folder']
+        decoded = page.pop('decoded', None)
+        run_stage(page, 'docx', lambda: build_docx_from_ocr_json(
+            res_path=output_folder.page_output_dir, save_path=output_folder.docx_path,
+            source_image_path=page['input_path'], source_page=decoded))
+        return page
+
+    def on_item_done(stage_name, item):
+        nonlocal in_flight, done, failed, max_latency
+        if stage_name != "docx":
+            return
+        with in_flight_lock:
+            in_flight -= 1
+            depth = in_flight
+        if item.error is not None:
+            failed += 1
+            print(f"Page {item.key} failed at stage '{item.failed_stage}': {item.error} (queue depth {depth})")
+            return
+        latency = time.time() - item.payload['arrival']
+        latencies.append(latency)
+        done += 1
+        max_latency = max(max_latency, latency)
+        print(f"Page {item.key} done: {latency:.2f}s from arrival to DOCX (queue depth {depth})")
+
+    def items():
+        while True:
+            item = work_queue.get()
+            if item is None:
+                return
+            yield item
+
+    pipeline = StagedPipeline()
+    pipeline.add_stage("ocr", ocr_stage)
+    pipeline.add_stage("correction", correction_stage)
+    pipeline.add_stage("docx", docx_stage)
+    runner = threading.Thread(target=pipeline.run, args=(items(),),
+                              kwargs={'on_item_done': on_item_done, 'collect_results': False},
+                              name="watch-pipeline", daemon=True)
+    runner.start()
+
+    print(f"Watching {input_folder} (poll every {poll_interval}s, debounce {debounce_seconds}s). Press Ctrl+C to stop.")
+    try:
+        while True:
+            for page_number, input_path, arrival, manifest in watcher.poll():
+                output_folder = OutputPageFolder(base_output_dir=output_base_folder, page_number=page_number)
+                with in_flight_lock:
+                    in_flight += 1
+                    depth = in_flight
+                print(f"Queued page {page_number} (queue depth {depth})")
+                work_queue.put((page_number, {'output_folder': output_folder, 'input_path': input_path,
+                                              'arrival': arrival, 'manifest': manifest}))
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("\nStopping: finishing queued pages...")
+    finally:
+        work_queue.put(None)
+        runner.join()
+
+    pipeline.print_report()
+    print(f"Watch summary: {done} pages done, {failed} failed, "
+          f"{watcher.skipped_current} skipped (outputs already current)")
+    if latencies:
+        print(f"End-to-end latency (last {len(latencies)} pages): p50 {_percentile(latencies, 0.5):.2f}s, "
+              f"p95 {_percentile(latencies, 0.95):.2f}s; max {max_latency:.2f}s")
+    print(planner.summary())
+    if text_corrector.loaded:
+        print(text_corrector.summary())